@@ -0,0 +1,469 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import re
+import sys
+import queue
+import bisect
+import subprocess
+import threading
+from array import array
+from collections import deque
+from statistics import median_low
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from proxy import display_size, proxy_size
+from utils import fps_passthrough_args
+
+# Frames are decoded to 8-bit luma fitting within this
+ANALYSIS_MAX_DIMENSION = 320
+
+# Decoded frames in flight between the reader and the analyzers
+ANALYSIS_BUFFERS = 4
+
+# How long a frame waits for its showinfo timestamp on stderr
+TIMESTAMP_WAIT_SECONDS = 5
+
+# Mean luma (0-255) at or below which a row or column counts as black
+BLACK_LIMIT = 24
+
+# Scene cuts: score threshold (0-1) and shortest scene
+SCENE_CUT_THRESHOLD = 0.3
+MIN_SCENE_SECONDS = 0.5
+
+# Signature used to compare consecutive frames
+SIGNATURE_GRID = 8
+SIGNATURE_BINS = 16
+
+_PTS_TIME = re.compile(r"\bn:\s*(\d+).*?\bpts_time:\s*(-?[\d.]+)")
+
+
+# Kernels. Each takes a frame as a memoryview of width*height luma bytes
+# and uses NumPy when it is importable; the fallbacks stay on C-level
+# bytes operations (slicing, sum, translate, count) where they can.
+
+def _pixels(frame, width, height):
+    # A zero-copy view of the pool buffer; must not outlive the feed() call
+    return numpy.frombuffer(frame, dtype=numpy.uint8).reshape(height, width)
+
+
+def content_bounds(frame, width, height, limit=BLACK_LIMIT):
+    """
+    (left, top, right, bottom) of the area inside black bars, right and
+    bottom exclusive; None when the whole frame is black, or no column
+    rises above `limit` (a few dim lines on black).
+    """
+    if numpy is not None:
+        pixels = _pixels(frame, width, height)
+        rows = numpy.flatnonzero(pixels.mean(axis=1) > limit)
+        if not rows.size:
+            return None
+        top, bottom = int(rows[0]), int(rows[-1]) + 1
+        columns = numpy.flatnonzero(pixels[top:bottom].mean(axis=0) > limit)
+        if not columns.size:
+            return None
+        return int(columns[0]), top, int(columns[-1]) + 1, bottom
+
+    # Rows are scanned in from each edge, so only the bars and one
+    # line of picture are summed rather than the whole frame
+    row_limit = limit * width
+    top = 0
+    while top < height and sum(frame[top * width:(top + 1) * width]) <= row_limit:
+        top += 1
+    if top == height:
+        return None
+    bottom = height
+    while sum(frame[(bottom - 1) * width:bottom * width]) <= row_limit:
+        bottom -= 1
+    column_limit = limit * (bottom - top)
+    left = 0
+    while left < width and sum(frame[top * width + left:bottom * width:width]) <= column_limit:
+        left += 1
+    if left == width:
+        return None
+    right = width
+    while right > left and sum(frame[top * width + right - 1:bottom * width:width]) <= column_limit:
+        right -= 1
+    return left, top, right, bottom
+
+
+_BIN_TABLE = bytes(value * SIGNATURE_BINS // 256 for value in range(256))
+
+
+def luma_histogram(frame, width, height, bins=SIGNATURE_BINS):
+    """Pixel counts in `bins` equal luma ranges."""
+    if numpy is not None:
+        shift = (256 // bins).bit_length() - 1
+        return numpy.bincount(numpy.frombuffer(frame, dtype=numpy.uint8) >> shift, minlength=bins).tolist()
+    table = _BIN_TABLE if bins == SIGNATURE_BINS else bytes(value * bins // 256 for value in range(256))
+    binned = frame.tobytes().translate(table)
+    return [binned.count(b) for b in range(bins)]
+
+
+def block_means(frame, width, height, grid=SIGNATURE_GRID):
+    """Mean luma of a grid x grid layout of blocks, row by row."""
+    block_w, block_h = width // grid, height // grid
+    if numpy is not None:
+        pixels = _pixels(frame, width, height)[:block_h * grid, :block_w * grid]
+        return pixels.reshape(grid, block_h, grid, block_w).mean(axis=(1, 3)).ravel().tolist()
+    sums = [0] * (grid * grid)
+    for y in range(block_h * grid):
+        base = (y // block_h) * grid
+        start = y * width
+        for column in range(grid):
+            sums[base + column] += sum(frame[start + column * block_w:start + (column + 1) * block_w])
+    area = block_w * block_h
+    return [total / area for total in sums]
+
+
+class FrameAnalyzer:
+    """
+    Base class for analyzers fed by an AnalysisPipeline. begin() gets the
+    decoded frame size, feed() every frame in presentation order as a
+    memoryview of luma bytes (only valid during the call, as the buffer
+    goes back to the pool), and finish() returns the analyzer's result.
+    """
+
+    name = None
+
+    def begin(self, width, height):
+        self.width, self.height = width, height
+
+    def feed(self, frame, number, time):
+        raise NotImplementedError
+
+    def finish(self):
+        return None
+
+
+class BlackBarsAnalyzer(FrameAnalyzer):
+    """
+    Records the picture area of every frame (in analysis pixels), so bars
+    can be measured over any time range afterwards with bars_between().
+    Fully black frames are skipped.
+    """
+
+    name = "blackbars"
+
+    def __init__(self, limit=BLACK_LIMIT):
+        self.limit = limit
+        self.times = array('d')
+        # left, top, right, bottom per frame, flattened
+        self.bounds = array('H')
+
+    def feed(self, frame, number, time):
+        bounds = content_bounds(frame, self.width, self.height, self.limit)
+        if bounds is not None and time is not None:
+            self.times.append(time)
+            self.bounds.extend(bounds)
+
+    def bars_between(self, start=None, end=None):
+        """Median (left, top, right, bottom) of frames in [start, end); None if there are none."""
+        first = 0 if start is None else bisect.bisect_left(self.times, start)
+        last = len(self.times) if end is None else bisect.bisect_left(self.times, end)
+        edges = [self.bounds[i * 4:i * 4 + 4] for i in range(first, last)]
+        if not edges:
+            return None
+        return tuple(median_low(values) for values in zip(*edges))
+
+    def finish(self):
+        bars = self.bars_between()
+        return {"frames": len(self.times), "bounds": bars, "size": (self.width, self.height)}
+
+
+class SceneCutAnalyzer(FrameAnalyzer):
+    """
+    Scores how much each frame differs from the previous one, from a grid
+    of block means (where things are) and a luma histogram (what tones
+    there are), and reports frames scoring at least `threshold` as cuts.
+    Only the small signature of the previous frame is kept.
+    """
+
+    name = "scenecuts"
+
+    def __init__(self, threshold=SCENE_CUT_THRESHOLD, min_scene=MIN_SCENE_SECONDS):
+        self.threshold = threshold
+        self.min_scene = min_scene
+        self.cut_times = array('d')
+        self.cut_scores = array('d')
+        self.frames = 0
+        self._previous = None
+        self._last_cut = None
+
+    def score(self, signature):
+        grid, histogram = signature
+        previous_grid, previous_histogram = self._previous
+        moved = sum(abs(a - b) for a, b in zip(grid, previous_grid)) / (len(grid) * 255)
+        pixels = sum(histogram) or 1
+        retoned = sum(abs(a - b) for a, b in zip(histogram, previous_histogram)) / (2 * pixels)
+        return (moved + retoned) / 2
+
+    def feed(self, frame, number, time):
+        signature = (
+            block_means(frame, self.width, self.height),
+            luma_histogram(frame, self.width, self.height),
+        )
+        self.frames += 1
+        if self._previous is not None and time is not None:
+            score = self.score(signature)
+            spaced = self._last_cut is None or time - self._last_cut >= self.min_scene
+            if score >= self.threshold and spaced:
+                self.cut_times.append(time)
+                self.cut_scores.append(round(score, 4))
+                self._last_cut = time
+        self._previous = signature
+
+    def finish(self):
+        return {"frames": self.frames, "cuts": len(self.cut_times)}
+
+
+class FramePool:
+    """
+    A fixed set of frame buffers carved from one preallocated bytearray.
+    acquire() hands out a free slot (blocking while all are in use),
+    release() returns it; frames are read straight into view(slot).
+    """
+
+    def __init__(self, frame_size, count=ANALYSIS_BUFFERS):
+        self.frame_size = frame_size
+        self._buffer = bytearray(frame_size * count)
+        self._view = memoryview(self._buffer)
+        self._free = queue.Queue()
+        for slot in range(count):
+            self._free.put(slot)
+
+    def acquire(self, timeout=None):
+        """A free slot; raises queue.Empty after `timeout` seconds."""
+        return self._free.get(timeout=timeout)
+
+    def release(self, slot):
+        self._free.put(slot)
+
+    def view(self, slot):
+        return self._view[slot * self.frame_size:(slot + 1) * self.frame_size]
+
+
+class AnalysisPipeline:
+    """
+    Decodes the video once, downscaled to 8-bit luma rawvideo, and feeds
+    every frame to each registered FrameAnalyzer, so any number of
+    analyses cost a single ffmpeg decode.
+
+    A reader thread fills FramePool buffers from ffmpeg's stdout while
+    the analyzers run on the previous frames; frame timestamps come from
+    showinfo on stderr and are relative to the first frame, matching the
+    player's clock. Register analyzers before start().
+    """
+
+    def __init__(self, file_path, probe, fps=None, verbose=False):
+        self.file_path = file_path
+        self.duration = probe.get('duration') or 0.0
+        self.fps = fps
+        self.verbose = verbose
+        width, height = display_size(probe)
+        self.width, self.height = proxy_size(width, height, ANALYSIS_MAX_DIMENSION) if width and height else (0, 0)
+        self.analyzers = []
+        self.results = {}
+        self.frames = 0
+        self.analyzed = 0.0
+        self.error = None
+        self._process = None
+        self._stopping = False
+        self._done = threading.Event()
+        self._thread = None
+
+    @property
+    def done(self):
+        return self._done.is_set()
+
+    @property
+    def failed(self):
+        return self.error is not None
+
+    def register(self, analyzer):
+        if self._thread is not None:
+            raise RuntimeError("analyzers must be registered before the pipeline starts")
+        self.analyzers.append(analyzer)
+        return analyzer
+
+    def analyzer(self, name):
+        for analyzer in self.analyzers:
+            if analyzer.name == name:
+                return analyzer
+        return None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="mediacrop-analysis", daemon=True)
+            self._thread.start()
+        return self
+
+    def wait(self, timeout=None):
+        return self._done.wait(timeout)
+
+    def stop(self):
+        self._stopping = True
+        process = self._process
+        if process is not None and process.poll() is None:
+            process.kill()
+
+    def status(self):
+        """Progress summary for the /jobs endpoint."""
+        if self.failed:
+            state, progress = "failed", None
+        elif self.done:
+            state, progress = "done", 1.0
+        else:
+            state = "running"
+            progress = round(min(1.0, self.analyzed / self.duration), 3) if self.duration else None
+        return {"state": state, "progress": progress, "error": self.error}
+
+    def command(self):
+        filters = []
+        if self.fps:
+            filters.append(f"fps={self.fps}")
+        filters += [
+            f"scale={self.width}:{self.height}:flags=area",
+            "showinfo",
+            "format=gray",
+        ]
+        return [
+            "ffmpeg", "-v", "info", "-nostdin", "-nostats",
+            "-i", self.file_path, "-map", "0:v:0", "-an", "-sn",
+            "-vf", ",".join(filters),
+            # Exactly one frame per showinfo line: no CFR duplicates or drops
+            *fps_passthrough_args(),
+            "-f", "rawvideo", "pipe:1",
+        ]
+
+    def _run(self):
+        try:
+            if not self.width or not self.height:
+                raise RuntimeError("video size unknown")
+            if not self.analyzers:
+                raise RuntimeError("no analyzers registered")
+            self._decode()
+            self.results = {analyzer.name: analyzer.finish() for analyzer in self.analyzers}
+        except Exception as e:
+            self.error = str(e)
+            print(f"Analysis error: {e}", file=sys.stderr)
+        finally:
+            self._done.set()
+
+    def _decode(self):
+        command = self.command()
+        if self.verbose:
+            print(f"Analyzing frames: {' '.join(command)}")
+        try:
+            self._process = process = subprocess.Popen(
+                command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, bufsize=0)
+        except FileNotFoundError:
+            raise RuntimeError("'ffmpeg' command not found in PATH.")
+
+        for analyzer in self.analyzers:
+            analyzer.begin(self.width, self.height)
+        pool = FramePool(self.width * self.height)
+        timestamps = queue.Queue()
+        messages = deque(maxlen=5)
+        # Unbounded, but never holds more than the pool's slots (plus the end marker)
+        filled = queue.Queue()
+        stderr_thread = threading.Thread(
+            target=self._read_timestamps, args=(process.stderr, timestamps, messages),
+            name="mediacrop-analysis-log", daemon=True)
+        reader_thread = threading.Thread(
+            target=self._read_frames, args=(process.stdout, pool, filled),
+            name="mediacrop-analysis-reader", daemon=True)
+        stderr_thread.start()
+        reader_thread.start()
+
+        start_time = None
+        log_ended = False
+        try:
+            while True:
+                slot = filled.get()
+                if slot is None:
+                    break
+                time = None
+                if not log_ended:
+                    try:
+                        time = timestamps.get(timeout=TIMESTAMP_WAIT_SECONDS)
+                        # None marks the end of ffmpeg's log: no more timestamps will come
+                        log_ended = time is None
+                    except queue.Empty:
+                        pass
+                if time is not None:
+                    if start_time is None:
+                        start_time = time
+                    time = round(time - start_time, 6)
+                    self.analyzed = time
+                frame = pool.view(slot)
+                try:
+                    for analyzer in self.analyzers:
+                        analyzer.feed(frame, self.frames, time)
+                finally:
+                    pool.release(slot)
+                self.frames += 1
+        except BaseException:
+            self.stop()
+            raise
+        finally:
+            reader_thread.join()
+            if self._stopping and process.poll() is None:
+                # Stopped before the process was published to stop()
+                process.kill()
+            returncode = process.wait()
+            stderr_thread.join()
+            self._process = None
+
+        if self._stopping:
+            raise RuntimeError("analysis stopped")
+        if returncode != 0 and not self.frames:
+            raise RuntimeError(messages[-1] if messages else f"ffmpeg exited with status {returncode}")
+        if not self.frames:
+            raise RuntimeError("no video frames decoded")
+
+    def _read_frames(self, stdout, pool, filled):
+        """Reader thread: fills pool slots from ffmpeg's stdout; puts None at the end."""
+        try:
+            while not self._stopping:
+                try:
+                    slot = pool.acquire(timeout=1.0)
+                except queue.Empty:
+                    continue
+                view = pool.view(slot)
+                length = 0
+                try:
+                    while length < pool.frame_size:
+                        n = stdout.readinto(view[length:])
+                        if not n:
+                            break
+                        length += n
+                except (OSError, ValueError):
+                    length = 0
+                if length < pool.frame_size:
+                    pool.release(slot)
+                    break
+                filled.put(slot)
+        finally:
+            filled.put(None)
+
+    @staticmethod
+    def _read_timestamps(stderr, timestamps, messages):
+        """
+        Log thread: queues each frame's showinfo pts_time, keeps the last
+        other lines, and queues None once the log ends.
+        """
+        try:
+            for line in stderr:
+                text = line.decode("utf-8", "replace").strip()
+                match = _PTS_TIME.search(text) if "showinfo" in text else None
+                if match:
+                    timestamps.put(float(match.group(2)))
+                elif text:
+                    messages.append(text)
+        finally:
+            timestamps.put(None)
@@ -0,0 +1,113 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import struct
+
+# Image formats that may be animated
+ANIMATED_EXTS = [".gif", ".png", ".webp"]
+
+# Smaller animations play fine as an <img>; larger ones go through a video proxy
+ANIMATED_PROXY_MIN_BYTES = 4 * 1024 * 1024
+
+
+def _skip_sub_blocks(f):
+    while True:
+        size = f.read(1)
+        if not size or size[0] == 0:
+            return
+        f.seek(size[0], os.SEEK_CUR)
+
+
+def _gif_frames(f, limit):
+    header = f.read(13)
+    if len(header) < 13 or header[:6] not in (b"GIF87a", b"GIF89a"):
+        return 0
+    flags = header[10]
+    if flags & 0x80:
+        # Global color table
+        f.seek(3 * (2 << (flags & 7)), os.SEEK_CUR)
+    frames = 0
+    while frames < limit:
+        introducer = f.read(1)
+        if introducer == b"!":
+            f.read(1)
+            _skip_sub_blocks(f)
+        elif introducer == b",":
+            descriptor = f.read(9)
+            if len(descriptor) < 9:
+                break
+            frames += 1
+            if descriptor[8] & 0x80:
+                f.seek(3 * (2 << (descriptor[8] & 7)), os.SEEK_CUR)
+            f.read(1)
+            _skip_sub_blocks(f)
+        else:
+            # Trailer, end of file or garbage
+            break
+    return frames
+
+
+def _png_frames(f, limit):
+    if f.read(8) != b"\x89PNG\r\n\x1a\n":
+        return 0
+    while True:
+        header = f.read(8)
+        if len(header) < 8:
+            return 1
+        length, chunk_type = struct.unpack(">I4s", header)
+        if chunk_type == b"acTL":
+            # APNG: the animation control chunk precedes the image data
+            return min(struct.unpack(">I", f.read(4))[0], limit)
+        if chunk_type == b"IDAT":
+            return 1
+        f.seek(length + 4, os.SEEK_CUR)
+
+
+def _webp_frames(f, limit):
+    header = f.read(12)
+    if len(header) < 12 or header[:4] != b"RIFF" or header[8:12] != b"WEBP":
+        return 0
+    frames = 0
+    while frames < limit:
+        chunk = f.read(8)
+        if len(chunk) < 8:
+            break
+        chunk_type, length = struct.unpack("<4sI", chunk)
+        if chunk_type in (b"VP8 ", b"VP8L"):
+            return max(frames, 1)
+        if chunk_type == b"ANMF":
+            frames += 1
+        # Chunks are padded to an even length
+        f.seek(length + (length & 1), os.SEEK_CUR)
+    return frames
+
+
+def count_frames(file_path, limit=2):
+    """
+    Counts the frames of a GIF, PNG/APNG or WebP by walking its block or
+    chunk headers (pixel data is skipped, not decoded), stopping at
+    `limit`. Returns 0 for other files.
+    """
+    with open(file_path, "rb") as f:
+        magic = f.read(12)
+        f.seek(0)
+        if magic[:3] == b"GIF":
+            return _gif_frames(f, limit)
+        if magic[:8] == b"\x89PNG\r\n\x1a\n":
+            return _png_frames(f, limit)
+        if magic[:4] == b"RIFF" and magic[8:12] == b"WEBP":
+            return _webp_frames(f, limit)
+    return 0
+
+
+def needs_animation_proxy(ext, file_path):
+    """True for a large animated image that should play from a video proxy."""
+    if ext not in ANIMATED_EXTS:
+        return False
+    try:
+        if os.path.getsize(file_path) < ANIMATED_PROXY_MIN_BYTES:
+            return False
+        return count_frames(file_path) >= 2
+    except (OSError, struct.error):
+        return False
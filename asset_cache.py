@@ -0,0 +1,154 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import gzip
+import hashlib
+import zlib
+import threading
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Preferred order when the client accepts several encodings equally
+ENCODING_PREFERENCE = ("br", "gzip", "deflate", "identity")
+
+
+def minify_whitespace(text):
+    """
+    Whitespace-only minifier for the inline CSS/JS/HTML: strips indentation,
+    trailing spaces, blank lines and full-line // comments. Line breaks are
+    kept so JavaScript automatic semicolon insertion is unaffected.
+    """
+    lines = []
+    for line in text.splitlines():
+        line = line.strip()
+        if not line or line.startswith("// "):
+            continue
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def content_hash(text):
+    """Hash of an asset's served (minified) bytes, used in its static URL."""
+    return hashlib.sha1(minify_whitespace(text).encode("utf-8")).hexdigest()[:16]
+
+
+def static_url(name, extension, text):
+    """Content-addressed URL, e.g. /static/main.<hash>.js."""
+    return f"/static/{name}.{content_hash(text)}.{extension}"
+
+
+def parse_accept_encoding(header):
+    """Returns {encoding: qvalue} from an Accept-Encoding header."""
+    accepted = {}
+    if not header:
+        return accepted
+    for part in header.split(","):
+        fields = part.strip().split(";")
+        name = fields[0].strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        for param in fields[1:]:
+            param = param.strip()
+            if param.startswith("q="):
+                try:
+                    q = float(param[2:])
+                except ValueError:
+                    q = 0.0
+        accepted[name] = q
+    return accepted
+
+
+class EncodedAsset:
+    """One text asset, minified and precompressed once into every supported encoding."""
+
+    __slots__ = ('content_type', 'variants')
+
+    def __init__(self, text, content_type):
+        self.content_type = content_type
+        raw = minify_whitespace(text).encode("utf-8")
+        self.variants = {
+            "identity": raw,
+            "gzip": gzip.compress(raw, compresslevel=9),
+            "deflate": zlib.compress(raw, 9),
+        }
+        if brotli is not None:
+            self.variants["br"] = brotli.compress(raw)
+
+    def negotiate(self, accept_encoding):
+        """Returns (encoding, body) for the best variant the client accepts."""
+        accepted = parse_accept_encoding(accept_encoding)
+        wildcard = accepted.get("*")
+        best = None
+        best_q = 0.0
+        for encoding in ENCODING_PREFERENCE:
+            if encoding not in self.variants:
+                continue
+            q = accepted.get(encoding, wildcard)
+            if q is None:
+                # identity is acceptable unless explicitly refused
+                q = 0.001 if encoding == "identity" else 0.0
+            if q > best_q:
+                best, best_q = encoding, q
+        if best is None:
+            best = "identity"
+        return best, self.variants[best]
+
+
+class PageAssets:
+    """
+    Encoded variants for one render of the index page plus the script and
+    stylesheet it references, indexed by their content-hashed URLs.
+    """
+
+    __slots__ = ('key', 'html', 'js', 'css', 'static')
+
+    def __init__(self, key, html, js, css):
+        self.key = key
+        self.html = EncodedAsset(html, "text/html; charset=utf-8")
+        self.js = EncodedAsset(js, "application/javascript; charset=utf-8")
+        self.css = EncodedAsset(css, "text/css; charset=utf-8")
+        self.static = {
+            static_url("main", "js", js): self.js,
+            static_url("style", "css", css): self.css,
+        }
+
+
+class RenderedAssetCache:
+    """
+    Render-once cache for the index page and /main.js.
+
+    Renders are stored by their render key (media_type, ext, rotation,
+    token, media tag). A second map from the file version (stat key plus
+    token) to the render key lets a request find its assets with a
+    dictionary lookup instead of re-deriving the media info.
+    """
+
+    def __init__(self):
+        self._renders = {}
+        self._versions = {}
+        self._lock = threading.Lock()
+
+    def get(self, version, render):
+        """
+        Returns the PageAssets for `version`, calling `render()` (which must
+        return (key, html, js, css)) only on a miss.
+        """
+        with self._lock:
+            key = self._versions.get(version)
+            if key is not None:
+                return self._renders[key]
+
+        key, html, js, css = render()
+
+        with self._lock:
+            assets = self._renders.get(key)
+            if assets is None:
+                assets = PageAssets(key, html, js, css)
+            # Only the latest file version is ever requested again
+            self._versions = {version: key}
+            self._renders = {key: assets}
+            return assets
@@ -0,0 +1,229 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import re
+import sys
+import subprocess
+import threading
+from statistics import median_low
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from proxy import display_size
+from utils import ffmpeg_older_than
+
+# Evenly spaced sample windows, each decoded keyframes only
+AUTOCROP_WINDOWS = 8
+AUTOCROP_WINDOW_SECONDS = 20
+
+# Frames are analysed at most this wide; results are scaled back up
+AUTOCROP_MAX_WIDTH = 960
+
+# cropdetect's black threshold (0-255) and rounding of the detected size
+CROPDETECT_LIMIT = 24
+CROPDETECT_ROUND = 2
+
+_CROP = re.compile(r"crop=(\d+):(\d+):(\d+):(\d+)")
+
+
+def window_starts(duration, windows=AUTOCROP_WINDOWS, seconds=AUTOCROP_WINDOW_SECONDS):
+    """Start times of `windows` sample windows centred on equal slices of the file."""
+    if duration <= seconds:
+        return [0.0]
+    windows = max(1, min(windows, int(duration // seconds)))
+    starts = []
+    for i in range(windows):
+        centre = duration * (i + 0.5) / windows
+        starts.append(max(0.0, min(duration - seconds, centre - seconds / 2)))
+    return starts
+
+
+def analysis_size(width, height):
+    """Even-sized dimensions the frames are scaled to before cropdetect."""
+    if width <= AUTOCROP_MAX_WIDTH:
+        return width, height
+    return AUTOCROP_MAX_WIDTH, max(2, round(height * AUTOCROP_MAX_WIDTH / width / 2) * 2)
+
+
+def cropdetect_command(file_path, start, seconds, scale):
+    filters = []
+    if scale is not None:
+        filters.append("scale=%d:%d:flags=fast_bilinear" % scale)
+    # reset=0 keeps growing the box, so the last line covers the whole window.
+    # cropdetect ignores its first 2 frames by default, which with keyframes
+    # only can be the whole window; skip= exists from ffmpeg 5.1.
+    cropdetect = f"cropdetect=limit={CROPDETECT_LIMIT}:round={CROPDETECT_ROUND}:reset=0"
+    if not ffmpeg_older_than(5, 1):
+        cropdetect += ":skip=0"
+    filters.append(cropdetect)
+    return [
+        "ffmpeg", "-v", "info", "-nostdin", "-nostats", "-threads", "1",
+        "-skip_frame", "nokey", "-ss", "%.3f" % start, "-t", "%.3f" % seconds,
+        "-i", file_path, "-map", "0:v:0", "-an", "-sn",
+        "-vf", ",".join(filters), "-f", "null", "-",
+    ]
+
+
+def detect_window(command, verbose=False):
+    """Runs one cropdetect_command(); returns its (w, h, x, y) or None if nothing was detected."""
+    if verbose:
+        print(f"Detecting crop: {' '.join(command)}")
+    try:
+        result = subprocess.run(command, capture_output=True)
+    except FileNotFoundError:
+        raise RuntimeError("'ffmpeg' command not found in PATH.")
+    matches = _CROP.findall(result.stderr.decode("utf-8", "replace"))
+    if result.returncode != 0 and not matches:
+        lines = result.stderr.decode("utf-8", "replace").strip().splitlines()
+        raise RuntimeError(lines[-1] if lines else f"ffmpeg exited with status {result.returncode}")
+    if not matches:
+        return None
+    w, h, x, y = (int(value) for value in matches[-1])
+    return (w, h, x, y) if w > 0 and h > 0 else None
+
+
+def scale_crop(crop, scale, size):
+    """Scales a crop (w, h, x, y) measured on frames of `scale` up to `size`, keeping even edges."""
+    w, h, x, y = crop
+    fx, fy = size[0] / scale[0], size[1] / scale[1]
+    left, top = round(x * fx / 2) * 2, round(y * fy / 2) * 2
+    right, bottom = min(size[0], round((x + w) * fx / 2) * 2), min(size[1], round((y + h) * fy / 2) * 2)
+    return right - left, bottom - top, left, top
+
+
+def merge_crops(crops, width, height, tolerance=4):
+    """
+    Combines per-window crops (w, h, x, y), or None for windows where
+    nothing was detected, into one crop in full-resolution pixels: the
+    median of each edge, so a bright title card or a dark scene can't
+    drag it. Confidence is the share of all windows whose edges lie
+    within `tolerance` px of that median. Returns None if no window
+    detected anything.
+    """
+    edges = [(x, y, x + w, y + h) for w, h, x, y in (c for c in crops if c)]
+    if not edges:
+        return None
+    left, top, right, bottom = (median_low(values) for values in zip(*edges))
+    left, top = max(0, left), max(0, top)
+    right, bottom = min(width or right, right), min(height or bottom, bottom)
+    agreeing = sum(
+        1 for edge in edges
+        if all(abs(a - b) <= tolerance for a, b in zip(edge, (left, top, right, bottom)))
+    )
+    full_frame = left <= tolerance and top <= tolerance and right >= width - tolerance and bottom >= height - tolerance
+    return {
+        "x": left, "y": top, "w": right - left, "h": bottom - top,
+        "confidence": round(agreeing / len(crops), 3),
+        "windows": len(crops),
+        "agreeing": agreeing,
+        "fullFrame": bool(width and height and full_frame),
+    }
+
+
+class AutoCropJob:
+    """
+    Background black-bar detection: ffmpeg cropdetect over evenly spaced
+    windows of the file, all windows in parallel (one single-threaded
+    ffmpeg each), decoding keyframes only at reduced resolution. Window
+    results are merged with merge_crops(). Listeners follow progress with
+    wait_for_update(), which backs the /autocrop/events stream.
+    """
+
+    def __init__(self, file_path, probe, verbose=False):
+        self.file_path = file_path
+        self.verbose = verbose
+        self.width, self.height = display_size(probe)
+        self.starts = window_starts(probe.get('duration') or 0.0)
+        self.windows_done = 0
+        self.result = None
+        self.error = None
+        self._finished = False
+        self._sequence = 0
+        self._cond = threading.Condition()
+        self._thread = None
+
+    @property
+    def done(self):
+        return self._finished
+
+    @property
+    def failed(self):
+        return self.error is not None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="mediacrop-autocrop", daemon=True)
+            self._thread.start()
+        return self
+
+    def wait_for_update(self, sequence, timeout=None):
+        """Blocks until the job has moved on from `sequence` (or timeout); returns the current one."""
+        with self._cond:
+            self._cond.wait_for(lambda: self._sequence != sequence or self._finished, timeout)
+            return self._sequence
+
+    def snapshot(self):
+        with self._cond:
+            if self.failed:
+                state = "failed"
+            elif self._finished:
+                state = "done"
+            else:
+                state = "running"
+            return {
+                "state": state,
+                "done": self.windows_done,
+                "windows": len(self.starts),
+                "result": self.result,
+                "error": self.error,
+            }
+
+    def status(self):
+        """Progress summary for the /jobs endpoint."""
+        snapshot = self.snapshot()
+        progress = 1.0 if snapshot["state"] == "done" else round(snapshot["done"] / snapshot["windows"], 3)
+        return {"state": snapshot["state"], "progress": progress, "error": self.error}
+
+    def _update(self, **values):
+        with self._cond:
+            for name, value in values.items():
+                setattr(self, name, value)
+            self._sequence += 1
+            self._cond.notify_all()
+
+    def _run(self):
+        scale = analysis_size(self.width, self.height) if self.width and self.height else None
+        if scale == (self.width, self.height):
+            scale = None
+        crops = []
+        errors = []
+        workers = max(1, min(len(self.starts), os.cpu_count() or 2))
+        try:
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="mediacrop-cropdetect") as pool:
+                futures = [
+                    pool.submit(detect_window, cropdetect_command(self.file_path, start, AUTOCROP_WINDOW_SECONDS, scale), self.verbose)
+                    for start in self.starts
+                ]
+                for future in as_completed(futures):
+                    try:
+                        crops.append(future.result())
+                    except RuntimeError as e:
+                        errors.append(str(e))
+                        crops.append(None)
+                    self._update(windows_done=len(crops))
+            if not any(crops) and errors:
+                raise RuntimeError(errors[0])
+            if scale is not None:
+                crops = [scale_crop(crop, scale, (self.width, self.height)) if crop else None for crop in crops]
+            self._update(result=merge_crops(crops, self.width, self.height, tolerance=self._tolerance(scale)))
+        except Exception as e:
+            print(f"Auto-crop error: {e}", file=sys.stderr)
+            self._update(error=str(e))
+        finally:
+            self._update(_finished=True)
+
+    def _tolerance(self, scale):
+        # One analysis pixel either side of cropdetect's rounding, in full-resolution pixels
+        factor = self.width / scale[0] if scale else 1
+        return max(4, round(CROPDETECT_ROUND * factor + factor))
+
@@ -0,0 +1,127 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Benchmark: TCP connections opened per seek while scrubbing /file, with
+HTTP/1.0 (one connection per request) versus HTTP/1.1 keep-alive.
+
+Each simulated seek issues the range requests a browser typically sends:
+a small probe at the seek target followed by two continuation chunks.
+
+It then leaves one idle keep-alive connection per worker open (tabs left
+on the page) and times a request on a fresh connection, which must not
+wait for those connections to time out.
+
+Usage: python benchmarks/bench_keepalive.py <media_file> [seeks]
+"""
+
+import os
+import sys
+import time
+import random
+import threading
+import http.client
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from crop_server import CropServer
+from http_handler import CropHandler
+from media_probe import ProbeCache
+
+CHUNK = 256 * 1024
+
+
+class HTTP10Handler(CropHandler):
+    protocol_version = "HTTP/1.0"
+
+
+class CountingServer(CropServer):
+    connections = 0
+
+    def process_request(self, request, client_address):
+        self.connections += 1
+        super().process_request(request, client_address)
+
+
+class Client:
+    """Reuses one connection for as long as the server keeps it open."""
+
+    def __init__(self, port):
+        self.port = port
+        self.conn = None
+
+    def get(self, headers):
+        if self.conn is None:
+            self.conn = http.client.HTTPConnection("127.0.0.1", self.port)
+        self.conn.request("GET", "/file", headers=headers)
+        response = self.conn.getresponse()
+        response.read()
+        if response.will_close:
+            self.conn.close()
+            self.conn = None
+
+
+def start_server(media_file, handler_class, **kwargs):
+    server = CountingServer(("127.0.0.1", 0), handler_class, **kwargs)
+    server.media_file = media_file
+    server.verbose = False
+    server.auth_token = None
+    server.probe_cache = ProbeCache()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def run(media_file, handler_class, seeks):
+    server = start_server(media_file, handler_class)
+
+    size = os.path.getsize(media_file)
+    rng = random.Random(0)
+    client = Client(server.server_address[1])
+    start = time.perf_counter()
+    try:
+        for _ in range(seeks):
+            target = rng.randrange(0, max(1, size - 3 * CHUNK))
+            client.get({"Range": f"bytes={target}-{target + 1023}"})
+            for i in range(2):
+                offset = target + i * CHUNK
+                client.get({"Range": f"bytes={offset}-{offset + CHUNK - 1}"})
+        elapsed = time.perf_counter() - start
+    finally:
+        server.shutdown()
+        server.server_close()
+    return server.connections / seeks, elapsed * 1000 / seeks
+
+
+def fresh_request_ms(media_file, handler_class, workers=4):
+    """Time for a request on a new connection while `workers` keep-alive connections sit idle."""
+    server = start_server(media_file, handler_class, workers=workers, max_client_connections=workers + 1)
+    idle = [Client(server.server_address[1]) for _ in range(workers)]
+    try:
+        for client in idle:
+            client.get({"Range": "bytes=0-1023"})
+        start = time.perf_counter()
+        Client(server.server_address[1]).get({"Range": "bytes=0-1023"})
+        return (time.perf_counter() - start) * 1000
+    finally:
+        for client in idle:
+            if client.conn is not None:
+                client.conn.close()
+        server.shutdown()
+        server.server_close()
+
+
+def main():
+    if len(sys.argv) < 2:
+        print(__doc__.strip())
+        sys.exit(1)
+    media_file = os.path.abspath(sys.argv[1])
+    seeks = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+
+    print(f"{'protocol':<10} {'conns/seek':>11} {'ms/seek':>9} {'fresh ms':>9}")
+    for name, handler_class in (("HTTP/1.0", HTTP10Handler), ("HTTP/1.1", CropHandler)):
+        per_seek, ms = run(media_file, handler_class, seeks)
+        fresh = fresh_request_ms(media_file, handler_class)
+        print(f"{name:<10} {per_seek:>11.2f} {ms:>9.3f} {fresh:>9.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Microbenchmark: time to first byte for GET / and GET /main.js, with the
+render-once asset cache versus rendering on every request.
+
+Usage: python benchmarks/bench_ttfb.py <media_file> [requests]
+"""
+
+import os
+import sys
+import time
+import socket
+import threading
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from crop_server import CropServer
+from http_handler import CropHandler
+from media_probe import ProbeCache
+from asset_cache import RenderedAssetCache, PageAssets, EncodedAsset, static_url
+
+
+class PlainAsset(EncodedAsset):
+    """The rendered text as-is: no minifying or precompression, identity only."""
+
+    __slots__ = ()
+
+    def __init__(self, text, content_type):
+        self.content_type = content_type
+        self.variants = {"identity": text.encode("utf-8")}
+
+
+class PlainAssets(PageAssets):
+    """One render wrapped without the encoding work PageAssets does up front."""
+
+    __slots__ = ()
+
+    def __init__(self, key, html, js, css):
+        self.key = key
+        self.html = PlainAsset(html, "text/html; charset=utf-8")
+        self.js = PlainAsset(js, "application/javascript; charset=utf-8")
+        self.css = PlainAsset(css, "text/css; charset=utf-8")
+        self.static = {
+            static_url("main", "js", js): self.js,
+            static_url("style", "css", css): self.css,
+        }
+
+
+class NoCache(RenderedAssetCache):
+    """
+    Renders on every call and sends the plain bytes, matching the behaviour
+    before the cache existed. Compressing per request would time gzip and
+    brotli rather than the render the cache saves.
+    """
+
+    def get(self, version, render):
+        return PlainAssets(*render())
+
+
+def ttfb(port, path):
+    sock = socket.create_connection(("127.0.0.1", port))
+    try:
+        start = time.perf_counter()
+        sock.sendall(f"GET {path} HTTP/1.1\r\nHost: localhost\r\nConnection: close\r\n\r\n".encode("ascii"))
+        sock.recv(1)
+        elapsed = time.perf_counter() - start
+        while sock.recv(65536):
+            pass
+        return elapsed
+    finally:
+        sock.close()
+
+
+def run(media_file, asset_cache, requests):
+    server = CropServer(("127.0.0.1", 0), CropHandler)
+    server.media_file = media_file
+    server.verbose = False
+    server.auth_token = None
+    server.probe_cache = ProbeCache()
+    server.asset_cache = asset_cache
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    port = server.server_address[1]
+
+    results = {}
+    try:
+        for path in ("/", "/main.js"):
+            ttfb(port, path)  # warm up
+            samples = [ttfb(port, path) for _ in range(requests)]
+            results[path] = statistics.median(samples) * 1000
+    finally:
+        server.shutdown()
+        server.server_close()
+    return results
+
+
+def main():
+    if len(sys.argv) < 2:
+        print(__doc__.strip())
+        sys.exit(1)
+    media_file = os.path.abspath(sys.argv[1])
+    requests = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+
+    uncached = run(media_file, NoCache(), requests)
+    cached = run(media_file, RenderedAssetCache(), requests)
+
+    print(f"{'path':<10} {'uncached ms':>12} {'cached ms':>10} {'speedup':>8}")
+    for path in uncached:
+        print(f"{path:<10} {uncached[path]:>12.3f} {cached[path]:>10.3f} {uncached[path] / cached[path]:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
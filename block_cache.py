@@ -0,0 +1,164 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from file_delivery import pread_into
+
+DEFAULT_BLOCK_SIZE = 256 * 1024
+DEFAULT_CACHE_MB = 64
+DEFAULT_READAHEAD_BLOCKS = 2
+
+# Leading bytes of a request that are read through the cache on a miss.
+# Seek targets, the moov box and the first GOP all sit at the start of a
+# range request; the (usually open-ended) remainder goes out via sendfile.
+DEFAULT_HEAD_BYTES = 1024 * 1024
+
+
+def file_version(st):
+    """Identifies one version of a file for cache keys."""
+    return (st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns)
+
+
+class BlockCache:
+    """
+    Fixed-budget LRU cache of file blocks in front of /file.
+
+    send_range() serves the cached (or head-of-request) part of a range and
+    returns how many bytes it sent; the caller streams the rest with
+    sendfile, so large cold ranges never pass through Python memory.
+    After a range is served entirely from cache, the next blocks are read
+    ahead in the background.
+    """
+
+    def __init__(self, capacity_bytes, block_size=DEFAULT_BLOCK_SIZE,
+                 readahead_blocks=DEFAULT_READAHEAD_BLOCKS,
+                 head_bytes=DEFAULT_HEAD_BYTES):
+        self.capacity_bytes = capacity_bytes
+        self.block_size = block_size
+        self.readahead_blocks = readahead_blocks
+        self.head_bytes = head_bytes
+        self.hits = 0
+        self.misses = 0
+        self.readaheads = 0
+        self._blocks = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self._pending = set()
+        self._readahead = ThreadPoolExecutor(max_workers=1, thread_name_prefix="mediacrop-readahead")
+
+    def stats(self):
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'readaheads': self.readaheads,
+                'blocks': len(self._blocks),
+                'bytes': self._size,
+                'capacity': self.capacity_bytes,
+            }
+
+    def _lookup(self, key):
+        with self._lock:
+            block = self._blocks.get(key)
+            if block is not None:
+                self._blocks.move_to_end(key)
+                self.hits += 1
+            return block
+
+    def _store(self, key, block):
+        with self._lock:
+            if key in self._blocks:
+                return
+            self._blocks[key] = block
+            self._size += len(block)
+            while self._size > self.capacity_bytes and self._blocks:
+                _, evicted = self._blocks.popitem(last=False)
+                self._size -= len(evicted)
+
+    def _load(self, f, version, index):
+        file_size = version[2]
+        start = index * self.block_size
+        length = min(self.block_size, file_size - start)
+        if length <= 0:
+            return b""
+        buf = bytearray(length)
+        view = memoryview(buf)
+        read = 0
+        while read < length:
+            n = pread_into(f, view[read:], start + read)
+            if not n:
+                break
+            read += n
+        block = bytes(view[:read])
+        self._store((version, index), block)
+        return block
+
+    def send_range(self, wfile, f, st, offset, count, should_stop=None):
+        """
+        Writes the leading part of [offset, offset+count) that is cached or
+        within the request head. Returns the number of bytes written.
+        """
+        if should_stop is None:
+            should_stop = lambda: False
+        version = file_version(st)
+        end = offset + count
+        head_limit = offset + self.head_bytes
+        pos = offset
+        all_hits = True
+
+        while pos < end and not should_stop():
+            index = pos // self.block_size
+            block = self._lookup((version, index))
+            if block is None:
+                if pos >= head_limit:
+                    break
+                all_hits = False
+                with self._lock:
+                    self.misses += 1
+                block = self._load(f, version, index)
+                if not block:
+                    break
+            within = pos - index * self.block_size
+            n = min(len(block) - within, end - pos)
+            if n <= 0:
+                break
+            wfile.write(memoryview(block)[within:within + n])
+            pos += n
+
+        if pos >= end and all_hits and self.readahead_blocks:
+            self._schedule_readahead(f, version, (end - 1) // self.block_size + 1)
+        return pos - offset
+
+    def _schedule_readahead(self, f, version, first_index):
+        last_index = (version[2] - 1) // self.block_size
+        for index in range(first_index, min(first_index + self.readahead_blocks, last_index + 1)):
+            key = (version, index)
+            with self._lock:
+                if key in self._blocks or key in self._pending:
+                    continue
+                self._pending.add(key)
+            try:
+                self._readahead.submit(self._readahead_block, f, version, index)
+            except RuntimeError:
+                with self._lock:
+                    self._pending.discard(key)
+
+    def _readahead_block(self, f, version, index):
+        try:
+            self._load(f, version, index)
+            with self._lock:
+                self.readaheads += 1
+        except OSError:
+            pass
+        finally:
+            with self._lock:
+                self._pending.discard((version, index))
+
+    def close(self):
+        self._readahead.shutdown(wait=False)
+        with self._lock:
+            self._blocks.clear()
+            self._size = 0
@@ -0,0 +1,200 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import math
+import bisect
+
+# Interpolation between crop keyframes
+INTERPOLATIONS = ("smooth", "ease", "linear")
+
+MAX_CROP_KEYFRAMES = 2000
+
+# Keyframes closer than this are the same keyframe; the later one wins
+KEYFRAME_EPSILON = 1e-3
+
+
+def _number(value):
+    return ("%.6f" % value).rstrip("0").rstrip(".") if value != int(value) else str(int(value))
+
+
+def _pchip_slopes(times, values):
+    """
+    Tangents of a monotone cubic (PCHIP) through the keyframes: zero at
+    the ends and wherever the path turns, so the crop never overshoots a
+    keyframe and leaves the frame.
+    """
+    count = len(times)
+    widths = [times[i + 1] - times[i] for i in range(count - 1)]
+    secants = [(values[i + 1] - values[i]) / widths[i] for i in range(count - 1)]
+    slopes = [0.0] * count
+    for i in range(1, count - 1):
+        before, after = secants[i - 1], secants[i]
+        if before * after <= 0:
+            continue
+        w1 = 2 * widths[i] + widths[i - 1]
+        w2 = widths[i] + 2 * widths[i - 1]
+        slopes[i] = (w1 + w2) / (w1 / before + w2 / after)
+    return slopes
+
+
+def _segment_coefficients(p0, p1, width, m0, m1, interpolation):
+    """(a, b, c, d) of a + b*u + c*u^2 + d*u^3 for u from 0 to 1 over the segment."""
+    delta = p1 - p0
+    if interpolation == "linear":
+        return p0, delta, 0.0, 0.0
+    if interpolation == "ease":
+        # Smoothstep: stops at every keyframe
+        return p0, 0.0, 3 * delta, -2 * delta
+    b, e = width * m0, width * m1
+    return p0, b, 3 * delta - 2 * b - e, -2 * delta + b + e
+
+
+def _filter_path(path):
+    """
+    `path` as a filter option value inside a filtergraph. ffmpeg unescapes
+    twice: the graph parser takes the quoted value as-is (so ',', ';' and
+    brackets are literal), then the option parser drops a backslash in
+    front of ':' and "'".
+    """
+    value = path.replace("\\", "/").replace(":", "\\:").replace("'", "\\'")
+    # A quote can't appear inside graph-level quotes: close, escape it, reopen
+    return "'" + value.replace("'", "'\\''") + "'"
+
+
+def _plus(left, right):
+    return f"{left}{right}" if right.startswith("-") else f"{left}+{right}"
+
+
+def _polynomial(coefficients, start, width):
+    """The segment as an ffmpeg expression of t, in Horner form and without commas."""
+    u = f"(t-{_number(round(start, 6))})"
+    if round(width, 6) != 1:
+        u = f"({u}/{_number(round(width, 6))})"
+    a, b, c, d = (round(value, 3) for value in coefficients)
+    expression = ""
+    for coefficient in (d, c, b):
+        if expression:
+            expression = f"({expression})*{u}" if not coefficient else f"({_plus(_number(coefficient), expression)})*{u}"
+        elif coefficient:
+            expression = f"{_number(coefficient)}*{u}"
+    if not expression:
+        return _number(a)
+    return _plus(_number(a), expression) if a else expression
+
+
+class CropPath:
+    """
+    A moving crop window: a fixed-size rectangle whose position follows
+    keyframes (t, x, y) in displayed pixels. Each segment between two
+    keyframes is a cubic in time, computed once from the keyframes
+    (O(keyframes)); the path holds still before the first and after the
+    last keyframe.
+
+    The path is exported as an ffmpeg sendcmd script that hands the crop
+    filter one x and y expression per segment, so ffmpeg evaluates the
+    motion per frame and Python never walks the frames.
+    """
+
+    def __init__(self, keyframes, interpolation="smooth", frame_size=None):
+        if interpolation not in INTERPOLATIONS:
+            raise ValueError(f"interpolation must be one of {', '.join(INTERPOLATIONS)}")
+        self.interpolation = interpolation
+        points = self._validate(keyframes, frame_size)
+        self.width, self.height = points[0][3], points[0][4]
+        self.times = [point[0] for point in points]
+        xs = [point[1] for point in points]
+        ys = [point[2] for point in points]
+        self.start = (xs[0], ys[0])
+        self.end = (xs[-1], ys[-1])
+        self.segments = []
+        if len(points) > 1:
+            x_slopes = _pchip_slopes(self.times, xs)
+            y_slopes = _pchip_slopes(self.times, ys)
+            for i in range(len(points) - 1):
+                width = self.times[i + 1] - self.times[i]
+                self.segments.append((
+                    self.times[i], width,
+                    _segment_coefficients(xs[i], xs[i + 1], width, x_slopes[i], x_slopes[i + 1], interpolation),
+                    _segment_coefficients(ys[i], ys[i + 1], width, y_slopes[i], y_slopes[i + 1], interpolation),
+                ))
+
+    @staticmethod
+    def _validate(keyframes, frame_size):
+        """Sorted, de-duplicated (t, x, y, w, h) tuples; raises ValueError."""
+        if not isinstance(keyframes, list) or not keyframes:
+            raise ValueError("keyframes must be a non-empty list")
+        if len(keyframes) > MAX_CROP_KEYFRAMES:
+            raise ValueError(f"at most {MAX_CROP_KEYFRAMES} keyframes are supported")
+        points = []
+        for keyframe in keyframes:
+            try:
+                values = tuple(keyframe[field] for field in ("t", "x", "y", "w", "h"))
+            except (KeyError, TypeError):
+                raise ValueError("each keyframe needs t, x, y, w and h")
+            if not all(isinstance(value, (int, float)) and math.isfinite(value) for value in values):
+                raise ValueError("keyframe values must be finite numbers")
+            t, x, y, w, h = values
+            if t < 0 or x < 0 or y < 0 or w <= 0 or h <= 0:
+                raise ValueError("keyframes need a non-negative time and position and a positive size")
+            points.append((float(t), int(x), int(y), int(w), int(h)))
+        points.sort(key=lambda point: point[0])
+        unique = []
+        for point in points:
+            if unique and point[0] - unique[-1][0] < KEYFRAME_EPSILON:
+                unique[-1] = point
+            else:
+                unique.append(point)
+        # The crop filter's output size is fixed; only the position moves
+        if any(point[3:] != unique[0][3:] for point in unique):
+            raise ValueError("all crop keyframes must have the same size")
+        if frame_size and frame_size[0] and frame_size[1]:
+            if any(x + w > frame_size[0] or y + h > frame_size[1] for _, x, y, w, h in unique):
+                raise ValueError("a keyframe's crop extends past the frame")
+        return unique
+
+    def at(self, time):
+        """(x, y) of the window at `time`, unrounded."""
+        i = bisect.bisect_right(self.times, time) - 1
+        if i < 0:
+            return self.start
+        if i >= len(self.segments):
+            return self.end
+        start, width, x, y = self.segments[i]
+        u = (time - start) / width
+        return tuple(a + u * (b + u * (c + u * d)) for a, b, c, d in (x, y))
+
+    def summary(self):
+        """The segments for the player, which evaluates them per displayed frame."""
+        return {
+            "interpolation": self.interpolation,
+            "w": self.width,
+            "h": self.height,
+            "start": {"x": self.start[0], "y": self.start[1]},
+            "end": {"x": self.end[0], "y": self.end[1]},
+            "segments": [
+                {"start": start, "end": round(start + width, 6), "x": list(x), "y": list(y)}
+                for start, width, x, y in self.segments
+            ],
+        }
+
+    def sendcmd_script(self):
+        """
+        sendcmd commands moving a crop filter along the path, one interval
+        per segment. Keyframe times are the player's currentTime, which
+        starts at 0 like the filter's t: without -copyts the ffmpeg CLI
+        subtracts the input's start time, so no offset is applied.
+        """
+        lines = [f"# {len(self.times)} keyframes, {self.interpolation} interpolation, {self.width}x{self.height}"]
+        for start, width, x, y in self.segments:
+            interval = f"{_number(round(start, 6))}-{_number(round(start + width, 6))}"
+            lines.append(
+                f"{interval} [enter] crop x {_polynomial(x, start, width)}, "
+                f"[enter] crop y {_polynomial(y, start, width)};"
+            )
+        end_time = _number(round(self.times[-1], 6))
+        lines.append(f"{end_time} [enter] crop x {self.end[0]}, [enter] crop y {self.end[1]};")
+        return "\n".join(lines) + "\n"
+
+    def crop_filter(self, script_path):
+        """The filter chain reading `script_path`; the window starts at the first keyframe."""
+        return f"sendcmd=f={_filter_path(script_path)},crop=w={self.width}:h={self.height}:x={self.start[0]}:y={self.start[1]}"
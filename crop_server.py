@@ -0,0 +1,249 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import time
+import socket
+import selectors
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http.server import HTTPServer
+
+DEFAULT_WORKERS = 16
+DEFAULT_MAX_CLIENT_CONNECTIONS = 8
+DEFAULT_KEEPALIVE_TIMEOUT = 15
+DEFAULT_MAX_KEEPALIVE_REQUESTS = 100
+
+# Requests waiting for a free worker beyond which new ones get a 503
+DEFAULT_MAX_QUEUED_REQUESTS = 32
+
+_BUSY_RESPONSE = (
+    b"HTTP/1.0 503 Service Unavailable\r\n"
+    b"Retry-After: 1\r\n"
+    b"Content-Length: 0\r\n"
+    b"Connection: close\r\n\r\n"
+)
+
+
+class CropServer(HTTPServer):
+    """
+    HTTPServer that hands each request to a bounded worker pool so a
+    slow /file stream can't block the page, /main.js or parallel range
+    requests. Connections beyond the per-client cap get a 503.
+
+    A worker is only taken once a connection has a request to read: new
+    connections, and keep-alive connections between requests (see
+    park_connection), wait in a selector thread. Idle connections are
+    closed after `keepalive_timeout` seconds and persistent ones after
+    `max_keepalive_requests` requests. When `max_queued_requests` are
+    already waiting for a worker, further requests get a 503 instead of
+    queueing silently.
+    """
+
+    def __init__(self, server_address, handler_class,
+                 workers=DEFAULT_WORKERS,
+                 max_client_connections=DEFAULT_MAX_CLIENT_CONNECTIONS,
+                 keepalive_timeout=DEFAULT_KEEPALIVE_TIMEOUT,
+                 max_keepalive_requests=DEFAULT_MAX_KEEPALIVE_REQUESTS,
+                 max_queued_requests=DEFAULT_MAX_QUEUED_REQUESTS):
+        super().__init__(server_address, handler_class)
+        self.workers = workers
+        self.max_client_connections = max_client_connections
+        self.keepalive_timeout = keepalive_timeout
+        self.max_keepalive_requests = max_keepalive_requests
+        self.max_queued_requests = max_queued_requests
+        self.stop_event = threading.Event()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="mediacrop")
+        self._clients = {}
+        self._active = set()
+        self._queued = 0
+        # Connections handed back by handlers, and the requests they served
+        self._parking = {}
+        self._served = {}
+        self._lock = threading.Lock()
+        # Idle connections, registered by the selector thread itself
+        self._to_park = []
+        self._idle = {}
+        self._selector = selectors.DefaultSelector()
+        self._wakeup_recv, self._wakeup_send = socket.socketpair()
+        self._wakeup_recv.setblocking(False)
+        self._wakeup_send.setblocking(False)
+        self._selector.register(self._wakeup_recv, selectors.EVENT_READ)
+        self._idle_thread = threading.Thread(target=self._watch_idle, name="mediacrop-idle", daemon=True)
+        self._idle_thread.start()
+
+    def process_request(self, request, client_address):
+        client_ip = client_address[0]
+        with self._lock:
+            count = self._clients.get(client_ip, 0)
+            if count >= self.max_client_connections or self.stop_event.is_set():
+                busy = True
+            else:
+                busy = False
+                self._clients[client_ip] = count + 1
+                self._active.add(request)
+
+        if busy:
+            if getattr(self, 'verbose', False):
+                print(f"Connection limit reached for {client_ip}, rejecting.")
+            self._reject(request)
+            return
+        self._park(request, client_address, 0)
+
+    def park_connection(self, request, requests_served):
+        """
+        Called by a handler whose keep-alive connection has no further
+        request buffered: once the handler returns, the connection waits
+        in the selector instead of holding a worker.
+        """
+        with self._lock:
+            self._parking[request] = requests_served
+
+    def requests_served(self, request):
+        """Requests already answered on a resumed keep-alive connection."""
+        with self._lock:
+            return self._served.pop(request, 0)
+
+    def _reject(self, request):
+        try:
+            request.sendall(_BUSY_RESPONSE)
+        except OSError:
+            pass
+        self.shutdown_request(request)
+
+    def _park(self, request, client_address, requests_served):
+        deadline = time.monotonic() + self.keepalive_timeout
+        with self._lock:
+            stopping = self.stop_event.is_set()
+            if not stopping:
+                self._to_park.append((request, client_address, requests_served, deadline))
+        if stopping:
+            self._release(request, client_address[0])
+            self.shutdown_request(request)
+            return
+        try:
+            self._wakeup_send.send(b"\0")
+        except OSError:
+            # Already signalled (buffer full) or closing
+            pass
+
+    def _watch_idle(self):
+        """Selector thread: dispatches idle connections once readable, closes expired ones."""
+        while not self.stop_event.is_set():
+            with self._lock:
+                parked, self._to_park = self._to_park, []
+            for request, client_address, requests_served, deadline in parked:
+                try:
+                    self._selector.register(request, selectors.EVENT_READ)
+                except (OSError, ValueError):
+                    self._release(request, client_address[0])
+                    self.shutdown_request(request)
+                    continue
+                self._idle[request] = (client_address, requests_served, deadline)
+
+            now = time.monotonic()
+            wait = min([deadline for _, _, deadline in self._idle.values()] + [now + 1.0]) - now
+            for key, _ in self._selector.select(max(0.0, wait)):
+                if key.fileobj is self._wakeup_recv:
+                    try:
+                        while self._wakeup_recv.recv(4096):
+                            pass
+                    except OSError:
+                        pass
+                    continue
+                request = key.fileobj
+                self._selector.unregister(request)
+                client_address, requests_served, _ = self._idle.pop(request)
+                self._dispatch(request, client_address, requests_served)
+
+            now = time.monotonic()
+            for request, (client_address, _, deadline) in list(self._idle.items()):
+                if deadline <= now:
+                    self._selector.unregister(request)
+                    del self._idle[request]
+                    self._release(request, client_address[0])
+                    self.shutdown_request(request)
+
+        for request, (client_address, _, _) in self._idle.items():
+            self._release(request, client_address[0])
+            self.shutdown_request(request)
+        self._idle.clear()
+        self._selector.close()
+
+    def _dispatch(self, request, client_address, requests_served):
+        """Queues a connection with a request to read for a worker, or 503s it."""
+        with self._lock:
+            full = self._queued >= self.max_queued_requests
+            if not full:
+                self._queued += 1
+                if requests_served:
+                    self._served[request] = requests_served
+        if full:
+            if getattr(self, 'verbose', False):
+                print("Request queue full, rejecting.")
+            self._release(request, client_address[0])
+            self._reject(request)
+            return
+        try:
+            self._executor.submit(self._process_request_worker, request, client_address)
+        except RuntimeError:
+            # Executor already shut down
+            with self._lock:
+                self._queued -= 1
+                self._served.pop(request, None)
+            self._release(request, client_address[0])
+            self.shutdown_request(request)
+
+    def _process_request_worker(self, request, client_address):
+        with self._lock:
+            self._queued -= 1
+        failed = False
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            failed = True
+            if not self.stop_event.is_set():
+                self.handle_error(request, client_address)
+        finally:
+            with self._lock:
+                requests_served = self._parking.pop(request, None)
+                self._served.pop(request, None)
+            if requests_served is not None and not failed:
+                self._park(request, client_address, requests_served)
+            else:
+                self._release(request, client_address[0])
+                self.shutdown_request(request)
+
+    def _release(self, request, client_ip):
+        with self._lock:
+            self._active.discard(request)
+            count = self._clients.get(client_ip, 0) - 1
+            if count > 0:
+                self._clients[client_ip] = count
+            else:
+                self._clients.pop(client_ip, None)
+
+    def server_close(self):
+        """Stops accepting work and aborts in-flight streams before closing."""
+        self.stop_event.set()
+        try:
+            self._wakeup_send.send(b"\0")
+        except OSError:
+            pass
+        self._idle_thread.join(2.0)
+        with self._lock:
+            active = list(self._active)
+        for request in active:
+            try:
+                request.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+        self._executor.shutdown(wait=False)
+        for name in ('block_cache', 'remux_cache', 'proxy_cache', 'image_preview_cache', 'tile_cache',
+                     'thumbnail_cache', 'frame_index_cache', 'frame_cache',
+                     'decoder_session_cache', 'autocrop_cache', 'scene_index_cache'):
+            cache = getattr(self, name, None)
+            if cache is not None:
+                cache.close()
+        self._wakeup_send.close()
+        self._wakeup_recv.close()
+        super().server_close()
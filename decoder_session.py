@@ -0,0 +1,211 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import sys
+import time
+import subprocess
+import threading
+
+from proxy import display_size, proxy_size
+from frame_index import FRAME_EPSILON
+from utils import fps_passthrough_args
+
+# Decoded frames are downscaled to fit this, as RGBA
+DECODER_MAX_DIMENSION = 640
+
+# Frames kept decoded ahead of and behind the playhead
+PREFETCH_AHEAD = 16
+KEEP_BEHIND = 16
+
+# How long get_frame() waits for the decoder to reach a frame
+DECODE_WAIT_SECONDS = 10
+
+# A session whose frames nobody asked for in this long stops its ffmpeg
+SESSION_IDLE_SECONDS = 30
+
+
+class DecoderSession:
+    """
+    One ffmpeg process decoding forward from a seek point into a ring of
+    RGBA frame slots, for instant frame stepping around the playhead.
+
+    The ring is a single preallocated bytearray; ffmpeg's output is read
+    straight into a slot's memoryview and frames are served as views of
+    it, so no per-frame bytes objects are made. The decoder stays
+    PREFETCH_AHEAD frames ahead of the playhead and then blocks (ffmpeg
+    blocks on the full pipe); slots are overwritten oldest first, at
+    least KEEP_BEHIND frames behind it. Jumping outside that window
+    restarts ffmpeg at the new position. Frame numbers come from the
+    FrameIndex, whose timestamps are used to seek.
+    """
+
+    def __init__(self, file_path, probe, frame_index, verbose=False):
+        self.file_path = file_path
+        self.frame_index = frame_index
+        self.verbose = verbose
+        width, height = display_size(probe)
+        self.width, self.height = proxy_size(width, height, DECODER_MAX_DIMENSION) if width and height else (0, 0)
+        self.frame_size = self.width * self.height * 4
+        self.slots = PREFETCH_AHEAD + KEEP_BEHIND + 2
+        self._ring = bytearray(self.frame_size * self.slots)
+        self._view = memoryview(self._ring)
+        self._cond = threading.Condition()
+        self._process = None
+        # Frames [start_frame, next_frame) were decoded by the current process
+        self.start_frame = 0
+        self.next_frame = 0
+        self.playhead = 0
+        self.eof = False
+        self.error = None
+        self._restart_at = None
+        self._pins = [0] * self.slots
+        self._last_used = time.monotonic()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="mediacrop-decoder", daemon=True)
+        self._thread.start()
+
+    def _buffered(self, frame):
+        # The slot at next_frame - slots is the one being overwritten
+        return max(self.start_frame, self.next_frame - self.slots + 1) <= frame < self.next_frame
+
+    def get_frame(self, frame):
+        """
+        Returns a memoryview of `frame`'s RGBA pixels, pinned so
+        it isn't overwritten until release(frame). Raises LookupError past
+        the last frame, TimeoutError if decoding takes too long and
+        RuntimeError when ffmpeg failed.
+        """
+        frames = len(self.frame_index.times)
+        if not 0 <= frame < frames:
+            raise LookupError(f"frame {frame} out of range")
+        deadline = time.monotonic() + DECODE_WAIT_SECONDS
+        with self._cond:
+            self._last_used = time.monotonic()
+            self.playhead = frame
+            if not self._buffered(frame):
+                behind = frame < max(self.start_frame, self.next_frame - self.slots + 1)
+                far_ahead = frame > self.next_frame + PREFETCH_AHEAD
+                stopped = self._process is None and not self.eof
+                if behind or far_ahead or stopped:
+                    # Decoding forward won't get there (soon); seek instead
+                    self._restart_at = max(0, frame - KEEP_BEHIND)
+            self._cond.notify_all()
+            while not self._buffered(frame):
+                if self.error is not None and self._restart_at is None:
+                    raise RuntimeError(self.error)
+                if self.eof and self._restart_at is None and frame >= self.next_frame:
+                    raise LookupError(f"frame {frame} could not be decoded")
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise TimeoutError(f"frame {frame} not decoded in time")
+                self._cond.wait(remaining)
+            slot = frame % self.slots
+            self._pins[slot] += 1
+        offset = slot * self.frame_size
+        return self._view[offset:offset + self.frame_size]
+
+    def release(self, frame):
+        with self._cond:
+            slot = frame % self.slots
+            self._pins[slot] = max(0, self._pins[slot] - 1)
+            self._cond.notify_all()
+
+    def close(self):
+        # Under the lock, so _run can't be starting a process that outlives the session
+        with self._cond:
+            self._closed = True
+            self._stop_process()
+            self._cond.notify_all()
+
+    def _command(self, frame):
+        seek = max(0.0, self.frame_index.times[frame] - FRAME_EPSILON)
+        return [
+            "ffmpeg", "-v", "error", "-nostdin",
+            "-ss", "%.6f" % seek, "-i", self.file_path,
+            "-map", "0:v:0", "-an", "-sn",
+            "-vf", f"scale={self.width}:{self.height}:flags=bilinear,format=rgba",
+            # One output frame per decoded frame, so numbers match the FrameIndex
+            *fps_passthrough_args(),
+            "-f", "rawvideo", "pipe:1",
+        ]
+
+    def _stop_process(self):
+        """Kills the current ffmpeg. Called with the lock held."""
+        process, self._process = self._process, None
+        if process is not None and process.poll() is None:
+            process.kill()
+            process.wait()
+
+    def _start_process(self, frame):
+        self._stop_process()
+        command = self._command(frame)
+        if self.verbose:
+            print(f"Decoder session: {' '.join(command)}")
+        try:
+            self._process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, bufsize=0)
+        except FileNotFoundError:
+            raise RuntimeError("'ffmpeg' command not found in PATH.")
+
+    def _next_slot(self):
+        """
+        Waits until there is a frame to decode and its slot is free; returns
+        the slot, or None once the session is closed. Called with the lock held.
+        """
+        while not self._closed:
+            if self._restart_at is not None:
+                frame, self._restart_at = self._restart_at, None
+                self.start_frame = self.next_frame = frame
+                self.eof = False
+                self.error = None
+                try:
+                    self._start_process(frame)
+                except RuntimeError as e:
+                    self.error = str(e)
+                    self._cond.notify_all()
+                    continue
+            idle = time.monotonic() - self._last_used > SESSION_IDLE_SECONDS
+            if idle and self._process is not None:
+                if self.verbose:
+                    print("Decoder session idle, stopping ffmpeg")
+                self._stop_process()
+                # Frames stay servable; moving on restarts the decoder
+                self.start_frame = max(self.start_frame, self.next_frame - self.slots + 1)
+            slot = self.next_frame % self.slots
+            wanted = self.next_frame - self.playhead <= PREFETCH_AHEAD
+            if self._process is not None and not self.eof and wanted and not self._pins[slot]:
+                return slot
+            self._cond.wait(1.0)
+        return None
+
+    def _run(self):
+        while True:
+            with self._cond:
+                slot = self._next_slot()
+                if slot is None:
+                    return
+                process = self._process
+            view = self._view[slot * self.frame_size:(slot + 1) * self.frame_size]
+            filled = 0
+            try:
+                while filled < self.frame_size:
+                    n = process.stdout.readinto(view[filled:])
+                    if not n:
+                        break
+                    filled += n
+            except (OSError, ValueError):
+                # The process was killed for a restart
+                filled = 0
+            with self._cond:
+                if process is not self._process:
+                    # Restarted while reading; this frame belongs to the old position
+                    continue
+                if filled == self.frame_size:
+                    self.next_frame += 1
+                else:
+                    returncode = process.wait()
+                    self.eof = True
+                    if returncode != 0 and self.next_frame == self.start_frame:
+                        self.error = f"ffmpeg exited with status {returncode}"
+                        print(f"Decoder session error: {self.error}", file=sys.stderr)
+                self._cond.notify_all()
+
@@ -0,0 +1,379 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import errno
+import socket
+import hashlib
+import selectors
+import threading
+from email.utils import parsedate_to_datetime
+
+# Bytes handed to a single sendfile() call; between slices we check for
+# shutdown and drop already-sent pages from the page cache.
+SENDFILE_SLICE = 8 * 1024 * 1024
+
+# Fallback read size when sendfile is unavailable.
+FALLBACK_CHUNK = 256 * 1024
+
+# Only transfers at least this large get POSIX_FADV_DONTNEED, so small,
+# frequently re-requested ranges (headers, seek targets) stay cached.
+DONTNEED_THRESHOLD = 32 * 1024 * 1024
+
+# Requests with more ranges than this are answered with the full body
+MAX_RANGES = 16
+
+HAS_SENDFILE = hasattr(os, 'sendfile')
+HAS_FADVISE = hasattr(os, 'posix_fadvise')
+HAS_PREADV = hasattr(os, 'preadv')
+HAS_PREAD = hasattr(os, 'pread')
+
+
+def _fadvise(fd, offset, length, advice_name):
+    if not HAS_FADVISE:
+        return
+    advice = getattr(os, advice_name, None)
+    if advice is None:
+        return
+    try:
+        os.posix_fadvise(fd, offset, length, advice)
+    except OSError:
+        pass
+
+
+def advise_sequential(fd, offset, length):
+    """Hints the kernel that [offset, offset+length) will be read sequentially."""
+    _fadvise(fd, offset, length, 'POSIX_FADV_SEQUENTIAL')
+
+
+def advise_dontneed(fd, offset, length):
+    """Hints the kernel that [offset, offset+length) can leave the page cache."""
+    _fadvise(fd, offset, length, 'POSIX_FADV_DONTNEED')
+
+
+_seek_lock = threading.Lock()
+
+
+def pread_into(f, view, offset):
+    """
+    Reads into `view` at `offset` without touching the shared file position,
+    using preadv/pread where available. Returns the number of bytes read.
+    """
+    if HAS_PREADV:
+        return os.preadv(f.fileno(), [view], offset)
+    if HAS_PREAD:
+        data = os.pread(f.fileno(), len(view), offset)
+        view[:len(data)] = data
+        return len(data)
+    with _seek_lock:
+        f.seek(offset)
+        return f.readinto(view)
+
+
+def _copy_chunked(wfile, f, offset, count, should_stop):
+    """Positional read/write loop reusing one buffer; used where sendfile isn't available."""
+    buf = bytearray(min(FALLBACK_CHUNK, count) or 1)
+    view = memoryview(buf)
+    sent = 0
+    while sent < count and not should_stop():
+        n = pread_into(f, view[:min(len(buf), count - sent)], offset + sent)
+        if not n:
+            break
+        wfile.write(view[:n])
+        sent += n
+    return sent
+
+
+def _sendfile_slice(sock, fd, offset, count):
+    """
+    One os.sendfile() call at an explicit offset. Unlike socket.sendfile,
+    this never seeks the file object, so a handle shared between threads
+    keeps working. Waits for the socket like a blocking send would when
+    it has a timeout (and is therefore non-blocking underneath).
+    """
+    timeout = sock.gettimeout()
+    while True:
+        try:
+            return os.sendfile(sock.fileno(), fd, offset, count)
+        except BlockingIOError:
+            if timeout == 0:
+                raise
+        with selectors.DefaultSelector() as selector:
+            selector.register(sock, selectors.EVENT_WRITE)
+            if not selector.select(timeout):
+                raise socket.timeout("timed out")
+
+
+def send_file_range(sock, wfile, f, offset, count, should_stop=None):
+    """
+    Sends `count` bytes of the open binary file `f` starting at `offset`.
+    Uses os.sendfile (zero-copy) with explicit offsets when available and
+    falls back to a chunked pread/write loop otherwise; neither moves the
+    file position. Returns the number of bytes sent.
+    """
+    if should_stop is None:
+        should_stop = lambda: False
+    if count <= 0:
+        return 0
+
+    fd = f.fileno()
+    advise_sequential(fd, offset, count)
+    drop_behind = count >= DONTNEED_THRESHOLD
+
+    if not HAS_SENDFILE or not hasattr(sock, 'fileno'):
+        sent = _copy_chunked(wfile, f, offset, count, should_stop)
+        if drop_behind:
+            advise_dontneed(fd, offset, sent)
+        return sent
+
+    sent = 0
+    while sent < count and not should_stop():
+        slice_size = min(SENDFILE_SLICE, count - sent)
+        try:
+            n = _sendfile_slice(sock, fd, offset + sent, slice_size)
+        except OSError as e:
+            # Sockets os.sendfile can't write to (e.g. wrapped ones): copy the rest
+            if sent or e.errno not in (errno.EINVAL, errno.ENOTSOCK, errno.EOPNOTSUPP):
+                raise
+            return _copy_chunked(wfile, f, offset, count, should_stop)
+        if not n:
+            break
+        if drop_behind:
+            advise_dontneed(fd, offset + sent, n)
+        sent += n
+    return sent
+
+
+class MediaFile:
+    """
+    One persistent read-only handle for the served media file.
+
+    snapshot() costs a single stat of the path; the file is reopened (and
+    fstat'ed) only when that stat no longer matches, e.g. after the file
+    was rewritten or replaced. Reads go through pread/sendfile with
+    explicit offsets, so the handle is safely shared across threads.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = None
+        self._stat = None
+        self._identity = None
+
+    @staticmethod
+    def _stat_identity(st):
+        return (st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns)
+
+    def snapshot(self):
+        """
+        Returns (file, stat) for the current version of the file.
+        Raises FileNotFoundError / PermissionError like open() would.
+        """
+        identity = self._stat_identity(os.stat(self.path))
+        with self._lock:
+            if self._file is not None and identity == self._identity:
+                return self._file, self._stat
+
+            # The previous handle isn't closed here: requests still sending
+            # from it keep it alive and it is closed once they drop it.
+            f = open(self.path, 'rb', buffering=0)
+            st = os.fstat(f.fileno())
+            self._file = f
+            self._stat = st
+            self._identity = self._stat_identity(st)
+            return f, st
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+            self._file = None
+            self._stat = None
+            self._identity = None
+
+
+def make_etag(st, virtual=False):
+    """
+    Strong validator derived from a file's stat: size, mtime (ns) and inode.
+    `virtual` marks a rewritten byte layout (faststart) of the same file.
+    """
+    suffix = "-fs" if virtual else ""
+    return f'"{st.st_size:x}-{st.st_mtime_ns:x}-{st.st_ino:x}{suffix}"'
+
+
+def etag_version(etag):
+    """Short token for cache-busting URLs; stable while the file is unchanged."""
+    return hashlib.sha1(etag.encode("ascii")).hexdigest()[:12]
+
+
+def _parse_etags(value):
+    """Parses an If-Match/If-None-Match value into a list of tags, or '*'."""
+    value = value.strip()
+    if value == '*':
+        return '*'
+    return [tag.strip() for tag in value.split(',') if tag.strip()]
+
+
+def _opaque(tag):
+    return tag[2:] if tag.startswith('W/') else tag
+
+
+def _parse_http_date(value):
+    try:
+        return parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError, IndexError):
+        return None
+
+
+def evaluate_preconditions(headers, etag, mtime):
+    """
+    Applies If-Match, If-Unmodified-Since, If-None-Match and
+    If-Modified-Since (RFC 7232 order) for a GET/HEAD request.
+    Returns 412, 304 or None when the request should proceed.
+    """
+    mtime = int(mtime)
+
+    if_match = headers.get('If-Match')
+    if if_match:
+        tags = _parse_etags(if_match)
+        if tags != '*' and etag not in tags:
+            return 412
+    else:
+        since = headers.get('If-Unmodified-Since')
+        if since:
+            ts = _parse_http_date(since)
+            if ts is not None and mtime > ts:
+                return 412
+
+    if_none_match = headers.get('If-None-Match')
+    if if_none_match:
+        tags = _parse_etags(if_none_match)
+        if tags == '*' or any(_opaque(tag) == _opaque(etag) for tag in tags):
+            return 304
+    else:
+        since = headers.get('If-Modified-Since')
+        if since:
+            ts = _parse_http_date(since)
+            if ts is not None and mtime <= ts:
+                return 304
+
+    return None
+
+
+def if_range_allows(headers, etag, mtime):
+    """
+    True when a Range header may be honoured: there is no If-Range, or it
+    strongly matches the current ETag / equals the Last-Modified date.
+    """
+    if_range = headers.get('If-Range')
+    if not if_range:
+        return True
+    if_range = if_range.strip()
+    if if_range.startswith('"') or if_range.startswith('W/'):
+        return if_range == etag
+    ts = _parse_http_date(if_range)
+    return ts is not None and int(mtime) == int(ts)
+
+
+class RangeNotSatisfiable(Exception):
+    """None of the requested byte ranges overlap the representation."""
+
+
+def parse_range_header(header, size, max_ranges=MAX_RANGES):
+    """
+    Parses a Range header into a sorted list of (start, end) pairs with
+    overlapping or adjacent ranges coalesced. Suffix ranges (bytes=-N) cover
+    the last N bytes and ends past EOF are clamped.
+
+    Returns None when the header should be ignored (other unit, too many
+    ranges), raises ValueError when it is malformed and RangeNotSatisfiable
+    when no range overlaps the file.
+    """
+    header = header.strip()
+    unit, sep, spec = header.partition('=')
+    if not sep or unit.strip().lower() != 'bytes':
+        return None
+
+    specs = [part.strip() for part in spec.split(',') if part.strip()]
+    if not specs:
+        raise ValueError("Empty range set")
+    if len(specs) > max_ranges:
+        return None
+
+    ranges = []
+    for part in specs:
+        start_str, dash, end_str = part.partition('-')
+        if not dash:
+            raise ValueError(f"Invalid range: {part}")
+        start_str, end_str = start_str.strip(), end_str.strip()
+        if not start_str:
+            suffix = int(end_str)
+            if suffix < 0:
+                raise ValueError(f"Invalid range: {part}")
+            if suffix == 0 or size == 0:
+                continue
+            ranges.append((max(0, size - suffix), size - 1))
+            continue
+        start = int(start_str)
+        end = int(end_str) if end_str else None
+        if start < 0 or (end is not None and end < start):
+            raise ValueError(f"Invalid range: {part}")
+        if start >= size:
+            continue
+        ranges.append((start, size - 1 if end is None else min(end, size - 1)))
+
+    if not ranges:
+        raise RangeNotSatisfiable()
+
+    ranges.sort()
+    merged = [ranges[0]]
+    for start, end in ranges[1:]:
+        last_start, last_end = merged[-1]
+        if start <= last_end + 1:
+            merged[-1] = (last_start, max(last_end, end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def parse_open_range(header):
+    """
+    Parses a single 'bytes=start-' or 'bytes=start-end' range for a
+    representation whose total length isn't known yet (a transcode still
+    being produced). Returns (start, end or None), or None for an absent
+    header or any other form, which callers then ignore.
+    """
+    if not header:
+        return None
+    unit, sep, spec = header.strip().partition('=')
+    if not sep or unit.strip().lower() != 'bytes' or ',' in spec:
+        return None
+    start_str, dash, end_str = spec.strip().partition('-')
+    start_str, end_str = start_str.strip(), end_str.strip()
+    if not dash or not start_str.isdigit() or (end_str and not end_str.isdigit()):
+        return None
+    start = int(start_str)
+    end = int(end_str) if end_str else None
+    if end is not None and end < start:
+        return None
+    return start, end
+
+
+def multipart_byteranges(ranges, size, content_type, boundary):
+    """
+    Lays out a multipart/byteranges body. Returns (parts, trailer, length)
+    where parts is a list of (header_bytes, start, end).
+    """
+    parts = []
+    length = 0
+    for start, end in ranges:
+        head = (
+            f"\r\n--{boundary}\r\n"
+            f"Content-Type: {content_type}\r\n"
+            f"Content-Range: bytes {start}-{end}/{size}\r\n\r\n"
+        ).encode("ascii")
+        parts.append((head, start, end))
+        length += len(head) + (end - start + 1)
+    trailer = f"\r\n--{boundary}--\r\n".encode("ascii")
+    return parts, trailer, length + len(trailer)
@@ -0,0 +1,153 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import subprocess
+import threading
+from collections import OrderedDict
+
+DEFAULT_FRAME_CACHE_MB = 32
+
+# Longest side of a still when the request doesn't ask for a width
+MAX_FRAME_WIDTH = 4096
+
+# Output format -> (content type, trailing filter, ffmpeg output options)
+FRAME_FORMATS = {
+    "jpeg": ("image/jpeg", "format=yuvj420p", ["-c:v", "mjpeg", "-q:v", "2", "-f", "image2pipe"]),
+    "png": ("image/png", None, ["-c:v", "png", "-f", "image2pipe"]),
+    "webp": ("image/webp", None, ["-c:v", "libwebp", "-quality", "90", "-f", "webp"]),
+}
+
+
+def parse_crop(value):
+    """Parses 'x:y:w:h' (pixels of the displayed frame); raises ValueError."""
+    parts = value.split(":")
+    if len(parts) != 4:
+        raise ValueError("crop must be x:y:w:h")
+    x, y, w, h = (int(float(part)) for part in parts)
+    if x < 0 or y < 0 or w <= 0 or h <= 0:
+        raise ValueError("crop must have a non-negative position and a positive size")
+    return x, y, w, h
+
+
+def frame_command(file_path, time, width=None, crop=None, image_format="jpeg"):
+    """
+    ffmpeg command writing the single frame shown at `time` to stdout.
+    -ss before -i seeks on the input (jump to the preceding keyframe, then
+    decode forward), which is fast and still frame exact. Rotation is
+    applied first, so crop coordinates are in displayed pixels.
+    """
+    filters = []
+    if crop is not None:
+        filters.append("crop=%d:%d:%d:%d" % crop)
+    if width:
+        filters.append(f"scale={width}:-2:flags=bicubic")
+    _, pixel_format, options = FRAME_FORMATS[image_format]
+    if pixel_format:
+        filters.append(pixel_format)
+    command = [
+        "ffmpeg", "-v", "error", "-nostdin",
+        "-ss", "%.6f" % max(0.0, time), "-i", file_path,
+        "-map", "0:v:0", "-frames:v", "1",
+    ]
+    if filters:
+        command += ["-vf", ",".join(filters)]
+    return command + options + ["pipe:1"]
+
+
+def grab_frame(command, verbose=False):
+    """Runs a frame_command() and returns the encoded image bytes."""
+    if verbose:
+        print(f"Grabbing frame: {' '.join(command)}")
+    try:
+        result = subprocess.run(command, capture_output=True, check=True)
+    except FileNotFoundError:
+        raise RuntimeError("'ffmpeg' command not found in PATH.")
+    except subprocess.CalledProcessError as e:
+        raise RuntimeError(e.stderr.decode("utf-8", "replace").strip() or f"ffmpeg exited with status {e.returncode}")
+    if not result.stdout:
+        raise RuntimeError("no frame at that time")
+    return result.stdout
+
+
+class _Pending:
+    """A frame some request is already decoding; others wait on it."""
+
+    def __init__(self):
+        self.ready = threading.Event()
+        self.data = None
+        self.error = None
+
+
+class FrameCache:
+    """
+    Fixed-budget LRU of encoded stills for /frame, keyed by file version,
+    timestamp, size, crop and format. Concurrent requests for the same key
+    are coalesced: the first runs ffmpeg, the others wait for its result.
+    Failures are not cached.
+    """
+
+    def __init__(self, capacity_bytes=DEFAULT_FRAME_CACHE_MB * 1024 * 1024, verbose=False):
+        self.capacity_bytes = capacity_bytes
+        self.verbose = verbose
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self._frames = OrderedDict()
+        self._size = 0
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'coalesced': self.coalesced,
+                'frames': len(self._frames),
+                'bytes': self._size,
+                'capacity': self.capacity_bytes,
+            }
+
+    def get(self, key, command_factory):
+        """Returns the encoded frame for `key`, running command_factory()'s ffmpeg on a miss."""
+        with self._lock:
+            data = self._frames.get(key)
+            if data is not None:
+                self._frames.move_to_end(key)
+                self.hits += 1
+                return data
+            pending = self._pending.get(key)
+            owner = pending is None
+            if owner:
+                pending = self._pending[key] = _Pending()
+                self.misses += 1
+            else:
+                self.coalesced += 1
+
+        if not owner:
+            pending.ready.wait()
+            if pending.error is not None:
+                raise RuntimeError(pending.error)
+            return pending.data
+
+        try:
+            pending.data = grab_frame(command_factory(), self.verbose)
+        except Exception as e:
+            pending.error = str(e)
+            raise
+        finally:
+            with self._lock:
+                del self._pending[key]
+                if pending.data is not None and len(pending.data) <= self.capacity_bytes:
+                    self._frames[key] = pending.data
+                    self._size += len(pending.data)
+                    while self._size > self.capacity_bytes:
+                        _, evicted = self._frames.popitem(last=False)
+                        self._size -= len(evicted)
+            pending.ready.set()
+        return pending.data
+
+    def close(self):
+        with self._lock:
+            self._frames.clear()
+            self._size = 0
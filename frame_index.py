@@ -0,0 +1,220 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import sys
+import struct
+import bisect
+import tempfile
+import subprocess
+import threading
+from array import array
+
+from utils import get_cache_dir, source_fingerprint, prune_cache_dir
+
+# Bump when the on-disk layout changes so stale cache entries miss
+INDEX_FORMAT_VERSION = 1
+
+# magic, format version, frame count, keyframe count, start time
+_HEADER = struct.Struct("<4sIQQd")
+_MAGIC = b"MCFI"
+
+# Frame indexes have their own cache subdirectory, pruned to this size
+FRAME_INDEX_CACHE_MAX_BYTES = 256 * 1024 * 1024
+
+# A time this close to a frame's timestamp counts as that frame
+FRAME_EPSILON = 1e-4
+
+
+def _packet_time(fields):
+    """pts_time, falling back to dts_time (AVI and raw streams often lack pts)."""
+    for value in fields[:2]:
+        if value and value != "N/A":
+            return float(value)
+    return None
+
+
+class FrameIndex:
+    """
+    Timestamp, byte offset and keyframe positions of every video frame,
+    built in the background from `ffprobe -show_packets` (demux only, no
+    decoding) and cached on disk by source fingerprint.
+
+    Frames are kept in presentation order in flat arrays (8 bytes per
+    timestamp and per offset, keyframe timestamps separately), so a
+    two-hour 60 fps video costs a few MB rather than a dict per packet.
+    Times are relative to the first frame, matching the player's clock.
+    """
+
+    def __init__(self, file_path, probe=None, cache_dir=None, verbose=False):
+        self.file_path = file_path
+        self.duration = (probe or {}).get('duration') or 0.0
+        self.cache_dir = cache_dir or os.path.join(get_cache_dir(), "frameindex")
+        self.verbose = verbose
+        self.start_time = 0.0
+        self.times = array('d')
+        self.offsets = array('q')
+        self.keyframe_times = array('d')
+        self.scanned = 0.0
+        self.error = None
+        self._done = threading.Event()
+        self._thread = None
+
+    @property
+    def done(self):
+        return self._done.is_set()
+
+    @property
+    def failed(self):
+        return self.error is not None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="mediacrop-frame-index", daemon=True)
+            self._thread.start()
+        return self
+
+    def status(self):
+        """Progress summary for the /jobs endpoint."""
+        if self.failed:
+            state, progress = "failed", None
+        elif self.done:
+            state, progress = "done", 1.0
+        else:
+            state = "running"
+            progress = round(min(1.0, self.scanned / self.duration), 3) if self.duration else None
+        return {"state": state, "progress": progress, "error": self.error}
+
+    def summary(self):
+        frames = len(self.times)
+        span = self.times[-1] - self.times[0] if frames > 1 else 0.0
+        return {
+            "frames": frames,
+            "keyframes": len(self.keyframe_times),
+            "startTime": self.start_time,
+            "frameRate": round((frames - 1) / span, 3) if span > 0 else None,
+        }
+
+    def lookup(self, time):
+        """
+        The frame shown at `time` with its neighbours and the surrounding
+        keyframes. Times before the first frame map to frame 0 and times
+        past the end to the last frame; neighbours and keyframes that don't
+        exist are None. Returns None only while the index is empty.
+        """
+        times = self.times
+        if not times:
+            return None
+        frame = max(0, bisect.bisect_right(times, time + FRAME_EPSILON) - 1)
+        k = bisect.bisect_right(self.keyframe_times, times[frame] + FRAME_EPSILON)
+        return {
+            "frame": frame,
+            "time": times[frame],
+            "offset": self.offsets[frame],
+            "keyframe": k > 0 and abs(self.keyframe_times[k - 1] - times[frame]) <= FRAME_EPSILON,
+            "previous": times[frame - 1] if frame > 0 else None,
+            "next": times[frame + 1] if frame + 1 < len(times) else None,
+            "keyframeBefore": self.keyframe_times[k - 1] if k > 0 else None,
+            "keyframeAfter": self.keyframe_times[k] if k < len(self.keyframe_times) else None,
+        }
+
+    def _cache_path(self):
+        fingerprint = source_fingerprint(self.file_path)
+        return os.path.join(self.cache_dir, f"frameindex-{fingerprint}-v{INDEX_FORMAT_VERSION}.bin")
+
+    def _run(self):
+        try:
+            path = self._cache_path()
+            if not self._load(path):
+                self._build()
+                self._save(path)
+        except Exception as e:
+            self.error = str(e)
+            print(f"Frame index error: {e}", file=sys.stderr)
+        finally:
+            self._done.set()
+
+    def _load(self, path):
+        try:
+            with open(path, "rb") as f:
+                magic, version, frames, keyframes, start_time = _HEADER.unpack(f.read(_HEADER.size))
+                if magic != _MAGIC or version != INDEX_FORMAT_VERSION:
+                    return False
+                times, offsets, keyframe_times = array('d'), array('q'), array('d')
+                times.fromfile(f, frames)
+                offsets.fromfile(f, frames)
+                keyframe_times.fromfile(f, keyframes)
+        except (OSError, EOFError, struct.error):
+            return False
+        try:
+            os.utime(path)  # mark as recently used for prune_cache_dir
+        except OSError:
+            pass
+        if self.verbose:
+            print(f"Using cached frame index: {path}")
+        self.times, self.offsets, self.keyframe_times = times, offsets, keyframe_times
+        self.start_time = start_time
+        return True
+
+    def _save(self, path):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        with open(path + ".part", "wb") as f:
+            f.write(_HEADER.pack(_MAGIC, INDEX_FORMAT_VERSION, len(self.times), len(self.keyframe_times), self.start_time))
+            self.times.tofile(f)
+            self.offsets.tofile(f)
+            self.keyframe_times.tofile(f)
+        os.replace(path + ".part", path)
+        prune_cache_dir(self.cache_dir, FRAME_INDEX_CACHE_MAX_BYTES, keep=(path,))
+
+    def _build(self):
+        command = [
+            "ffprobe", "-v", "error", "-select_streams", "v:0",
+            "-show_entries", "packet=pts_time,dts_time,pos,flags",
+            "-of", "csv=p=0", self.file_path,
+        ]
+        if self.verbose:
+            print(f"Indexing frames: {' '.join(command)}")
+        # stderr goes to a file so a flood of demuxer warnings can't stall the pipe
+        errors = tempfile.TemporaryFile()
+        try:
+            process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=errors)
+        except FileNotFoundError:
+            errors.close()
+            raise RuntimeError("'ffprobe' command not found in PATH.")
+
+        # Packets arrive in decode order; keyframe flags ride along as a
+        # byte per packet until the arrays are put in presentation order
+        times, offsets, flags = array('d'), array('q'), bytearray()
+        for line in process.stdout:
+            fields = line.decode("ascii", "replace").strip().split(",")
+            if len(fields) < 4:
+                continue
+            time = _packet_time(fields)
+            if time is None:
+                continue
+            times.append(time)
+            offsets.append(int(fields[2]) if fields[2].isdigit() else -1)
+            flags.append(1 if "K" in fields[3] else 0)
+            self.scanned = time
+        returncode = process.wait()
+        errors.seek(0)
+        stderr = errors.read().decode("utf-8", "replace").strip()
+        errors.close()
+        if returncode != 0:
+            raise RuntimeError(stderr.splitlines()[-1] if stderr else f"ffprobe exited with status {returncode}")
+        if not times:
+            raise RuntimeError("no video packets found")
+
+        if any(times[i] > times[i + 1] for i in range(len(times) - 1)):
+            order = sorted(range(len(times)), key=times.__getitem__)
+            times = array('d', (times[i] for i in order))
+            offsets = array('q', (offsets[i] for i in order))
+            flags = bytearray(flags[i] for i in order)
+            del order
+
+        start_time = times[0]
+        for i in range(len(times)):
+            times[i] = round(times[i] - start_time, 6)
+        self.keyframe_times = array('d', (times[i] for i in range(len(times)) if flags[i]))
+        self.times, self.offsets, self.start_time = times, offsets, start_time
+
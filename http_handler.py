@@ -3,13 +3,39 @@
 
 import os
 import json
+import math
 import time
 import mimetypes
-import subprocess
 import sys
-from http.server import BaseHTTPRequestHandler, HTTPServer
+import uuid
+import socket
+from http.server import BaseHTTPRequestHandler
 from urllib.parse import urlparse, parse_qs
 from http_handler_js import get_javascript_code
+from http_handler_html import get_html_page
+from http_handler_css import get_css_code
+from media_probe import ProbeCache, stat_key
+from crop_server import DEFAULT_KEEPALIVE_TIMEOUT, DEFAULT_MAX_KEEPALIVE_REQUESTS
+from asset_cache import RenderedAssetCache, static_url
+from block_cache import file_version
+from file_delivery import (
+    send_file_range, make_etag, etag_version, evaluate_preconditions, if_range_allows,
+    parse_range_header, parse_open_range, multipart_byteranges, RangeNotSatisfiable,
+    MediaFile, pread_into
+)
+from transcode import REMUX_EXTS, can_remux, remux_command, SpoolCache, SPOOL_CHUNK, SPOOL_WAIT_SECONDS
+from proxy import PROXY_EXTS, needs_proxy, display_size, ProxyCache
+from image_preview import PREVIEW_IMAGE_EXTS, PREVIEW_WAIT_SECONDS, ImagePreview
+from tiles import TILE_EXTS, needs_tiles, TilePyramid
+from animated_image import ANIMATED_EXTS, needs_animation_proxy
+from thumbnails import ThumbnailSheets
+from frame_index import FrameIndex
+from frame_grab import FRAME_FORMATS, MAX_FRAME_WIDTH, FrameCache, parse_crop, frame_command
+from decoder_session import DecoderSession
+from autocrop import AutoCropJob
+from scene_index import SceneIndex
+from utils import VersionedJobCache
+from crop_path import CropPath
 
 mimetypes.init()
 mimetypes.add_type('image/avif', '.avif')
@@ -19,129 +45,21 @@ mimetypes.add_type('audio/flac', '.flac')
 mimetypes.add_type('audio/aac', '.aac')
 mimetypes.add_type('audio/opus', '.opus')
 
+# /save and /croppath bodies; crop path keyframes take ~80 bytes each
+MAX_SAVE_BODY_BYTES = 256 * 1024
 
-class CropHandler(BaseHTTPRequestHandler):
-    def log_message(self, format, *args):
-        if self.server.verbose:
-            super().log_message(format, *args)
-
-    def _get_token_from_query(self):
-        query = urlparse(self.path).query
-        return parse_qs(query).get('token', [None])[0]
-
-    def _is_authorized(self):
-        server_token = getattr(self.server, 'auth_token', None)
-        if server_token is None:
-            return True
-        
-        client_token = self._get_token_from_query()
-        return client_token == server_token
-
-    def _get_media_rotation(self, file_path, media_type):
-        """
-        Uses ffprobe to get the video's rotation metadata.
-        Returns rotation angle (e.g., 90, 270) or 0.
-        """
-        if media_type != "video":
-            return 0
-        
-        # We assume ffprobe is in the system PATH (part of FFmpeg suite)
-        command = [
-            "ffprobe",
-            "-v", "quiet",
-            "-print_format", "json",
-            "-show_streams",
-            "-select_streams", "v:0",
-            file_path
-        ]
-        
-        try:
-            result = subprocess.run(command, capture_output=True, text=True, check=True, encoding='utf-8')
-            data = json.loads(result.stdout)
-            
-            if not data.get("streams") or len(data["streams"]) == 0:
-                if self.server.verbose: print("ffprobe: No video streams found.", file=sys.stderr)
-                return 0
-            
-            stream = data["streams"][0]
-            
-            # Check side data first (common in MP4/MOV)
-            if "side_data_list" in stream:
-                for side_data in stream["side_data_list"]:
-                    if side_data.get("side_data_type") == "Display Matrix":
-                        # 'rotation' key might be present directly
-                        rotation = side_data.get("rotation")
-                        if rotation:
-                            # Clean up potential negative values like -90
-                            angle = int(float(rotation)) % 360
-                            if angle < 0: angle += 360
-                            if self.server.verbose: print(f"Rotation (Matrix): {angle} deg")
-                            return angle
-            
-            # Fallback to tags (common in MKV)
-            if "tags" in stream and "rotate" in stream["tags"]:
-                rotation = stream["tags"]["rotate"]
-                angle = int(float(rotation)) % 360
-                if angle < 0: angle += 360
-                if self.server.verbose: print(f"Rotation (Tags): {angle} deg")
-                return angle
-            
-            if self.server.verbose: print("No rotation metadata found.")
-            return 0
-            
-        except FileNotFoundError:
-            print("---", file=sys.stderr)
-            print("WARNING: 'ffprobe' command not found in PATH.", file=sys.stderr)
-            print("Rotation metadata check will be skipped.", file=sys.stderr)
-            print("Install FFmpeg (which includes ffprobe) to fix this.", file=sys.stderr)
-            print("---", file=sys.stderr)
-            return 0
-        except subprocess.CalledProcessError as e:
-            if self.server.verbose:
-                print(f"ffprobe error: {e.stderr}", file=sys.stderr)
-            return 0
-        except json.JSONDecodeError:
-            if self.server.verbose:
-                print("Failed to parse ffprobe JSON output.", file=sys.stderr)
-            return 0
-        except Exception as e:
-            if self.server.verbose:
-                print(f"Error checking rotation: {e}", file=sys.stderr)
-            return 0
-
-    def _get_media_type_info(self, file_path):
-        ext = os.path.splitext(file_path)[1].lower()
-
-        supported_image_exts = [
-            ".jpg", ".jpeg", ".png", ".webp", ".gif", ".bmp", ".svg", ".ico", ".avif", ".tiff", ".tif", ".heic", ".heif", ".jxl"
-        ]
-        
-        supported_video_exts = [
-            ".mp4", ".webm", ".ogv", ".mov"
-        ]
-        
-        supported_audio_exts = [
-            ".mp3", ".wav", ".ogg", ".m4a", ".flac", ".aac", ".opus"
-        ]
+SUPPORTED_VIDEO_EXTS = [
+    ".mp4", ".webm", ".ogv", ".mov"
+]
 
-        cache_buster = int(time.time())
-        media_tag = ""
-        media_type = ""
-        controls_html = ""
-        rotation = 0
-
-        if ext in supported_image_exts:
-            media_tag = f'<img id="media" data-src="/file?v={cache_buster}" onload="initializeCrop()" draggable="false" alt="Media file" oncontextmenu="return false;" />'
-            media_type = "image"
-        elif ext in supported_video_exts:
-            media_tag = f'<video id="media" preload="metadata" data-src="/file?v={cache_buster}" onloadedmetadata="initializeCrop()" draggable="false" oncontextmenu="return false;"></video>'
-            media_type = "video"
-            
-            rotation = self._get_media_rotation(file_path, media_type)
-            
-            controls_html = '''
+VIDEO_CONTROLS_HTML = '''
 <div class="video-controls" id="videoControls">
   <button id="playPause" class="control-btn" title="Play/Pause">▶️</button>
+  <button id="prevFrame" class="control-btn" title="Previous frame (,)" disabled>⏮️</button>
+  <button id="nextFrame" class="control-btn" title="Next frame (.)" disabled>⏭️</button>
+  <button id="snapKeyframe" class="control-btn" title="Snap to nearest keyframe (K)" disabled>🔑</button>
+  <button id="prevScene" class="control-btn" title="Previous scene ([)" disabled>⏪</button>
+  <button id="nextScene" class="control-btn" title="Next scene (])" disabled>⏩</button>
   <div class="progress-container">
     <span id="currentTime">0:00</span>
     <input type="range" id="seekBar" class="seek-bar" min="0" max="100" value="0" step="any">
@@ -166,1545 +84,995 @@ class CropHandler(BaseHTTPRequestHandler):
     <input type="range" id="volumeBar" class="volume-bar" min="0" max="100" value="100" step="1" title="Volume">
   </div>
 </div>'''
-        elif ext in supported_audio_exts:
-            media_tag = f'<audio id="media" controls preload="metadata" data-src="/file?v={cache_buster}" onloadedmetadata="initializeCrop()" oncontextmenu="return false;"></audio>'
-            media_type = "audio"
-            controls_html = ""
-        else:
-            media_tag = '<div id="unsupported"><div class="unsupported-content"><div class="unsupported-icon">📁</div><div class="unsupported-text">Format not supported for preview</div><div class="unsupported-subtext">You can still set crop coordinates (default size: 500x300)</div></div></div>'
-            media_type = "unsupported"
-        
-        return ext, media_tag, media_type, controls_html, rotation
 
-    def do_GET(self):
-        path = urlparse(self.path).path
-        
-        ext, media_tag, media_type, controls_html, rotation = self._get_media_type_info(self.server.media_file)
 
-        if path == "/":
-            client_token = self._get_token_from_query()
-            if not self._is_authorized():
-                self.send_error(403, "Forbidden: Invalid or missing token")
-                return
-
-            media_wrapper_start = '<div id="media-wrapper">'
-            crop_div = '<div id="crop" class="crop-box" style="left:50px;top:50px;width:200px;height:150px; -webkit-touch-callout: none;" tabindex="0" role="img" aria-label="Crop selection area" oncontextmenu="return false;"><div class="resize-handle nw"></div><div class="resize-handle ne"></div><div class="resize-handle sw"></div><div class="resize-handle se"></div><div class="resize-handle n"></div><div class="resize-handle s"></div><div class="resize-handle w"></div><div class="resize-handle e"></div></div>'
-            
-            click_overlay = '<div style="position: absolute; top: 0; left: 0; width: 100%; height: 100%; z-index: 49; -webkit-touch-callout: none;" oncontextmenu="return false;"></div>'
-            
-            if media_type in ["image", "video", "unsupported"]:
-                media_section = media_wrapper_start + media_tag + click_overlay + crop_div + '</div>' + controls_html
-            else:
-                media_section = media_wrapper_start + media_tag + '</div>' + controls_html 
-
-            rotation_script = f"""
-  <script>
-    window.MEDIA_ROTATION = {rotation};
-    window.MEDIA_TOKEN = "{client_token or ''}";
-  </script>
-"""
-            
-            html = f"""<!DOCTYPE html>
-<html lang="en">
-<head>
-  <meta charset="utf-8">
-  <meta name="viewport" content="width=device-width, initial-scale=1.0">
-  <title>MediaCrop - Visual FFmpeg Crop Tool</title>
-  <style>
-    * {{ 
-      box-sizing: border-box; 
-      margin: 0; 
-      padding: 0;
-    }}
-    
-    :root {{
-      --primary: #00ff41;
-      --primary-hover: #00cc33;
-      --primary-dark: #00aa2a;
-      --bg-main: #0f0f0f;
-      --bg-panel: #1a1a1a;
-      --bg-control: #252525;
-      --border: #333;
-      --border-light: #444;
-      --text-main: #ffffff;
-      --text-muted: #aaa;
-      --text-dim: #666;
-      --shadow: 0 4px 20px rgba(0, 0, 0, 0.4);
-      --shadow-heavy: 0 8px 32px rgba(0, 0, 0, 0.6);
-      --radius: 8px;
-      --radius-large: 12px;
-      --primary-rgb: 0, 255, 65;
-    }}
-    
-    .light-theme {{
-        --primary: #008000;
-        --primary-hover: #006400;
-        --primary-dark: #004d00;
-        --bg-main: #f0f0f0;
-        --bg-panel: #ffffff;
-        --bg-control: #e0e0e0;
-        --border: #ccc;
-        --border-light: #ddd;
-        --text-main: #1a1a1a;
-        --text-muted: #555;
-        --text-dim: #888;
-        --shadow: 0 4px 20px rgba(0, 0, 0, 0.1);
-        --shadow-heavy: 0 8px 32px rgba(0, 0, 0, 0.15);
-        --primary-rgb: 0, 128, 0;
-    }}
-    
-    body {{
-      font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, 'Helvetica Neue', Arial, sans-serif;
-      background: var(--bg-main);
-      color: var(--text-main);
-      user-select: none;
-      min-height: 100vh;
-      display: flex;
-      flex-direction: column;
-      transition: background-color 0.3s, color 0.3s;
-    }}
-
-    .header-bar {{
-      background: var(--bg-panel);
-      border-bottom: 1px solid var(--border);
-      padding: 12px 20px;
-      display: flex;
-      align-items: center;
-      justify-content: space-between;
-      flex-shrink: 0;
-      height: 60px;
-    }}
-    
-    .header-controls {{
-        display: flex;
-        align-items: center;
-        gap: 20px;
-    }}
-
-    #themeToggle {{
-        background: var(--bg-control);
-        border: 1px solid var(--border);
-        color: var(--text-main);
-        font-size: 20px;
-        line-height: 1;
-        width: 40px;
-        height: 40px;
-        border-radius: 50%;
-        cursor: pointer;
-        display: flex;
-        align-items: center;
-        justify-content: center;
-        transition: all 0.2s ease;
-    }}
-    
-    #themeToggle:hover {{
-        background: var(--border);
-        box-shadow: 0 0 10px rgba(var(--primary-rgb), 0.3);
-    }}
-
-    .app-title {{
-      font-size: 18px;
-      font-weight: 600;
-      color: var(--primary);
-      display: flex;
-      align-items: center;
-      gap: 8px;
-    }}
-
-    .app-title::before {{
-      content: '✂️';
-      font-size: 20px;
-    }}
-
-    .file-info {{
-      display: flex;
-      align-items: center;
-      gap: 15px;
-      font-size: 13px;
-      color: var(--text-muted);
-    }}
-
-    .file-detail {{
-      display: flex;
-      align-items: center;
-      gap: 5px;
-    }}
-
-    .file-detail-label {{
-      color: var(--text-dim);
-    }}
-
-    .file-detail-value {{
-      color: var(--text-main);
-      font-weight: 500;
-    }}
-
-    .main-content {{
-      display: flex;
-      flex: 1;
-      min-height: 0;
-    }}
-
-    .sidebar {{
-      width: 280px;
-      background: var(--bg-panel);
-      border-right: 1px solid var(--border);
-      display: flex;
-      flex-direction: column;
-      flex-shrink: 0;
-    }}
-
-    .sidebar-section {{
-      border-bottom: 1px solid var(--border);
-      padding: 20px;
-    }}
-
-    .sidebar-section:last-child {{
-      border-bottom: none;
-      flex: 1;
-    }}
-
-    .section-title {{
-      font-size: 14px;
-      font-weight: 600;
-      color: var(--text-main);
-      margin-bottom: 15px;
-      display: flex;
-      align-items: center;
-      gap: 8px;
-    }}
-
-    .section-title::before {{
-      font-size: 16px;
-    }}
-
-    .section-title.aspect::before {{ content: '📐'; }}
-    .section-title.tools::before {{ content: '🔧'; }}
-    .section-title.info::before {{ content: '📊'; }}
-
-    .form-group {{
-      margin-bottom: 15px;
-    }}
-
-    .form-group:last-child {{
-      margin-bottom: 0;
-    }}
-
-    .form-label {{
-      display: block;
-      font-size: 13px;
-      font-weight: 500;
-      color: var(--text-muted);
-      margin-bottom: 6px;
-    }}
-
-    .form-select, .form-input, .form-button {{
-      width: 100%;
-      padding: 10px 12px;
-      background: var(--bg-control);
-      border: 1px solid var(--border);
-      border-radius: var(--radius);
-      color: var(--text-main);
-      font-size: 13px;
-      transition: all 0.2s ease;
-    }}
-
-    .form-select:focus, .form-input:focus {{
-      outline: none;
-      border-color: var(--primary);
-      box-shadow: 0 0 0 3px color-mix(in srgb, var(--primary) 30%, transparent);
-    }}
-
-    .form-input {{
-      text-align: center;
-      font-family: 'SF Mono', Monaco, 'Cascadia Code', 'Roboto Mono', Consolas, 'Courier New', monospace;
-    }}
-
-    .custom-ratio {{
-      display: none;
-      grid-template-columns: 1fr auto 1fr;
-      gap: 8px;
-      align-items: center;
-      margin-top: 8px;
-    }}
-
-    .custom-ratio.visible {{
-      display: grid;
-    }}
-
-    .ratio-separator {{
-      color: var(--text-muted);
-      font-weight: 500;
-    }}
-
-    .form-button {{
-      background: linear-gradient(135deg, var(--primary), var(--primary-dark));
-      color: #000;
-      font-weight: 600;
-      cursor: pointer;
-      border: none;
-      transition: all 0.2s ease;
-    }}
-
-    .form-button:hover {{
-      background: linear-gradient(135deg, var(--primary-hover), var(--primary));
-      transform: translateY(-1px);
-      box-shadow: 0 4px 12px color-mix(in srgb, var(--primary) 50%, transparent);
-    }}
-
-    .form-button:active {{
-      transform: translateY(0);
-    }}
-    
-    .light-theme .form-button {{
-        color: #ffffff;
-    }}
+def get_media_probe(server, file_path):
+    """Returns cached ffprobe data for the file (see media_probe.ProbeCache)."""
+    probe_cache = getattr(server, 'probe_cache', None)
+    if probe_cache is None:
+        probe_cache = ProbeCache(server.verbose)
+        server.probe_cache = probe_cache
+    return probe_cache.get(file_path)
+
+def get_media_rotation(server, file_path, media_type):
+    """
+    Returns the video's rotation angle (e.g., 90, 270) or 0,
+    read from the server's probe cache.
+    """
+    if media_type != "video":
+        return 0
+    return get_media_probe(server, file_path)['rotation']
+
+def is_video_candidate(ext):
+    """Extensions whose probe decides between direct, remuxed and proxied playback."""
+    return ext in SUPPORTED_VIDEO_EXTS or ext in REMUX_EXTS or ext in PROXY_EXTS
+
+
+def plays_from_proxy(server, file_path, ext):
+    """
+    True when the page plays a background-encoded proxy (see /proxy)
+    instead of the file: heavy video, or a large animated image.
+    """
+    if is_video_candidate(ext):
+        return needs_proxy(ext, get_media_probe(server, file_path))
+    return needs_animation_proxy(ext, file_path)
+
+
+def get_media_type_info(server, file_path):
+    ext = os.path.splitext(file_path)[1].lower()
+
+    supported_image_exts = [
+        ".jpg", ".jpeg", ".png", ".webp", ".gif", ".bmp", ".svg", ".ico", ".avif", ".tiff", ".tif", ".heic", ".heif", ".jxl"
+    ]
     
-    .light-theme .form-button:hover {{
-        color: #ffffff;
-    }}
-    
-    #saveButton {{
-      background: linear-gradient(135deg, #4CAF50, #45a049) !important;
-      color: #ffffff !important;
-    }}
-
-    .button-grid {{
-      display: grid;
-      grid-template-columns: 1fr 1fr;
-      gap: 8px;
-    }}
-
-    .button-grid .form-button {{
-      font-size: 12px;
-      padding: 8px 10px;
-    }}
-
-    .info-stats {{
-      display: flex;
-      flex-direction: column;
-      gap: 10px;
-    }}
-
-    .info-stat {{
-      display: flex;
-      justify-content: space-between;
-      align-items: center;
-      font-size: 13px;
-    }}
-
-    .info-stat-label {{
-      color: var(--text-muted);
-    }}
-
-    .info-stat-value {{
-      color: var(--primary);
-      font-weight: 600;
-      font-family: 'SF Mono', Monaco, 'Cascadia Code', 'Roboto Mono', Consolas, 'Courier New', monospace;
-    }}
-
-    .media-viewer {{
-      flex: 1;
-      display: flex;
-      align-items: center;
-      justify-content: center;
-      padding: 30px;
-      position: relative;
-      background: radial-gradient(circle at center, var(--bg-panel) 0%, var(--bg-main) 100%);
-      min-height: 0;
-      overflow: auto; 
-      scrollbar-width: auto;
-      scrollbar-color: var(--primary) var(--bg-control);
-    }}
-    
-    .media-viewer::-webkit-scrollbar {{
-      width: 20px;
-      height: 20px;
-    }}
-
-    .media-viewer::-webkit-scrollbar-track {{
-      background: var(--bg-control);
-    }}
-
-    .media-viewer::-webkit-scrollbar-thumb {{
-      background-color: var(--primary);
-      border-radius: 8px;
-      border: 4px solid var(--bg-control);
-    }}
-
-    .media-viewer::-webkit-scrollbar-thumb:hover {{
-      background-color: var(--primary-hover);
-    }}
-
-    #container {{
-      position: relative;
-      border: 2px solid var(--border-light);
-      border-radius: var(--radius-large);
-      background: #000;
-      box-shadow: var(--shadow-heavy);
-      display: inline-block;
-    }}
-    
-    .light-theme #container {{
-        background: #333;
-    }}
-
-    #media-wrapper {{
-        position: relative;
-        display: inline-block;
-        line-height: 0;
-    }}
-
-    img, video, audio {{
-      display: block;
-      max-width: none;
-      user-select: none;
-      -webkit-user-drag: none;
-      -moz-user-drag: none;
-      -o-user-drag: none;
-      user-drag: none;
-      -webkit-touch-callout: none;
-      { "controls: none;" if media_type == "video" else "" } 
-    }}
-
-    #unsupported {{
-      width: 500px;
-      height: 300px;
-      display: inline-flex;
-      align-items: center;
-      justify-content: center;
-    }}
-
-    .unsupported-content {{
-      text-align: center;
-      padding: 40px;
-    }}
-
-    .unsupported-icon {{
-      font-size: 48px;
-      margin-bottom: 16px;
-    }}
-
-    .unsupported-text {{
-      font-size: 18px;
-      color: var(--text-main);
-      margin-bottom: 8px;
-      font-weight: 500;
-    }}
-
-    .unsupported-subtext {{
-      font-size: 14px;
-      color: var(--text-muted);
-    }}
-
-    .crop-box {{
-      border: 2px dashed var(--primary);
-      position: absolute;
-      z-index: 50;
-      box-sizing: border-box;
-      min-width: 30px;
-      min-height: 30px;
-      cursor: grab;
-      background: color-mix(in srgb, var(--primary) 15%, transparent); 
-      box-shadow: 
-        0 0 0 9999px color-mix(in srgb, var(--bg-main) 70%, transparent),
-        inset 0 0 0 1px color-mix(in srgb, var(--primary) 30%, transparent);
-      transition: box-shadow 0.2s ease;
-    }}
+    supported_audio_exts = [
+        ".mp3", ".wav", ".ogg", ".m4a", ".flac", ".aac", ".opus"
+    ]
+
+    try:
+        cache_buster = etag_version(make_etag(os.stat(file_path)))
+    except OSError:
+        cache_buster = int(time.time())
+    media_tag = ""
+    media_type = ""
+    controls_html = ""
+    rotation = 0
+
+    if plays_from_proxy(server, file_path, ext):
+        # Played from a scaled-down H.264 proxy encoded in the background (see /proxy);
+        # animated images loop like they would in an <img>
+        loop = " loop" if ext in ANIMATED_EXTS else ""
+        media_tag = f'<video id="media" preload="metadata"{loop} data-src="/proxy?v={cache_buster}" onloadedmetadata="initializeCrop()" draggable="false" oncontextmenu="return false;"></video>'
+        media_type = "video"
+        rotation = get_media_rotation(server, file_path, media_type)
+        controls_html = VIDEO_CONTROLS_HTML
+    elif ext in TILE_EXTS and needs_tiles(ext, get_media_probe(server, file_path)):
+        # Too large for one <img>: a small overview with a tile layer on top (see /tiles/)
+        media_tag = f'<img id="media" data-src="/tiles/overview?v={cache_buster}" onload="initializeCrop()" draggable="false" alt="Media file" oncontextmenu="return false;" /><div id="tileLayer" class="tile-layer"></div>'
+        media_type = "image"
+    elif ext in PREVIEW_IMAGE_EXTS:
+        # Converted to WebP/PNG in the background (see /preview)
+        media_tag = f'<img id="media" data-src="/preview?v={cache_buster}" onload="initializeCrop()" draggable="false" alt="Media file" oncontextmenu="return false;" />'
+        media_type = "image"
+    elif ext in supported_image_exts:
+        media_tag = f'<img id="media" data-src="/file?v={cache_buster}" onload="initializeCrop()" draggable="false" alt="Media file" oncontextmenu="return false;" />'
+        media_type = "image"
+    elif ext in SUPPORTED_VIDEO_EXTS:
+        media_tag = f'<video id="media" preload="metadata" data-src="/file?v={cache_buster}" onloadedmetadata="initializeCrop()" draggable="false" oncontextmenu="return false;"></video>'
+        media_type = "video"
+        
+        rotation = get_media_rotation(server, file_path, media_type)
+        
+        controls_html = VIDEO_CONTROLS_HTML
+    elif ext in REMUX_EXTS and can_remux(ext, get_media_probe(server, file_path)):
+        # Stream-copied into fragmented MP4 on the fly (see /remux)
+        media_tag = f'<video id="media" preload="metadata" data-src="/remux?v={cache_buster}" onloadedmetadata="initializeCrop()" draggable="false" oncontextmenu="return false;"></video>'
+        media_type = "video"
+        rotation = get_media_rotation(server, file_path, media_type)
+        controls_html = VIDEO_CONTROLS_HTML
+    elif ext in supported_audio_exts:
+        media_tag = f'<audio id="media" controls preload="metadata" data-src="/file?v={cache_buster}" onloadedmetadata="initializeCrop()" oncontextmenu="return false;"></audio>'
+        media_type = "audio"
+        controls_html = ""
+    else:
+        media_tag = '<div id="unsupported"><div class="unsupported-content"><div class="unsupported-icon">📁</div><div class="unsupported-text">Format not supported for preview</div><div class="unsupported-subtext">You can still set crop coordinates (default size: 500x300)</div></div></div>'
+        media_type = "unsupported"
     
-    .light-theme .crop-box {{
-        box-shadow: 
-            0 0 0 9999px rgba(0, 0, 0, 0.4),
-            inset 0 0 0 1px color-mix(in srgb, var(--primary) 50%, transparent);
-    }}
-
-    .crop-box:hover {{
-      box-shadow: 
-        0 0 0 9999px color-mix(in srgb, var(--bg-main) 75%, transparent),
-        inset 0 0 0 1px color-mix(in srgb, var(--primary) 50%, transparent),
-        0 0 20px color-mix(in srgb, var(--primary) 40%, transparent);
-    }}
-
-    .crop-box.dragging {{
-      cursor: grabbing;
-      box-shadow: 
-        0 0 0 9999px color-mix(in srgb, var(--bg-main) 80%, transparent),
-        inset 0 0 0 1px color-mix(in srgb, var(--primary) 70%, transparent),
-        0 0 25px color-mix(in srgb, var(--primary) 60%, transparent);
-    }}
+    return ext, media_tag, media_type, controls_html, rotation
+
+
+def get_media_handle(server):
+    """Returns the server's persistent MediaFile handle, creating it on first use."""
+    media_handle = getattr(server, 'media_handle', None)
+    if media_handle is None:
+        media_handle = MediaFile(server.media_file)
+        server.media_handle = media_handle
+    return media_handle
+
+
+def get_media_layout(server, f, st):
+    """
+    Returns the faststart VirtualLayout for the file when --faststart is on
+    and the file has a trailing moov, otherwise None (serve it as-is).
+    """
+    faststart = getattr(server, 'faststart', None)
+    if faststart is None:
+        return None
+    return faststart.get(f, st, file_version(st))
+
+
+def get_remux_spool(server):
+    """
+    Returns the SpooledTranscode remuxing the current version of the media
+    file, starting ffmpeg on first use or after the file changed.
+    """
+    remux_cache = getattr(server, 'remux_cache', None)
+    if remux_cache is None:
+        remux_cache = SpoolCache(server.verbose)
+        server.remux_cache = remux_cache
+    file_path = server.media_file
+    return remux_cache.get(
+        file_version(os.stat(file_path)),
+        lambda: remux_command(file_path, get_media_probe(server, file_path))
+    )
+
+
+def get_proxy_spool(server):
+    """
+    Returns the proxy SpooledTranscode for the current version of the media
+    file: a finished disk cache entry or a background encode in progress.
+    """
+    proxy_cache = getattr(server, 'proxy_cache', None)
+    if proxy_cache is None:
+        proxy_cache = ProxyCache(verbose=server.verbose)
+        server.proxy_cache = proxy_cache
+    file_path = server.media_file
+    return proxy_cache.get(file_version(os.stat(file_path)), file_path, get_media_probe(server, file_path))
+
+
+def job_caches(verbose=False):
+    """
+    A VersionedJobCache for each background job on the media file, keyed by
+    the server attribute holding it. Jobs are built from (file_path, probe),
+    plus the frame index for decoder sessions.
+    """
+    def started(job_class):
+        return lambda *args: job_class(*args, verbose=verbose).start()
+
+    return {
+        'image_preview_cache': VersionedJobCache(started(ImagePreview), release=ImagePreview.close),
+        'tile_cache': VersionedJobCache(started(TilePyramid)),
+        'thumbnail_cache': VersionedJobCache(started(ThumbnailSheets)),
+        'frame_index_cache': VersionedJobCache(started(FrameIndex)),
+        'decoder_session_cache': VersionedJobCache(
+            lambda *args: DecoderSession(*args, verbose=verbose), release=DecoderSession.close
+        ),
+        'autocrop_cache': VersionedJobCache(started(AutoCropJob)),
+        'scene_index_cache': VersionedJobCache(started(SceneIndex), release=SceneIndex.stop),
+    }
+
+
+def get_file_job(server, name, *args):
+    """
+    Returns the job held by the server's `name` job cache for the current
+    version of the media file, starting it if needed.
+    """
+    job_cache = getattr(server, name, None)
+    if job_cache is None:
+        job_cache = job_caches(server.verbose)[name]
+        setattr(server, name, job_cache)
+    file_path = server.media_file
+    return job_cache.get(file_version(os.stat(file_path)), file_path, get_media_probe(server, file_path), *args)
+
+
+def get_image_preview(server):
+    """Returns the ImagePreview converting the current version of the media file."""
+    return get_file_job(server, 'image_preview_cache')
+
+
+def get_tile_pyramid(server):
+    """Returns the TilePyramid for the current version of the media file."""
+    return get_file_job(server, 'tile_cache')
+
+
+def get_thumbnail_sheets(server):
+    """Returns the seek-bar ThumbnailSheets for the current version of the media file."""
+    return get_file_job(server, 'thumbnail_cache')
+
+
+def get_frame_index(server):
+    """Returns the FrameIndex for the current version of the media file."""
+    return get_file_job(server, 'frame_index_cache')
+
+
+def get_frame_cache(server):
+    """Returns the server's FrameCache of /frame stills, creating it on first use."""
+    frame_cache = getattr(server, 'frame_cache', None)
+    if frame_cache is None:
+        frame_cache = FrameCache(verbose=server.verbose)
+        server.frame_cache = frame_cache
+    return frame_cache
+
+
+def get_decoder_session(server, frame_index):
+    """Returns the DecoderSession stepping through the current version of the media file."""
+    return get_file_job(server, 'decoder_session_cache', frame_index)
+
+
+def get_autocrop_job(server):
+    """Returns the black-bar detection job for the current version of the media file, starting it if needed."""
+    return get_file_job(server, 'autocrop_cache')
+
+
+def get_scene_index(server):
+    """Returns the SceneIndex for the current version of the media file."""
+    return get_file_job(server, 'scene_index_cache')
+
+
+def get_job_status(server):
+    """Status of the background transcodes started so far, keyed by job name."""
+    jobs = {}
+    job_caches = (
+        ("remux", "remux_cache"), ("proxy", "proxy_cache"), ("preview", "image_preview_cache"),
+        ("tiles", "tile_cache"), ("thumbnails", "thumbnail_cache"), ("index", "frame_index_cache"),
+        ("autocrop", "autocrop_cache"), ("scenes", "scene_index_cache"),
+    )
+    for name, attr in job_caches:
+        cache = getattr(server, attr, None)
+        job = cache.current() if cache is not None else None
+        if job is not None:
+            jobs[name] = job.status()
+    return jobs
+
+
+def build_media_section(media_type, media_tag, controls_html):
+    media_wrapper_start = '<div id="media-wrapper">'
+    crop_div = '<div id="crop" class="crop-box" style="left:50px;top:50px;width:200px;height:150px; -webkit-touch-callout: none;" tabindex="0" role="img" aria-label="Crop selection area" oncontextmenu="return false;"><div class="resize-handle nw"></div><div class="resize-handle ne"></div><div class="resize-handle sw"></div><div class="resize-handle se"></div><div class="resize-handle n"></div><div class="resize-handle s"></div><div class="resize-handle w"></div><div class="resize-handle e"></div></div>'
     
-    .light-theme .crop-box:hover, .light-theme .crop-box.dragging {{
-        box-shadow: 
-            0 0 0 9999px rgba(0, 0, 0, 0.5), 
-            inset 0 0 0 1px color-mix(in srgb, var(--primary) 70%, transparent),
-            0 0 25px color-mix(in srgb, var(--primary) 60%, transparent);
-    }}
-
-
-    .crop-box.show-grid::before {{
-      content: '';
-      position: absolute;
-      top: 0;
-      left: 0;
-      right: 0;
-      bottom: 0;
-      background-image: 
-        linear-gradient(to right, color-mix(in srgb, var(--primary) 30%, transparent) 1px, transparent 1px),
-        linear-gradient(to bottom, color-mix(in srgb, var(--primary) 30%, transparent) 1px, transparent 1px);
-      background-size: 33.33% 33.33%;
-      pointer-events: none;
-    }}
-
-    .resize-handle {{
-      position: absolute;
-      background: var(--primary);
-      width: 16px;
-      height: 16px;
-      border: 2px solid var(--bg-main);
-      border-radius: 50%;
-      z-index: 51;
-      transition: all 0.2s ease;
-      transform: translate(-50%, -50%);
-    }}
+    click_overlay = '<div style="position: absolute; top: 0; left: 0; width: 100%; height: 100%; z-index: 49; -webkit-touch-callout: none;" oncontextmenu="return false;"></div>'
     
-    .light-theme .resize-handle {{
-        border: 2px solid var(--bg-panel);
-    }}
+    if media_type in ["image", "video", "unsupported"]:
+        return media_wrapper_start + media_tag + click_overlay + crop_div + '</div>' + controls_html
+    return media_wrapper_start + media_tag + '</div>' + controls_html
+
+
+def render_page_assets(server, file_path, token):
+    """
+    Renders the index page and /main.js for the current file.
+    Returns (key, html, js, css) where key identifies the render.
+    """
+    ext, media_tag, media_type, controls_html, rotation = get_media_type_info(server, file_path)
+    media_section = build_media_section(media_type, media_tag, controls_html)
+    natural_width = natural_height = 0
+    duration = 0
+    tiles = None
+    thumbnails = frame_index = scenes = False
+    save_type = media_type
+    if media_type == "image" and ext in TILE_EXTS and needs_tiles(ext, get_media_probe(server, file_path)):
+        tiles = get_tile_pyramid(server).manifest()
+        natural_width, natural_height = tiles["width"], tiles["height"]
+    elif media_type == "image" and ext in PREVIEW_IMAGE_EXTS:
+        # The preview may be downscaled; coordinates use the original's size
+        natural_width, natural_height = get_image_preview(server).natural_size
+    elif media_type == "video":
+        probe = get_media_probe(server, file_path)
+        # Fragmented MP4 from /remux and /proxy carries no duration until fully loaded
+        duration = probe['duration']
+        if duration:
+            # Keyframe sprite sheets for seek-bar previews; the player's first
+            # /thumbnails/index.json request starts the job, not the page
+            thumbnails = True
+            # Frame timestamps for frame stepping and keyframe snapping, started
+            # by the player's first /index request
+            frame_index = True
+            # Scene cuts with per-scene black bars for timeline markers, started
+            # by the player's first /scenes request
+            scenes = True
+        if plays_from_proxy(server, file_path, ext):
+            # Crop coordinates refer to the original, not the proxy
+            natural_width, natural_height = display_size(probe)
+            if ext in ANIMATED_EXTS:
+                # /save still builds the command for the original animated image
+                save_type = "image"
+    js = get_javascript_code()
+    css = get_css_code()
+    html = get_html_page(
+        ext, media_type, media_section, rotation, token,
+        css_url=static_url("style", "css", css),
+        js_url=static_url("main", "js", js),
+        duration=duration,
+        natural_size=(natural_width, natural_height),
+        tiles=tiles,
+        save_type=save_type,
+        thumbnails=thumbnails,
+        frame_index=frame_index,
+        scenes=scenes
+    )
+    key = (
+        media_type, ext, rotation, token, media_tag, duration,
+        natural_width, natural_height, save_type, thumbnails, frame_index, scenes
+    )
+    return key, html, js, css
+
+
+def get_page_assets(server):
+    """
+    Returns the encoded page assets from the server's render cache,
+    rendering them only when the media file's stat or the token changed,
+    or when an image preview finished converting (its natural size is
+    only known then).
+    """
+    asset_cache = getattr(server, 'asset_cache', None)
+    if asset_cache is None:
+        asset_cache = RenderedAssetCache()
+        server.asset_cache = asset_cache
+
+    file_path = server.media_file
+    token = getattr(server, 'auth_token', None) or ''
+    try:
+        version = stat_key(file_path)
+    except OSError:
+        version = (file_path, None, None, None)
+    preview_cache = getattr(server, 'image_preview_cache', None)
+    preview = preview_cache.current() if preview_cache is not None else None
+    preview_ready = preview is not None and preview.done
+    return asset_cache.get((version, token, preview_ready), lambda: render_page_assets(server, file_path, token))
 
 
-    .resize-handle:hover {{
-      background: #fff;
-      transform: translate(-50%, -50%) scale(1.3);
-      box-shadow: 0 0 8px color-mix(in srgb, var(--primary) 50%, transparent);
-    }}
-    
-    .light-theme .resize-handle:hover {{
-        background: #000;
-        box-shadow: 0 0 8px color-mix(in srgb, var(--primary) 70%, transparent);
-    }}
-
-    .resize-handle.nw {{ top: 0; left: 0; cursor: nwse-resize; }}
-    .resize-handle.ne {{ top: 0; right: 0; cursor: ne-resize; transform: translate(50%, -50%); }}
-    .resize-handle.sw {{ bottom: 0; left: 0; cursor: sw-resize; transform: translate(-50%, 50%); }}
-    .resize-handle.se {{ bottom: 0; right: 0; cursor: se-resize; transform: translate(50%, 50%); }}
-    .resize-handle.n {{ top: 0; left: 50%; cursor: n-resize; }}
-    .resize-handle.s {{ bottom: 0; left: 50%; cursor: s-resize; transform: translate(-50%, 50%); }}
-    .resize-handle.w {{ left: 0; top: 50%; cursor: w-resize; }}
-    .resize-handle.e {{ right: 0; top: 50%; cursor: e-resize; transform: translate(50%, -50%); }}
-
-    .video-controls {{
-      display: flex;
-      align-items: center;
-      justify-content: space-between;
-      padding: 10px 20px;
-      background: var(--bg-control);
-      border-top: 1px solid var(--border-light);
-      gap: 10px;
-      flex-shrink: 0;
-    }}
-
-    .control-btn {{
-      background: none;
-      border: none;
-      color: var(--text-main);
-      font-size: 18px;
-      cursor: pointer;
-      padding: 5px;
-      border-radius: var(--radius);
-      transition: background 0.2s ease;
-      width: 40px;
-      height: 40px;
-      display: flex;
-      align-items: center;
-      justify-content: center;
-    }}
-
-    .control-btn:hover {{
-      background: var(--border);
-    }}
-
-    .progress-container {{
-      flex: 1;
-      display: flex;
-      align-items: center;
-      gap: 10px;
-      min-width: 0;
-    }}
-
-    #currentTime, #duration {{
-      font-size: 12px;
-      color: var(--text-muted);
-      min-width: 40px;
-      font-family: 'SF Mono', Monaco, 'Cascadia Code', 'Roboto Mono', Consolas, 'Courier New', monospace;
-    }}
-
-    .seek-bar {{
-      flex: 1;
-      height: 4px;
-      background: var(--border);
-      border-radius: 2px;
-      outline: none;
-      -webkit-appearance: none;
-      cursor: pointer;
-    }}
-
-    .seek-bar::-webkit-slider-thumb {{
-      -webkit-appearance: none;
-      appearance: none;
-      width: 12px;
-      height: 12px;
-      background: var(--primary);
-      border-radius: 50%;
-      cursor: pointer;
-    }}
-
-    .seek-bar::-moz-range-thumb {{
-      width: 12px;
-      height: 12px;
-      background: var(--primary);
-      border-radius: 50%;
-      cursor: pointer;
-      border: none;
-    }}
-
-    .control-select {{
-      background: var(--bg-control);
-      border: 1px solid var(--border);
-      color: var(--text-main);
-      padding: 5px 8px;
-      border-radius: var(--radius);
-      font-size: 12px;
-      cursor: pointer;
-    }}
-
-    .volume-container {{
-      display: flex;
-      align-items: center;
-      gap: 5px;
-      min-width: 100px;
-    }}
-
-    .volume-bar {{
-      width: 80px;
-      height: 4px;
-      background: var(--border);
-      border-radius: 2px;
-      outline: none;
-      -webkit-appearance: none;
-      cursor: pointer;
-    }}
-
-    .volume-bar::-webkit-slider-thumb {{
-      -webkit-appearance: none;
-      appearance: none;
-      width: 12px;
-      height: 12px;
-      background: var(--primary);
-      border-radius: 50%;
-      cursor: pointer;
-    }}
-
-    .volume-bar::-moz-range-thumb {{
-      width: 12px;
-      height: 12px;
-      background: var(--primary);
-      border-radius: 50%;
-      cursor: pointer;
-      border: none;
-    }}
-
-    .loading {{
-      position: fixed;
-      top: 50%;
-      left: 50%;
-      transform: translate(-50%, -50%);
-      background: var(--bg-panel);
-      padding: 30px 40px;
-      border-radius: var(--radius-large);
-      box-shadow: var(--shadow-heavy);
-      z-index: 1000;
-      text-align: center;
-    }}
-
-    .spinner {{
-      width: 32px;
-      height: 32px;
-      border: 3px solid var(--border);
-      border-top: 3px solid var(--primary);
-      border-radius: 50%;
-      animation: spin 1s linear infinite;
-      margin: 0 auto 15px;
-    }}
-
-    @keyframes spin {{
-      0% {{ transform: rotate(0deg); }}
-      100% {{ transform: rotate(360deg); }}
-    }}
-
-    .loading-text {{
-      font-size: 16px;
-      font-weight: 500;
-      color: var(--text-main);
-    }}
-
-    .help-modal {{
-      position: fixed;
-      top: 0;
-      left: 0;
-      right: 0;
-      bottom: 0;
-      background: rgba(0, 0, 0, 0.8);
-      display: none;
-      align-items: center;
-      justify-content: center;
-      z-index: 1000;
-      backdrop-filter: blur(4px);
-    }}
-
-    .help-content {{
-      background: var(--bg-panel);
-      border-radius: var(--radius-large);
-      padding: 30px;
-      max-width: 400px;
-      box-shadow: var(--shadow-heavy);
-      border: 1px solid var(--border);
-    }}
-
-    .help-title {{
-      font-size: 20px;
-      font-weight: 600;
-      color: var(--primary);
-      margin-bottom: 20px;
-      text-align: center;
-      display: flex;
-      align-items: center;
-      justify-content: center;
-      gap: 8px;
-    }}
-
-    .help-title::before {{
-      content: '⌨️';
-      font-size: 24px;
-    }}
-
-    .help-shortcuts {{
-      display: flex;
-      flex-direction: column;
-      gap: 12px;
-      margin-bottom: 25px;
-    }}
-
-    .help-shortcut {{
-      display: flex;
-      justify-content: space-between;
-      align-items: center;
-      font-size: 14px;
-    }}
-
-    .help-shortcut-desc {{
-      color: var(--text-muted);
-    }}
-
-    .help-shortcut-key {{
-      background: var(--bg-control);
-      color: var(--primary);
-      padding: 4px 8px;
-      border-radius: 4px;
-      font-family: 'SF Mono', Monaco, 'Cascadia Code', 'Roboto Mono', Consolas, 'Courier New', monospace;
-      font-size: 12px;
-      font-weight: 600;
-    }}
-
-    .help-close {{
-      background: linear-gradient(135deg, var(--primary), var(--primary-dark));
-      color: #000;
-      border: none;
-      padding: 12px 24px;
-      border-radius: var(--radius);
-      font-weight: 600;
-      cursor: pointer;
-      width: 100%;
-      transition: all 0.2s ease;
-    }}
-    
-    .light-theme .help-close {{
-        color: #ffffff;
-    }}
-
-
-    .help-close:hover {{
-      background: linear-gradient(135deg, var(--primary-hover), var(--primary));
-      transform: translateY(-1px);
-    }}
-
-    .context-menu {{
-      position: fixed;
-      background: var(--bg-panel);
-      border: 1px solid var(--border);
-      border-radius: var(--radius);
-      padding: 8px 0;
-      z-index: 300;
-      display: none;
-      box-shadow: var(--shadow);
-      min-width: 180px;
-    }}
-
-    .context-item {{
-      padding: 12px 16px;
-      cursor: pointer;
-      font-size: 14px;
-      transition: background 0.2s ease;
-      color: var(--text-main);
-    }}
-
-    .context-item:hover {{
-      background: var(--bg-control);
-      color: var(--primary);
-    }}
-
-    .floating-preview {{
-      position: fixed;
-      bottom: 20px;
-      right: 20px;
-      width: 200px;
-      height: 180px;
-      min-width: 150px;
-      min-height: 120px;
-      max-width: 90vw;
-      max-height: 90vh;
-      background: var(--bg-panel);
-      border: 1px solid var(--border-light);
-      border-radius: var(--radius);
-      box-shadow: var(--shadow-heavy);
-      z-index: 500;
-      display: none; /* Initially hidden */
-      flex-direction: column;
-      overflow: hidden;
-      transition: width 0.3s ease, height 0.3s ease, opacity 0.3s;
-    }}
-
-    .preview-header {{
-      background: var(--bg-control);
-      padding: 6px 10px;
-      cursor: move;
-      font-size: 12px;
-      font-weight: 500;
-      color: var(--text-muted);
-      border-bottom: 1px solid var(--border);
-      display: flex;
-      justify-content: space-between;
-      align-items: center;
-      flex-shrink: 0;
-    }}
-
-    .preview-header .preview-size {{
-        font-family: 'SF Mono', Monaco, 'Cascadia Code', 'Roboto Mono', Consolas, 'Courier New', monospace;
-        color: var(--text-main);
-    }}
-
-    .preview-canvas-wrapper {{
-      flex-grow: 1;
-      display: flex;
-      align-items: center;
-      justify-content: center;
-      background: repeating-conic-gradient(var(--bg-main) 0% 25%, var(--bg-control) 0% 50%) 50% / 20px 20px;
-      overflow: hidden;
-      min-height: 0;
-      cursor: pointer;
-    }}
-
-    #previewCanvas {{
-      max-width: 100%;
-      max-height: 100%;
-      object-fit: contain;
-      image-rendering: pixelated;
-    }}
-    
-    .preview-resize-handle {{
-        position: absolute;
-        width: 12px;
-        height: 12px;
-        background: var(--primary);
-        border: 1px solid var(--bg-main);
-        border-radius: 3px;
-        z-index: 501;
-        opacity: 0;
-        transition: opacity 0.2s;
-    }}
-
-    .floating-preview:hover .preview-resize-handle {{
-        opacity: 1;
-    }}
-
-    .p-nw {{ top: -1px; left: -1px; cursor: nwse-resize; }}
-    .p-ne {{ top: -1px; right: -1px; cursor: nesw-resize; }}
-    .p-sw {{ bottom: -1px; left: -1px; cursor: nesw-resize; }}
-    .p-se {{ bottom: -1px; right: -1px; cursor: nwse-resize; }}
-    .p-n {{ top: -1px; left: 50%; transform: translateX(-50%); cursor: ns-resize; }}
-    .p-s {{ bottom: -1px; left: 50%; transform: translateX(-50%); cursor: ns-resize; }}
-    .p-w {{ top: 50%; left: -1px; transform: translateY(-50%); cursor: ew-resize; }}
-    .p-e {{ top: 50%; right: -1px; transform: translateY(-50%); cursor: ew-resize; }}
-
-    .preview-close-btn {{
-        display: none;
-        position: absolute;
-        top: 15px;
-        right: 15px;
-        width: 40px;
-        height: 40px;
-        background: rgba(0, 0, 0, 0.5);
-        color: white;
-        border: 1px solid rgba(255, 255, 255, 0.3);
-        border-radius: 50%;
-        font-size: 24px;
-        line-height: 38px;
-        text-align: center;
-        cursor: pointer;
-        z-index: 502;
-        transition: transform 0.2s, background 0.2s;
-    }}
-
-    .preview-close-btn:hover {{
-        background: rgba(0, 0, 0, 0.8);
-        transform: scale(1.1);
-    }}
-    
-    .floating-preview.fullscreen {{
-        top: 0 !important;
-        left: 0 !important;
-        width: 100vw !important;
-        height: 100vh !important;
-        max-width: 100vw;
-        max-height: 100vh;
-        border-radius: 0;
-        z-index: 2000;
-        transition: none;
-    }}
-
-    .floating-preview.fullscreen .preview-header,
-    .floating-preview.fullscreen .preview-resize-handle {{
-        display: none;
-    }}
-    
-    .floating-preview.fullscreen .preview-close-btn {{
-        display: block;
-    }}
-    
-    .floating-preview.fullscreen .preview-canvas-wrapper {{
-        background: #000;
-    }}
-
-    .notification {{
-      position: fixed;
-      top: 50%;
-      left: 50%;
-      transform: translate(-50%, -50%);
-      background: var(--bg-panel);
-      color: var(--text-main);
-      padding: 25px 35px;
-      border-radius: var(--radius-large);
-      z-index: 2100;
-      box-shadow: var(--shadow-heavy);
-      border: 1px solid var(--primary);
-      text-align: center;
-      max-width: 400px;
-      animation: fadeInOut 3s forwards;
-    }}
-
-    .notification-title {{
-      font-size: 18px;
-      font-weight: 600;
-      color: var(--primary);
-      margin-bottom: 15px;
-      display: flex;
-      align-items: center;
-      justify-content: center;
-      gap: 8px;
-    }}
-
-    .notification-title::before {{
-      content: '✅';
-      font-size: 20px;
-    }}
-
-    .notification-code {{
-      background: var(--bg-control);
-      padding: 12px 16px;
-      border-radius: var(--radius);
-      font-family: 'SF Mono', Monaco, 'Cascadia Code', 'Roboto Mono', Consolas, 'Courier New', monospace;
-      font-size: 14px;
-      color: var(--primary);
-      margin: 15px 0;
-      border: 1px solid var(--border);
-      overflow-x: auto;
-    }}
-
-    .notification-subtitle {{
-      font-size: 13px;
-      color: var(--text-muted);
-    }}
-    
-    @keyframes fadeInOut {{
-        0% {{ opacity: 0; transform: translate(-50%, -50%) scale(0.9); }}
-        10% {{ opacity: 1; transform: translate(-50%, -50%) scale(1); }}
-        90% {{ opacity: 1; transform: translate(-50%, -50%) scale(1); }}
-        100% {{ opacity: 0; transform: translate(-50%, -50%) scale(0.9); }}
-    }}
-
-    @media (max-width: 1024px) {{
-      .sidebar {{
-        width: 250px;
-      }}
-      
-      #container {{
-        max-width: calc(100vw - 270px);
-      }}
-    }}
-
-    @media (max-width: 768px) {{
-      .header-bar {{
-        flex-direction: column;
-        height: auto;
-        padding: 12px 15px;
-        gap: 10px;
-        flex-shrink: 0;
-      }}
-      
-      .file-info {{
-        gap: 10px;
-        font-size: 12px;
-      }}
-      
-      .main-content {{
-        flex-direction: column;
-      }}
-      
-      .sidebar {{
-        width: 100%;
-        border-right: none;
-        border-bottom: 1px solid var(--border);
-        flex-direction: row;
-        overflow-x: auto;
-        padding: 0;
-        flex-shrink: 0;
-        scrollbar-width: thin;
-        scrollbar-color: var(--primary) var(--bg-control);
-      }}
-
-      .sidebar::-webkit-scrollbar {{
-        height: 6px;
-      }}
-      .sidebar::-webkit-scrollbar-track {{
-        background: var(--bg-control);
-      }}
-      .sidebar::-webkit-scrollbar-thumb {{
-        background-color: var(--primary);
-        border-radius: 6px;
-      }}
-      
-      .sidebar-section {{
-        min-width: 220px;
-        border-right: 1px solid var(--border);
-        border-bottom: none;
-        flex-shrink: 0;
-      }}
-      
-      .sidebar-section:last-child {{
-        border-right: none;
-      }}
-
-      .media-viewer {{
-        flex: 1;
-        min-height: 0;
-      }}
-      
-      #container {{
-        max-width: 100%;
-        max-height: 100%;
-      }}
-
-      .resize-handle {{
-        width: 22px;
-        height: 22px;
-      }}
-
-      .video-controls {{
-        padding: 10px 15px;
-        gap: 5px;
-      }}
-
-      .control-btn {{
-        width: 35px;
-        height: 35px;
-        font-size: 16px;
-      }}
-
-      .progress-container {{
-        gap: 5px;
-      }}
-
-      #currentTime, #duration {{
-        min-width: 35px;
-        font-size: 11px;
-      }}
-
-      .volume-container {{
-        min-width: 80px;
-      }}
-
-      .volume-bar {{
-        width: 60px;
-      }}
-    }}
-
-    .smooth-transition {{
-      transition: all 0.15s cubic-bezier(0.4, 0, 0.2, 1);
-    }}
-
-    .visually-hidden {{
-      position: absolute;
-      width: 1px;
-      height: 1px;
-      margin: -1px;
-      padding: 0;
-      overflow: hidden;
-      clip: rect(0, 0, 0, 0);
-      white-space: nowrap;
-      border: 0;
-    }}
-    
-    /* START OF CSS FOR CROP INFO INPUTS */
-    .info-input-group {{
-      display: grid;
-      grid-template-columns: 1fr 1fr;
-      gap: 8px;
-    }}
-
-    .info-input-wrapper {{
-      position: relative;
-    }}
-
-    .info-input-label {{
-      position: absolute;
-      left: 10px;
-      top: 50%;
-      transform: translateY(-50%);
-      font-size: 11px;
-      font-weight: 500;
-      color: var(--text-dim);
-      pointer-events: none;
-    }}
-
-    .info-input {{
-      width: 100%;
-      padding: 8px 10px 8px 30px; /* Make space for label */
-      background: var(--bg-control);
-      border: 1px solid var(--border);
-      border-radius: var(--radius);
-      color: var(--text-main);
-      font-size: 12px;
-      font-family: 'SF Mono', Monaco, 'Cascadia Code', 'Roboto Mono', Consolas, 'Courier New', monospace;
-      text-align: right;
-      -moz-appearance: textfield; /* For Firefox */
-    }}
-
-    .info-input::-webkit-outer-spin-button,
-    .info-input::-webkit-inner-spin-button {{
-      -webkit-appearance: none;
-      margin: 0;
-    }}
-
-    .info-input:focus {{
-      outline: none;
-      border-color: var(--primary);
-      box-shadow: 0 0 0 2px color-mix(in srgb, var(--primary) 20%, transparent);
-    }}
-
-    .info-section-title {{
-      font-size: 12px;
-      font-weight: 600;
-      color: var(--text-muted);
-      margin-top: 15px;
-      margin-bottom: 10px;
-      border-bottom: 1px solid var(--border);
-      padding-bottom: 5px;
-    }}
-    
-    .info-section-title:first-child {{
-        margin-top: 0;
-    }}
-    /* END OF CSS FOR CROP INFO INPUTS */
-
-    /* START: NEW CSS FOR CHECKBOX */
-    .checkbox-group {{
-      display: flex;
-      align-items: center;
-      gap: 10px;
-      margin-top: 15px;
-    }}
-
-    .form-label-checkbox {{
-      font-size: 13px;
-      font-weight: 500;
-      color: var(--text-muted);
-      cursor: pointer;
-      flex: 1;
-    }}
-
-    .form-checkbox {{
-      -webkit-appearance: none;
-      appearance: none;
-      background-color: var(--bg-control);
-      border: 1px solid var(--border);
-      width: 20px;
-      height: 20px;
-      border-radius: 4px;
-      cursor: pointer;
-      position: relative;
-      transition: all 0.2s ease;
-      flex-shrink: 0;
-    }}
-
-    .form-checkbox:checked {{
-      background-color: var(--primary);
-      border-color: var(--primary);
-    }}
-
-    .form-checkbox:checked::before {{
-      content: '✔';
-      color: #000;
-      position: absolute;
-      top: 50%;
-      left: 50%;
-      transform: translate(-50%, -50%);
-      font-size: 14px;
-      font-weight: 900;
-      line-height: 1;
-    }}
-    
-    .light-theme .form-checkbox:checked::before {{
-        color: #fff;
-    }}
-
-    .form-checkbox:focus {{
-      outline: none;
-      box-shadow: 0 0 0 3px color-mix(in srgb, var(--primary) 30%, transparent);
-    }}
-    /* END: NEW CSS FOR CHECKBOX */
-
-  </style>
-</head>
-<body class="dark-theme"> <div class="loading" id="loadingIndicator">
-    <div class="spinner"></div>
-    <div class="loading-text">Loading media...</div>
-  </div>
+class CropHandler(BaseHTTPRequestHandler):
+    # Persistent connections: range requests while scrubbing reuse sockets
+    protocol_version = "HTTP/1.1"
+    # Headers and sendfile bodies go out as separate writes; without
+    # TCP_NODELAY Nagle + delayed ACK stalls each reused connection ~40 ms
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        # A request that stalls half-sent gives its worker back after this long
+        self.timeout = getattr(self.server, 'keepalive_timeout', DEFAULT_KEEPALIVE_TIMEOUT)
+        requests_served = getattr(self.server, 'requests_served', None)
+        # Resumed keep-alive connections carry their count across handlers
+        self.requests_on_connection = requests_served(self.request) if requests_served else 0
+        self._connection_header_sent = False
+        super().setup()
+
+    def handle(self):
+        """
+        Serves requests while the client keeps the connection open. Between
+        requests the connection goes back to the server (park_connection)
+        instead of blocking this worker until the client's next request.
+        """
+        park = getattr(self.server, 'park_connection', None)
+        self.close_connection = True
+        self.handle_one_request()
+        while not self.close_connection:
+            if park is not None and not self._input_pending():
+                park(self.request, self.requests_on_connection)
+                return
+            self.handle_one_request()
 
-  <div class="header-bar">
-    <div class="app-title">MediaCrop - Visual FFmpeg Crop Tool</div>
-    <div class="header-controls">
-      <button id="themeToggle" title="Toggle Dark/Light Theme">☀️</button>
-      <div class="file-info">
-        <div class="file-detail">
-          <span class="file-detail-label">Format:</span>
-          <span class="file-detail-value">{ext.upper().replace('.', '')}</span>
-        </div>
-        <div class="file-detail">
-          <span class="file-detail-label">Type:</span>
-          <span class="file-detail-value">{media_type.title()}</span>
-        </div>
-        <div class="file-detail">
-          <span class="file-detail-label">Size:</span>
-          <span class="file-detail-value" id="fileSizeInfo">Loading...</span>
-        </div>
-      </div>
-    </div>
-  </div>
+    def _input_pending(self):
+        """True when the next (pipelined) request is already buffered or arriving."""
+        self.connection.settimeout(0)
+        try:
+            return bool(self.rfile.peek(1))
+        except OSError:
+            # Let the next read report it
+            return True
+        finally:
+            self.connection.settimeout(self.timeout)
 
-  <div class="main-content">
-    <div class="sidebar">
-      <div class="sidebar-section">
-        <div class="section-title aspect">Aspect Ratio</div>
-        
-        <div class="form-group">
-          <label class="form-label" for="aspect">Preset</label>
-          <select id="aspect" class="form-select">
-            <option value="free">Free Form</option>
-            <option value="1:1">1:1 (Square)</option>
-            <option value="4:3">4:3 (Standard)</option>
-            <option value="16:9">16:9 (Widescreen)</option>
-            <option value="9:16">9:16 (Portrait)</option>
-            <option value="3:2">3:2 (Photo)</option>
-            <option value="5:4">5:4 (Large Format)</option>
-            <option value="21:9">21:9 (Ultrawide)</option>
-            <option value="2.35:1">2.35:1 (Cinemascope)</option>
-            <option value="2.39:1">2.39:1 (Anamorphic)</option>
-            <option value="original">Original</option>
-            <option value="custom">Custom Ratio</option>
-          </select>
-        </div>
-        
-        <div class="custom-ratio" id="customRatio">
-          <input type="text" id="customW" class="form-input" value="16" placeholder="W" inputmode="numeric">
-          <div class="ratio-separator">:</div>
-          <input type="text" id="customH" class="form-input" value="9" placeholder="H" inputmode="numeric">
-        </div>
-
-        <div class="form-group checkbox-group">
-          <input type="checkbox" id="keepAspect" class="form-checkbox" checked>
-          <label for="keepAspect" class="form-label-checkbox">Keep Aspect Ratio</label>
-        </div>
-        </div>
-
-      <div class="sidebar-section">
-        <div class="section-title tools">Quick Tools</div>
-        
-        <div class="form-group">
-          <div class="button-grid">
-            <button class="form-button" onclick="toggleGrid()" title="Toggle Rule-of-Thirds Grid (G)">📐 Grid</button>
-            <button class="form-button" onclick="centerCrop()" title="Center the Crop Box (C)">🎯 Center</button>
-            <button class="form-button" onclick="resetCropSize()" title="Reset Crop Box Size & Position">🔄 Reset</button>
-            <button class="form-button" onclick="toggleHelp()" title="Show Keyboard Shortcuts (?)">❓ Help</button>
-          </div>
-        </div>
-        
-        <div class="form-group">
-          <button id="saveButton" class="form-button" onclick="saveCrop()" style="background: linear-gradient(135deg, #4CAF50, #45a049); font-size: 14px; padding: 12px;">
-            💾 Save Coordinates
-          </button>
-        </div>
-      </div>
-
-      <div class="sidebar-section">
-        <div class="section-title info">Crop Info</div>
+    def handle_one_request(self):
+        self.requests_on_connection += 1
+        self._connection_header_sent = False
+        try:
+            super().handle_one_request()
+        except (ConnectionResetError, BrokenPipeError):
+            # Client went away between or during requests on this connection
+            self.close_connection = True
+
+    def send_header(self, keyword, value):
+        if keyword.lower() == 'connection':
+            self._connection_header_sent = True
+        super().send_header(keyword, value)
+
+    def end_headers(self):
+        if not self._connection_header_sent:
+            max_requests = getattr(self.server, 'max_keepalive_requests', DEFAULT_MAX_KEEPALIVE_REQUESTS)
+            if self.requests_on_connection >= max_requests:
+                self.close_connection = True
+            if self.close_connection:
+                self.send_header("Connection", "close")
+            elif self.request_version == "HTTP/1.0":
+                # 1.0 clients only stay connected when we confirm keep-alive
+                self.send_header("Connection", "keep-alive")
+        super().end_headers()
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def _get_token_from_query(self):
+        query = urlparse(self.path).query
+        return parse_qs(query).get('token', [None])[0]
+
+    def _is_authorized(self):
+        server_token = getattr(self.server, 'auth_token', None)
+        if server_token is None:
+            return True
         
-        <div classs="info-stats">
-          <div class="info-stat">
-            <span class="info-stat-label">Natural Res:</span>
-            <span class="info-stat-value" id="naturalResInfo">N/A</span>
-          </div>
-
-          <div class="info-section-title">Preview Info (Zoomed)</div>
-          
-          <div class="form-group info-input-group">
-            <div class="info-input-wrapper">
-              <span class="info-input-label">X</span>
-              <input type="number" id="previewX" class="info-input" value="0">
-            </div>
-            <div class="info-input-wrapper">
-              <span class="info-input-label">Y</span>
-              <input type="number" id="previewY" class="info-input" value="0">
-            </div>
-          </div>
-          <div class="form-group info-input-group">
-            <div class="info-input-wrapper">
-              <span class="info-input-label">W</span>
-              <input type="number" id="previewW" class="info-input" value="0">
-            </div>
-            <div class="info-input-wrapper">
-              <span class="info-input-label">H</span>
-              <input type="number" id="previewH" class="info-input" value="0">
-            </div>
-          </div>
-
-          <div class="info-section-title">Actual Info (Original)</div>
-
-          <div class="form-group info-input-group">
-            <div class="info-input-wrapper">
-              <span class="info-input-label">X</span>
-              <input type="number" id="actualX" class="info-input" value="0">
-            </div>
-            <div class="info-input-wrapper">
-              <span class="info-input-label">Y</span>
-              <input type="number" id="actualY" class="info-input" value="0">
-            </div>
-          </div>
-          <div class="form-group info-input-group">
-            <div class="info-input-wrapper">
-              <span class="info-input-label">W</span>
-              <input type="number" id="actualW" class="info-input" value="0">
-            </div>
-            <div class="info-input-wrapper">
-              <span class="info-input-label">H</span>
-              <input type="number" id="actualH" class="info-input" value="0">
-            </div>
-          </div>
-
-          <div class="info-section-title">Shared Info</div>
-          <div class="info-stat">
-            <span class="info-stat-label">Ratio:</span>
-            <span class="info-stat-value" id="ratioInfo">1:1</span>
-          </div>
-          <div class="info-stat">
-            <span class="info-stat-label">Zoom:</span>
-            <span class="info-stat-value" id="zoomInfo">100%</span>
-          </div>
-
-        </div>
-      </div>
-      </div>
-
-    <div class="media-viewer">
-      <div id="container">
-        {media_section}
-      </div>
-    </div>
-  </div>
+        client_token = self._get_token_from_query()
+        return client_token == server_token
 
-  <div class="help-modal" id="helpModal">
-    <div class="help-content">
-      <div class="help-title">Keyboard Shortcuts</div>
-      <div class="help-shortcuts">
-        <div class="help-shortcut">
-          <span class="help-shortcut-desc">Move crop box</span>
-          <span class="help-shortcut-key">Arrow Keys</span>
-        </div>
-        <div class="help-shortcut">
-          <span class="help-shortcut-desc">Fine adjustment</span>
-          <span class="help-shortcut-key">Shift + Arrows</span>
-        </div>
-        <div class="help-shortcut">
-          <span class="help-shortcut-desc">Zoom In/Out Media</span>
-          <span class="help-shortcut-key">Mouse Wheel</span>
-        </div>
-        <div class="help-shortcut">
-          <span class="help-shortcut-desc">Center crop box</span>
-          <span class="help-shortcut-key">C</span>
-        </div>
-        <div class="help-shortcut">
-          <span class="help-shortcut-desc">Toggle grid</span>
-          <span class="help-shortcut-key">G</span>
-        </div>
-        <div class="help-shortcut">
-          <span class="help-shortcut-desc">Save coordinates</span>
-          <span class="help-shortcut-key">Enter</span>
-        </div>
-        <div class="help-shortcut">
-          <span class="help-shortcut-desc">Close help</span>
-          <span class="help-shortcut-key">Esc</span>
-        </div>
-      </div>
-      <button class="help-close" onclick="toggleHelp()">Got it!</button>
-    </div>
-  </div>
+    def _is_stopping(self):
+        """True once the server has begun shutting down; streams should stop."""
+        stop_event = getattr(self.server, 'stop_event', None)
+        return stop_event is not None and stop_event.is_set()
 
-  <div class="context-menu" id="contextMenu">
-    <div class="context-item" onclick="centerCrop()">🎯 Center Crop Box</div>
-    <div class="context-item" onclick="toggleGrid()">📐 Toggle Grid</div>
-    <div class="context-item" onclick="resetCropSize()">🔄 Reset Size</div>
-    <div class="context-item" onclick="saveCrop()">💾 Save Coordinates</div>
-  </div>
+    def _send_asset(self, asset, extra_headers):
+        """Sends a precompressed EncodedAsset, choosing the encoding from Accept-Encoding."""
+        encoding, body = asset.negotiate(self.headers.get("Accept-Encoding"))
+        self.send_response(200)
+        self.send_header("Content-type", asset.content_type)
+        if encoding != "identity":
+            self.send_header("Content-Encoding", encoding)
+        self.send_header("Vary", "Accept-Encoding")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in extra_headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _stream_file(self, f, st, offset, length, layout=None):
+        """
+        Streams a byte range of the served representation: the physical
+        file, or a VirtualLayout over it (faststart) whose in-memory
+        segments are written directly. Returns True when fully sent.
+        """
+        if layout is None:
+            return self._stream_physical(f, st, offset, length)
+        for piece in layout.iter_range(offset, length):
+            if self._is_stopping():
+                self.close_connection = True
+                return False
+            if piece[0] == 'bytes':
+                self.wfile.write(piece[1])
+            elif not self._stream_physical(f, st, piece[1], piece[2]):
+                return False
+        return True
+
+    def _stream_physical(self, f, st, offset, length):
+        """
+        Streams a byte range of `f`: hot blocks from the server's block
+        cache (if any), the rest with sendfile. A short write (shutdown
+        mid-stream) leaves the body incomplete, so the connection is
+        closed rather than reused. Returns True when fully sent.
+        """
+        sent = 0
+        block_cache = getattr(self.server, 'block_cache', None)
+        if block_cache is not None:
+            sent = block_cache.send_range(self.wfile, f, st, offset, length, self._is_stopping)
+        if sent < length:
+            sent += send_file_range(self.connection, self.wfile, f, offset + sent, length - sent, self._is_stopping)
+        if sent < length:
+            self.close_connection = True
+            return False
+        return True
+
+    def _send_json(self, data, status=200, extra_headers=None):
+        body = json.dumps(data).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (extra_headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_multipart_ranges(self, f, st, ranges, mime_type, etag, layout=None):
+        """Sends a 206 multipart/byteranges response for several ranges of `f`."""
+        boundary = uuid.uuid4().hex
+        parts, trailer, length = multipart_byteranges(ranges, st.st_size, mime_type, boundary)
+        self.send_response(206)
+        self.send_header('Content-type', f'multipart/byteranges; boundary={boundary}')
+        self.send_header('Accept-Ranges', 'bytes')
+        self.send_header('Content-Length', str(length))
+        self._send_validators(etag, st.st_mtime)
+        self.end_headers()
+        for head, start, end in parts:
+            if self._is_stopping():
+                self.close_connection = True
+                return
+            self.wfile.write(head)
+            if not self._stream_file(f, st, start, end - start + 1, layout):
+                return
+        self.wfile.write(trailer)
 
-  <div id="floatingPreview" class="floating-preview">
-    <div class="preview-header">
-      <span class="preview-title">Live Preview</span>
-      <span class="preview-size" id="previewSizeInfo"></span>
-    </div>
-    <div class="preview-canvas-wrapper">
-        <canvas id="previewCanvas"></canvas>
-    </div>
-    <div class="preview-resize-handle p-nw"></div><div class="preview-resize-handle p-ne"></div>
-    <div class="preview-resize-handle p-sw"></div><div class="preview-resize-handle p-se"></div>
-    <div class="preview-resize-handle p-n"></div><div class="preview-resize-handle p-s"></div>
-    <div class="preview-resize-handle p-w"></div><div class="preview-resize-handle p-e"></div>
-    <button class="preview-close-btn" id="previewCloseBtn" title="Close Fullscreen">&times;</button>
-  </div>
+    def _send_file_object(self, f, st, mime_type, etag, layout=None):
+        """
+        Answers a GET for a complete file (or its VirtualLayout): conditional
+        requests, then a 200, single-range 206 or multipart 206.
+        """
+        file_size = st.st_size
+        if self._handle_preconditions(etag, st.st_mtime):
+            return
 
-  {rotation_script}
-  <script src="/main.js"></script>
-</body>
-</html>"""
-            
+        ranges = None
+        range_header = self.headers.get('Range')
+        if range_header and if_range_allows(self.headers, etag, st.st_mtime):
+            try:
+                ranges = parse_range_header(range_header, file_size)
+            except RangeNotSatisfiable:
+                self.send_response(416)
+                self.send_header('Content-Range', f'bytes */{file_size}')
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            except ValueError:
+                self.send_error(400, "Invalid Range header format")
+                return
+
+        if ranges is None:
             self.send_response(200)
-            self.send_header("Content-type", "text/html; charset=utf-8")
-            self.send_header("Cache-Control", "no-cache, no-store, must-revalidate")
-            self.send_header("Pragma", "no-cache")
-            self.send_header("Expires", "0")
+            self.send_header("Content-type", mime_type)
+            self.send_header("Content-Length", str(file_size))
+            self.send_header("Accept-Ranges", "bytes")
+            self._send_validators(etag, st.st_mtime)
             self.end_headers()
-            self.wfile.write(html.encode("utf-8"))
+            self._stream_file(f, st, 0, file_size, layout)
+        elif len(ranges) == 1:
+            start, end = ranges[0]
+            length = end - start + 1
+            self.send_response(206)
+            self.send_header('Content-type', mime_type)
+            self.send_header('Accept-Ranges', 'bytes')
+            self.send_header('Content-Range', f'bytes {start}-{end}/{file_size}')
+            self.send_header('Content-Length', str(length))
+            self._send_validators(etag, st.st_mtime)
+            self.end_headers()
+            self._stream_file(f, st, start, length, layout)
+        else:
+            self._send_multipart_ranges(f, st, ranges, mime_type, etag, layout)
 
-        elif path == "/main.js":
-            js_content = get_javascript_code(media_type, ext)
+    def _serve_spool(self, spool):
+        """
+        Serves a fragmented-MP4 spool (/remux, /proxy). Once ffmpeg has
+        finished the spool is an ordinary file (ETag, ranges); while it is
+        still growing, see _send_spool_range and _stream_spool.
+        """
+        requested = parse_open_range(self.headers.get('Range'))
+        if requested is not None and requested[0] > 0:
+            spool.wait_for(requested[0], SPOOL_WAIT_SECONDS)
+
+        if spool.failed:
+            self.send_error(502, f"Transcode failed: {spool.error}")
+            return
+        if spool.done:
+            f, st = spool.handle.snapshot()
+            self._send_file_object(f, st, "video/mp4", make_etag(st))
+            return
+
+        with open(spool.path, 'rb', buffering=0) as f:
+            if requested is None or requested[0] == 0:
+                self._stream_spool(spool, f)
+            else:
+                self._send_spool_range(spool, f, *requested)
+
+    def _send_spool_range(self, spool, f, start, end):
+        """
+        Answers a seek into a growing spool with the bytes produced so far
+        (total length '*'); the client asks again from where it ends.
+        """
+        produced = spool.produced
+        if start >= produced:
+            self._send_retry_later()
+            return
+        end = produced - 1 if end is None else min(end, produced - 1)
+        length = end - start + 1
+        self.send_response(206)
+        self.send_header("Content-type", "video/mp4")
+        self.send_header("Accept-Ranges", "bytes")
+        self.send_header("Content-Range", f"bytes {start}-{end}/*")
+        self.send_header("Content-Length", str(length))
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        if send_file_range(self.connection, self.wfile, f, start, length, self._is_stopping) < length:
+            self.close_connection = True
+
+    def _stream_spool(self, spool, f):
+        """
+        Sends the whole remux from the start, following ffmpeg's output as
+        it is spooled (chunked; HTTP/1.0 clients get a close-delimited body).
+        """
+        chunked = self.request_version != "HTTP/1.0"
+        self.send_response(200)
+        self.send_header("Content-type", "video/mp4")
+        self.send_header("Accept-Ranges", "bytes")
+        self.send_header("Cache-Control", "no-cache")
+        if chunked:
+            self.send_header("Transfer-Encoding", "chunked")
+        else:
+            self.close_connection = True
+        self.end_headers()
+
+        buf = bytearray(SPOOL_CHUNK)
+        view = memoryview(buf)
+        position = 0
+        while not self._is_stopping():
+            produced = spool.wait_for(position, 1.0)
+            if produced <= position:
+                if spool.done:
+                    break
+                continue
+            n = pread_into(f, view[:min(len(buf), produced - position)], position)
+            if not n:
+                break
+            if chunked:
+                self.wfile.write(b"%x\r\n" % n)
+                self.wfile.write(view[:n])
+                self.wfile.write(b"\r\n")
+            else:
+                self.wfile.write(view[:n])
+            position += n
+
+        if spool.failed or not spool.done or position < spool.produced:
+            # Incomplete body: don't terminate it as if it were whole
+            self.close_connection = True
+        elif chunked:
+            self.wfile.write(b"0\r\n\r\n")
+
+    def _send_retry_later(self):
+        """503 with Retry-After for output a background job hasn't produced yet."""
+        self.send_response(503)
+        self.send_header("Retry-After", "1")
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def _send_tile(self, path):
+        """Serves /tiles/overview or /tiles/{level}/{x}_{y} from the tile pyramid."""
+        pyramid = get_tile_pyramid(self.server)
+        name = path[len("/tiles/"):]
+        if name == "overview":
+            if not pyramid.wait_overview(PREVIEW_WAIT_SECONDS):
+                self._send_retry_later()
+                return
+            tile_path = pyramid.overview_path()
+        else:
+            try:
+                level, position = name.split("/")
+                x, y = position.split("_")
+                tile_path = pyramid.tile_path(int(level), int(x), int(y))
+            except ValueError:
+                self.send_error(404, "Not Found")
+                return
+        if pyramid.failed:
+            self.send_error(502, f"Tile generation failed: {pyramid.error}")
+            return
+        if tile_path is None or not os.path.exists(tile_path):
+            if pyramid.done:
+                self.send_error(404, "Not Found")
+            else:
+                self._send_retry_later()
+            return
+        with open(tile_path, 'rb', buffering=0) as f:
+            st = os.fstat(f.fileno())
+            self._send_file_object(f, st, "image/jpeg", make_etag(st))
+
+    def _send_thumbnail_asset(self, path):
+        """Serves /thumbnails/index.json, index.vtt or sheet-N.jpg once generated."""
+        sheets = get_thumbnail_sheets(self.server)
+        if sheets.failed:
+            self.send_error(502, f"Thumbnail generation failed: {sheets.error}")
+            return
+        if not sheets.done:
+            self._send_retry_later()
+            return
+        name = path[len("/thumbnails/"):]
+        asset_path = sheets.asset_path(name)
+        if asset_path is None:
+            self.send_error(404, "Not Found")
+            return
+        mime_type = {".json": "application/json", ".vtt": "text/vtt"}.get(os.path.splitext(name)[1], "image/jpeg")
+        with open(asset_path, 'rb', buffering=0) as f:
+            st = os.fstat(f.fileno())
+            self._send_file_object(f, st, mime_type, make_etag(st))
+
+    def _send_frame_index(self):
+        """
+        /index: a summary of the frame index, or with ?t=seconds the frame
+        shown at that time with its neighbours and surrounding keyframes.
+        """
+        index = get_frame_index(self.server)
+        if index.failed:
+            self.send_error(502, f"Frame indexing failed: {index.error}")
+            return
+        if not index.done:
+            self._send_retry_later()
+            return
+        query = parse_qs(urlparse(self.path).query)
+        if 't' not in query:
+            self._send_json(index.summary(), extra_headers={"Cache-Control": "no-cache"})
+            return
+        try:
+            time_value = float(query['t'][0])
+        except ValueError:
+            self.send_error(400, "Invalid 't' parameter")
+            return
+        self._send_json(index.lookup(time_value), extra_headers={"Cache-Control": "no-cache"})
+
+    def _send_scenes(self):
+        """/scenes: every scene with its start, end, cut score and black-bar crop."""
+        index = get_scene_index(self.server)
+        if index.failed:
+            self.send_error(502, f"Scene detection failed: {index.error}")
+            return
+        if not index.done:
+            self._send_retry_later()
+            return
+        self._send_json(index.summary(), extra_headers={"Cache-Control": "no-cache"})
+
+    def _send_frame(self):
+        """
+        /frame?t=seconds[&w=width][&crop=x:y:w:h][&format=jpeg|png|webp]:
+        the frame shown at t, decoded server-side from the original file.
+        """
+        query = parse_qs(urlparse(self.path).query)
+        try:
+            time_value = float(query.get('t', ['0'])[0])
+            width = int(query['w'][0]) if 'w' in query else None
+            crop = parse_crop(query['crop'][0]) if 'crop' in query else None
+        except ValueError as e:
+            self.send_error(400, f"Invalid frame parameters: {e}")
+            return
+        image_format = query.get('format', ['jpeg'])[0]
+        if image_format not in FRAME_FORMATS:
+            self.send_error(400, f"Invalid 'format' parameter: {image_format}")
+            return
+        if not math.isfinite(time_value) or time_value < 0 or (width is not None and width <= 0):
+            self.send_error(400, "Invalid 't' or 'w' parameter")
+            return
+
+        file_path = self.server.media_file
+        version = file_version(os.stat(file_path))
+        source_width = crop[2] if crop else display_size(get_media_probe(self.server, file_path))[0]
+        if width is None and source_width > MAX_FRAME_WIDTH:
+            width = MAX_FRAME_WIDTH
+        if width is not None and source_width and width >= source_width:
+            # Never upscale; full size needs no scale filter
+            width = None
+
+        # Times within one frame share a cache entry once the frame index is ready
+        index = get_frame_index(self.server)
+        if index.done and not index.failed:
+            frame = index.lookup(time_value)
+            if frame is not None:
+                time_value = frame["time"]
+
+        key = (version, round(time_value, 6), width, crop, image_format)
+        try:
+            data = get_frame_cache(self.server).get(
+                key, lambda: frame_command(file_path, time_value, width, crop, image_format)
+            )
+        except RuntimeError as e:
+            self.send_error(502, f"Frame decode failed: {e}")
+            return
+        self.send_response(200)
+        self.send_header("Content-type", FRAME_FORMATS[image_format][0])
+        self.send_header("Content-Length", str(len(data)))
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_decoded_frame(self):
+        """
+        /decoded?t=seconds[&step=n]: the frame at t (or n frames from it)
+        as raw RGBA from the decoder session's ring buffer, with its size,
+        number and timestamp in X-Frame-* headers.
+        """
+        query = parse_qs(urlparse(self.path).query)
+        try:
+            time_value = float(query.get('t', ['0'])[0])
+            step = int(query.get('step', ['0'])[0])
+        except ValueError:
+            self.send_error(400, "Invalid 't' or 'step' parameter")
+            return
+        index = get_frame_index(self.server)
+        if index.failed:
+            self.send_error(502, f"Frame indexing failed: {index.error}")
+            return
+        if not index.done:
+            self._send_retry_later()
+            return
+        found = index.lookup(time_value)
+        if found is None:
+            self.send_error(404, "No video frames")
+            return
+        frame = max(0, min(found["frame"] + step, len(index.times) - 1))
+
+        session = get_decoder_session(self.server, index)
+        try:
+            pixels = session.get_frame(frame)
+        except LookupError:
+            self.send_error(404, "Frame not available")
+            return
+        except TimeoutError:
+            self._send_retry_later()
+            return
+        except RuntimeError as e:
+            self.send_error(502, f"Frame decode failed: {e}")
+            return
+        try:
             self.send_response(200)
-            self.send_header("Content-type", "application/javascript; charset=utf-8")
-            self.send_header("Cache-Control", "no-cache, no-store, must-revalidate")
+            self.send_header("Content-type", "application/octet-stream")
+            self.send_header("Content-Length", str(len(pixels)))
+            self.send_header("Cache-Control", "no-store")
+            self.send_header("X-Frame-Width", str(session.width))
+            self.send_header("X-Frame-Height", str(session.height))
+            self.send_header("X-Frame-Number", str(frame))
+            self.send_header("X-Frame-Time", repr(index.times[frame]))
             self.end_headers()
-            self.wfile.write(js_content.encode("utf-8"))
+            self.wfile.write(pixels)
+        finally:
+            session.release(frame)
 
-        elif path == "/file":
-            if not self._is_authorized():
-                self.send_error(403, "Forbidden: Invalid or missing token")
+    def _stream_autocrop_events(self):
+        """
+        /autocrop/events: starts black-bar detection if needed and streams
+        its progress as server-sent events ('progress' per finished
+        window, then 'result' or 'failed'), with a comment as keep-alive.
+        """
+        job = get_autocrop_job(self.server)
+        self.send_response(200)
+        self.send_header("Content-type", "text/event-stream")
+        self.send_header("Cache-Control", "no-store")
+        # The stream has no length; it ends when the connection closes
+        self.close_connection = True
+        self.end_headers()
+
+        sequence = None
+        while not self._is_stopping():
+            current = job.wait_for_update(sequence, 15.0)
+            snapshot = job.snapshot()
+            if snapshot["state"] == "failed":
+                self.wfile.write(b"event: failed\ndata: " + json.dumps({"error": snapshot["error"]}).encode("utf-8") + b"\n\n")
                 return
-            try:
-                if not os.path.exists(self.server.media_file) or not os.access(self.server.media_file, os.R_OK):
-                    self.send_error(404, f"File not found or not readable: {self.server.media_file}")
-                    return
+            if snapshot["state"] == "done":
+                self.wfile.write(b"event: result\ndata: " + json.dumps(snapshot["result"]).encode("utf-8") + b"\n\n")
+                return
+            if current == sequence:
+                self.wfile.write(b": keep-alive\n\n")
+            else:
+                progress = {"done": snapshot["done"], "windows": snapshot["windows"]}
+                self.wfile.write(b"event: progress\ndata: " + json.dumps(progress).encode("utf-8") + b"\n\n")
+            sequence = current
 
-                file_size = os.path.getsize(self.server.media_file)
-                mime_type = mimetypes.guess_type(self.server.media_file)[0] or 'application/octet-stream'
+    def _send_validators(self, etag, mtime):
+        self.send_header("ETag", etag)
+        self.send_header("Last-Modified", self.date_time_string(mtime))
+        self.send_header("Cache-Control", "no-cache")
+
+    def _handle_preconditions(self, etag, mtime):
+        """
+        Answers conditional requests. Sends a 304/412 and returns True when
+        the request is fully handled, False when the body should be sent.
+        """
+        status = evaluate_preconditions(self.headers, etag, mtime)
+        if status is None:
+            return False
+        self.send_response(status)
+        self._send_validators(etag, mtime)
+        if status == 412:
+            self.send_header("Content-Length", "0")
+        self.end_headers()
+        return True
+
+    def _serve_authorized(self, send, not_found=None, error=None):
+        """
+        Runs send() for a token-protected GET endpoint: 403 without a valid
+        token, 404 (with `not_found` or the media file's path) when a file is
+        missing and a quiet close when the client goes away mid-response.
+        With `error`, any other failure is answered 500 with that prefix.
+        """
+        if not self._is_authorized():
+            self.send_error(403, "Forbidden: Invalid or missing token")
+            return
+        try:
+            send()
+        except FileNotFoundError:
+            self.send_error(404, not_found or f"File not found: {self.server.media_file}")
+        except PermissionError:
+            self.send_error(403, f"Permission denied: {self.server.media_file}")
+        except (BrokenPipeError, ConnectionResetError, socket.timeout):
+            self.close_connection = True
+            if self.server.verbose: self.log_message("Client disconnected (Broken Pipe).")
+        except Exception as e:
+            if error is None:
+                raise
+            self.send_error(500, f"{error}: {str(e)}")
+
+    def _send_page(self):
+        assets = get_page_assets(self.server)
+        self._send_asset(assets.html, {
+            "Cache-Control": "no-cache, no-store, must-revalidate",
+            "Pragma": "no-cache",
+            "Expires": "0",
+        })
+
+    def _send_media_file(self):
+        f, st = get_media_handle(self.server).snapshot()
+        layout = get_media_layout(self.server, f, st)
+        mime_type = mimetypes.guess_type(self.server.media_file)[0] or 'application/octet-stream'
+        self._send_file_object(f, st, mime_type, make_etag(st, layout is not None), layout)
+
+    def _send_preview(self):
+        preview = get_image_preview(self.server)
+        if not preview.wait(PREVIEW_WAIT_SECONDS):
+            self._send_retry_later()
+            return
+        if preview.failed:
+            self.send_error(502, f"Preview conversion failed: {preview.error}")
+            return
+        f, st = preview.handle.snapshot()
+        self._send_file_object(f, st, preview.content_type, make_etag(st))
+
+    def do_GET(self):
+        path = urlparse(self.path).path
+
+        if path == "/":
+            self._serve_authorized(self._send_page)
+
+        elif path == "/main.js":
+            assets = get_page_assets(self.server)
+            self._send_asset(assets.js, {
+                "Cache-Control": "no-cache, no-store, must-revalidate",
+            })
+
+        elif path.startswith("/static/"):
+            asset = get_page_assets(self.server).static.get(path)
+            if asset is None:
+                self.send_error(404, "Not Found")
+                return
+            self._send_asset(asset, {
+                "Cache-Control": "public, max-age=31536000, immutable",
+            })
+
+        elif path == "/file":
+            self._serve_authorized(self._send_media_file, error="File error")
+
+        elif path == "/preview":
+            self._serve_authorized(self._send_preview)
+
+        elif path.startswith("/tiles/"):
+            self._serve_authorized(lambda: self._send_tile(path), not_found="Not Found")
+
+        elif path.startswith("/thumbnails/"):
+            self._serve_authorized(lambda: self._send_thumbnail_asset(path), not_found="Not Found")
+
+        elif path == "/index":
+            self._serve_authorized(self._send_frame_index)
+
+        elif path == "/scenes":
+            self._serve_authorized(self._send_scenes)
+
+        elif path == "/frame":
+            self._serve_authorized(self._send_frame)
+
+        elif path == "/decoded":
+            self._serve_authorized(self._send_decoded_frame)
+
+        elif path == "/autocrop/events":
+            self._serve_authorized(self._stream_autocrop_events)
+
+        elif path == "/jobs":
+            self._serve_authorized(
+                lambda: self._send_json(get_job_status(self.server), extra_headers={"Cache-Control": "no-store"})
+            )
+
+        elif path == "/remux":
+            self._serve_authorized(lambda: self._serve_spool(get_remux_spool(self.server)))
+
+        elif path == "/proxy":
+            self._serve_authorized(lambda: self._serve_spool(get_proxy_spool(self.server)))
 
-                range_header = self.headers.get('Range')
-                if range_header:
-                    try:
-                        range_header = range_header.strip().lower().replace('bytes=', '')
-                        
-                        if ',' in range_header:
-                             self.send_error(416)
-                             return
-                             
-                        start_str, end_str = range_header.split('-')
-                        start = int(start_str) if start_str else 0
-                        end = int(end_str) if end_str else file_size - 1
-                        
-                        if start < 0 or end < start or end >= file_size:
-                            self.send_response(416)
-                            self.send_header('Content-Range', f'bytes */{file_size}')
-                            self.end_headers()
-                            return
-                        
-                        length = end - start + 1
-                        self.send_response(206)
-                        self.send_header('Content-type', mime_type)
-                        self.send_header('Accept-Ranges', 'bytes')
-                        self.send_header('Content-Range', f'bytes {start}-{end}/{file_size}')
-                        self.send_header('Content-Length', str(length))
-                        self.send_header("Last-Modified", self.date_time_string(os.path.getmtime(self.server.media_file)))
-                        self.end_headers()
-
-                        with open(self.server.media_file, 'rb') as f:
-                            f.seek(start)
-                            remaining = length
-                            chunk_size = 65536
-                            while remaining > 0:
-                                chunk = f.read(min(remaining, chunk_size))
-                                if not chunk: break
-                                self.wfile.write(chunk)
-                                remaining -= len(chunk)
-                    except ValueError:
-                        self.send_error(400, "Invalid Range header format")
-                else:
-                    self.send_response(200)
-                    self.send_header("Content-type", mime_type)
-                    self.send_header("Content-Length", str(file_size))
-                    self.send_header("Accept-Ranges", "bytes")
-                    self.send_header("Last-Modified", self.date_time_string(os.path.getmtime(self.server.media_file)))
-                    self.end_headers()
-                    
-                    with open(self.server.media_file, 'rb') as f:
-                        chunk_size = 1024 * 1024
-                        while True:
-                            chunk = f.read(chunk_size)
-                            if not chunk: break
-                            self.wfile.write(chunk)
-                            
-            except FileNotFoundError:
-                self.send_error(404, f"File not found: {self.server.media_file}")
-            except PermissionError:
-                self.send_error(403, f"Permission denied: {self.server.media_file}")
-            except BrokenPipeError:
-                if self.server.verbose: self.log_message("Client disconnected (Broken Pipe).")
-            except Exception as e:
-                self.send_error(500, f"File error: {str(e)}")
-                
         else:
             self.send_error(404, "Not Found")
 
@@ -1714,38 +1082,76 @@ class CropHandler(BaseHTTPRequestHandler):
                 self.send_error(403, "Forbidden: Invalid or missing token")
                 return
             try:
-                if not os.path.exists(self.server.media_file) or not os.access(self.server.media_file, os.R_OK):
-                    self.send_error(404, "File not found or not readable")
-                    return
-                
-                file_size = os.path.getsize(self.server.media_file)
+                f, st = get_media_handle(self.server).snapshot()
+                etag = make_etag(st, get_media_layout(self.server, f, st) is not None)
                 mime_type = mimetypes.guess_type(self.server.media_file)[0] or 'application/octet-stream'
+
+                if self._handle_preconditions(etag, st.st_mtime):
+                    return
                 
                 self.send_response(200)
-                self.send_header("Content-Length", str(file_size))
+                self.send_header("Content-Length", str(st.st_size))
                 self.send_header("Content-Type", mime_type)
                 self.send_header("Accept-Ranges", "bytes")
-                self.send_header("Last-Modified", self.date_time_string(os.path.getmtime(self.server.media_file)))
+                self._send_validators(etag, st.st_mtime)
                 self.end_headers()
+            except FileNotFoundError:
+                self.send_error(404, "File not found or not readable")
+            except PermissionError:
+                self.send_error(403, "Permission denied")
             except Exception as e:
                 self.send_error(500, f"Error getting file info: {str(e)}")
         else:
-            self.send_error(44, "Not Found")
+            self.send_error(404, "Not Found")
             
+    def _read_json_body(self, limit):
+        """The request's JSON body; sends 413 and returns None when it is larger than `limit`."""
+        length = int(self.headers.get("Content-Length", 0))
+        if length > limit:
+            self.send_error(413, "Payload too large")
+            return None
+        return json.loads(self.rfile.read(length).decode("utf-8"))
+
+    def _send_crop_path(self):
+        """
+        POST /croppath {keyframes: [{t, x, y, w, h}], interpolation}: the
+        interpolated path as per-segment polynomials for the player.
+        """
+        data = self._read_json_body(MAX_SAVE_BODY_BYTES)
+        if data is None:
+            return
+        if not isinstance(data, dict):
+            self.send_error(400, "Invalid JSON data in request body")
+            return
+        probe = get_media_probe(self.server, self.server.media_file)
+        try:
+            crop_path = CropPath(data.get('keyframes'), data.get('interpolation', 'smooth'), display_size(probe))
+        except ValueError as e:
+            self.send_error(400, f"Invalid crop path: {e}")
+            return
+        self._send_json(crop_path.summary(), extra_headers={"Cache-Control": "no-cache"})
+
     def do_POST(self):
         path = urlparse(self.path).path
-        if path == "/save":
+        if path == "/croppath":
             if not self._is_authorized():
                 self.send_error(403, "Forbidden: Invalid or missing token")
                 return
             try:
-                length = int(self.headers.get("Content-Length", 0))
-                if length > 10000:
-                    self.send_error(413, "Payload too large")
+                self._send_crop_path()
+            except json.JSONDecodeError:
+                self.send_error(400, "Invalid JSON data in request body")
+            except FileNotFoundError:
+                self.send_error(404, f"File not found: {self.server.media_file}")
+        elif path == "/save":
+            if not self._is_authorized():
+                self.send_error(403, "Forbidden: Invalid or missing token")
+                return
+            try:
+                # Crop path keyframes make this larger than a single rectangle
+                data = self._read_json_body(MAX_SAVE_BODY_BYTES)
+                if data is None:
                     return
-                    
-                body = self.rfile.read(length)
-                data = json.loads(body.decode("utf-8"))
                 
                 required_fields = ['w', 'h', 'x', 'y', 'mediaType']
                 for field in required_fields:
@@ -1762,6 +1168,16 @@ class CropHandler(BaseHTTPRequestHandler):
                 y = int(data['y'])
                 media_type = data['mediaType']
                 crop_filter = f"crop={w}:{h}:{x}:{y}"
+                crop_path = None
+                if media_type == 'video' and data.get('keyframes'):
+                    probe = get_media_probe(self.server, self.server.media_file)
+                    try:
+                        crop_path = CropPath(data['keyframes'], data.get('interpolation', 'smooth'), display_size(probe))
+                    except ValueError as e:
+                        self.send_error(400, f"Invalid crop path: {e}")
+                        return
+                    # The moving window's size is the keyframes', not the box on screen
+                    w, h = crop_path.width, crop_path.height
                 
                 input_file_path = self.server.media_file
                 path_part, ext_part = os.path.splitext(input_file_path)
@@ -1775,6 +1191,13 @@ class CropHandler(BaseHTTPRequestHandler):
                     i += 1
                 
                 ffmpeg_command = ""
+                script_file = None
+                if crop_path is not None:
+                    # sendcmd moves the crop along the path; ffmpeg evaluates it per frame
+                    script_file = os.path.splitext(output_file_name)[0] + ".cmd"
+                    with open(script_file, "w", encoding="utf-8") as f:
+                        f.write(crop_path.sendcmd_script())
+                    crop_filter = crop_path.crop_filter(script_file)
                 
                 if media_type == 'video':
                     ffmpeg_command = f'ffmpeg -i "{input_file_path}" -vf "{crop_filter}" -c:v libx264 -preset ultrafast -crf 18 -c:a copy "{output_file_name}"'
@@ -1806,20 +1229,18 @@ class CropHandler(BaseHTTPRequestHandler):
                 print(f"\n# {crop_filter}")
                 print(f"{ffmpeg_command}")
                 
-                self.send_response(200)
-                self.send_header("Content-type", "application/json")
-                self.send_header("Cache-Control", "no-cache")
-                self.send_header("Access-Control-Allow-Origin", "*")
-                self.end_headers()
-                
-                self.wfile.write(json.dumps({
+                self._send_json({
                     "success": True,
                     "message": "Crop filter and suggested command printed to terminal.",
                     "crop_filter": crop_filter,
                     "suggested_command": ffmpeg_command,
                     "output_file": output_file_name,
+                    "script_file": script_file,
                     "timestamp": self.date_time_string()
-                }).encode("utf-8"))
+                }, extra_headers={
+                    "Cache-Control": "no-cache",
+                    "Access-Control-Allow-Origin": "*",
+                })
                 
             except json.JSONDecodeError:
                 self.send_error(400, "Invalid JSON data in request body")
@@ -1838,4 +1259,5 @@ class CropHandler(BaseHTTPRequestHandler):
         self.send_header("Access-Control-Allow-Methods", "GET, POST, HEAD, OPTIONS")
         self.send_header("Access-Control-Allow-Headers", "Content-Type, Range")
         self.send_header("Access-Control-Max-Age", "86400")
+        self.send_header("Content-Length", "0")
         self.end_headers()
\ No newline at end of file
@@ -0,0 +1,1304 @@
+# http_handler_css.py
+
+def get_css_code():
+    """Returns the complete stylesheet as a string."""
+
+    css_code = """
+    * { 
+      box-sizing: border-box; 
+      margin: 0; 
+      padding: 0;
+    }
+    
+    :root {
+      --primary: #00ff41;
+      --primary-hover: #00cc33;
+      --primary-dark: #00aa2a;
+      --bg-main: #0f0f0f;
+      --bg-panel: #1a1a1a;
+      --bg-control: #252525;
+      --border: #333;
+      --border-light: #444;
+      --text-main: #ffffff;
+      --text-muted: #aaa;
+      --text-dim: #666;
+      --shadow: 0 4px 20px rgba(0, 0, 0, 0.4);
+      --shadow-heavy: 0 8px 32px rgba(0, 0, 0, 0.6);
+      --radius: 8px;
+      --radius-large: 12px;
+      --primary-rgb: 0, 255, 65;
+    }
+    
+    .light-theme {
+        --primary: #008000;
+        --primary-hover: #006400;
+        --primary-dark: #004d00;
+        --bg-main: #f0f0f0;
+        --bg-panel: #ffffff;
+        --bg-control: #e0e0e0;
+        --border: #ccc;
+        --border-light: #ddd;
+        --text-main: #1a1a1a;
+        --text-muted: #555;
+        --text-dim: #888;
+        --shadow: 0 4px 20px rgba(0, 0, 0, 0.1);
+        --shadow-heavy: 0 8px 32px rgba(0, 0, 0, 0.15);
+        --primary-rgb: 0, 128, 0;
+    }
+    
+    body {
+      font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, 'Helvetica Neue', Arial, sans-serif;
+      background: var(--bg-main);
+      color: var(--text-main);
+      user-select: none;
+      min-height: 100vh;
+      display: flex;
+      flex-direction: column;
+      transition: background-color 0.3s, color 0.3s;
+    }
+
+    .header-bar {
+      background: var(--bg-panel);
+      border-bottom: 1px solid var(--border);
+      padding: 12px 20px;
+      display: flex;
+      align-items: center;
+      justify-content: space-between;
+      flex-shrink: 0;
+      height: 60px;
+    }
+    
+    .header-controls {
+        display: flex;
+        align-items: center;
+        gap: 20px;
+    }
+
+    #themeToggle {
+        background: var(--bg-control);
+        border: 1px solid var(--border);
+        color: var(--text-main);
+        font-size: 20px;
+        line-height: 1;
+        width: 40px;
+        height: 40px;
+        border-radius: 50%;
+        cursor: pointer;
+        display: flex;
+        align-items: center;
+        justify-content: center;
+        transition: all 0.2s ease;
+    }
+    
+    #themeToggle:hover {
+        background: var(--border);
+        box-shadow: 0 0 10px rgba(var(--primary-rgb), 0.3);
+    }
+
+    .app-title {
+      font-size: 18px;
+      font-weight: 600;
+      color: var(--primary);
+      display: flex;
+      align-items: center;
+      gap: 8px;
+    }
+
+    .app-title::before {
+      content: '✂️';
+      font-size: 20px;
+    }
+
+    .file-info {
+      display: flex;
+      align-items: center;
+      gap: 15px;
+      font-size: 13px;
+      color: var(--text-muted);
+    }
+
+    .file-detail {
+      display: flex;
+      align-items: center;
+      gap: 5px;
+    }
+
+    .file-detail-label {
+      color: var(--text-dim);
+    }
+
+    .file-detail-value {
+      color: var(--text-main);
+      font-weight: 500;
+    }
+
+    .main-content {
+      display: flex;
+      flex: 1;
+      min-height: 0;
+    }
+
+    .sidebar {
+      width: 280px;
+      background: var(--bg-panel);
+      border-right: 1px solid var(--border);
+      display: flex;
+      flex-direction: column;
+      flex-shrink: 0;
+    }
+
+    .sidebar-section {
+      border-bottom: 1px solid var(--border);
+      padding: 20px;
+    }
+
+    .sidebar-section:last-child {
+      border-bottom: none;
+      flex: 1;
+    }
+
+    .section-title {
+      font-size: 14px;
+      font-weight: 600;
+      color: var(--text-main);
+      margin-bottom: 15px;
+      display: flex;
+      align-items: center;
+      gap: 8px;
+    }
+
+    .section-title::before {
+      font-size: 16px;
+    }
+
+    .section-title.aspect::before { content: '📐'; }
+    .section-title.tools::before { content: '🔧'; }
+    .section-title.info::before { content: '📊'; }
+
+    .form-group {
+      margin-bottom: 15px;
+    }
+
+    .form-group:last-child {
+      margin-bottom: 0;
+    }
+
+    .form-label {
+      display: block;
+      font-size: 13px;
+      font-weight: 500;
+      color: var(--text-muted);
+      margin-bottom: 6px;
+    }
+
+    .form-select, .form-input, .form-button {
+      width: 100%;
+      padding: 10px 12px;
+      background: var(--bg-control);
+      border: 1px solid var(--border);
+      border-radius: var(--radius);
+      color: var(--text-main);
+      font-size: 13px;
+      transition: all 0.2s ease;
+    }
+
+    .form-select:focus, .form-input:focus {
+      outline: none;
+      border-color: var(--primary);
+      box-shadow: 0 0 0 3px color-mix(in srgb, var(--primary) 30%, transparent);
+    }
+
+    .form-input {
+      text-align: center;
+      font-family: 'SF Mono', Monaco, 'Cascadia Code', 'Roboto Mono', Consolas, 'Courier New', monospace;
+    }
+
+    .custom-ratio {
+      display: none;
+      grid-template-columns: 1fr auto 1fr;
+      gap: 8px;
+      align-items: center;
+      margin-top: 8px;
+    }
+
+    .custom-ratio.visible {
+      display: grid;
+    }
+
+    .ratio-separator {
+      color: var(--text-muted);
+      font-weight: 500;
+    }
+
+    .form-button {
+      background: linear-gradient(135deg, var(--primary), var(--primary-dark));
+      color: #000;
+      font-weight: 600;
+      cursor: pointer;
+      border: none;
+      transition: all 0.2s ease;
+    }
+
+    .form-button:hover {
+      background: linear-gradient(135deg, var(--primary-hover), var(--primary));
+      transform: translateY(-1px);
+      box-shadow: 0 4px 12px color-mix(in srgb, var(--primary) 50%, transparent);
+    }
+
+    .form-button:active {
+      transform: translateY(0);
+    }
+    
+    .form-button:disabled {
+      opacity: 0.5;
+      cursor: default;
+      transform: none;
+      box-shadow: none;
+    }
+
+    #sceneCropButton {
+      margin-top: 6px;
+    }
+
+    .light-theme .form-button {
+        color: #ffffff;
+    }
+    
+    .light-theme .form-button:hover {
+        color: #ffffff;
+    }
+    
+    #saveButton {
+      background: linear-gradient(135deg, #4CAF50, #45a049) !important;
+      color: #ffffff !important;
+    }
+
+    .button-grid {
+      display: grid;
+      grid-template-columns: 1fr 1fr;
+      gap: 8px;
+    }
+
+    .button-grid .form-button {
+      font-size: 12px;
+      padding: 8px 10px;
+    }
+
+    .auto-crop-status {
+      margin-top: 6px;
+      font-size: 12px;
+      color: var(--text-muted);
+      line-height: 1.4;
+    }
+
+    .info-stats {
+      display: flex;
+      flex-direction: column;
+      gap: 10px;
+    }
+
+    .info-stat {
+      display: flex;
+      justify-content: space-between;
+      align-items: center;
+      font-size: 13px;
+    }
+
+    .info-stat-label {
+      color: var(--text-muted);
+    }
+
+    .info-stat-value {
+      color: var(--primary);
+      font-weight: 600;
+      font-family: 'SF Mono', Monaco, 'Cascadia Code', 'Roboto Mono', Consolas, 'Courier New', monospace;
+    }
+
+    .media-viewer {
+      flex: 1;
+      display: flex;
+      align-items: center;
+      justify-content: center;
+      padding: 30px;
+      position: relative;
+      background: radial-gradient(circle at center, var(--bg-panel) 0%, var(--bg-main) 100%);
+      min-height: 0;
+      overflow: auto; 
+      scrollbar-width: auto;
+      scrollbar-color: var(--primary) var(--bg-control);
+    }
+    
+    .media-viewer::-webkit-scrollbar {
+      width: 20px;
+      height: 20px;
+    }
+
+    .media-viewer::-webkit-scrollbar-track {
+      background: var(--bg-control);
+    }
+
+    .media-viewer::-webkit-scrollbar-thumb {
+      background-color: var(--primary);
+      border-radius: 8px;
+      border: 4px solid var(--bg-control);
+    }
+
+    .media-viewer::-webkit-scrollbar-thumb:hover {
+      background-color: var(--primary-hover);
+    }
+
+    #container {
+      position: relative;
+      border: 2px solid var(--border-light);
+      border-radius: var(--radius-large);
+      background: #000;
+      box-shadow: var(--shadow-heavy);
+      display: inline-block;
+    }
+    
+    .light-theme #container {
+        background: #333;
+    }
+
+    #media-wrapper {
+        position: relative;
+        display: inline-block;
+        line-height: 0;
+    }
+
+    .tile-layer {
+      position: absolute;
+      top: 0;
+      left: 0;
+      width: 100%;
+      height: 100%;
+      overflow: hidden;
+      pointer-events: none;
+      z-index: 1;
+    }
+
+    .tile-layer img {
+      position: absolute;
+    }
+
+    .decoded-frame {
+      display: none;
+      position: absolute;
+      top: 0;
+      left: 0;
+      width: 100%;
+      height: 100%;
+      pointer-events: none;
+      z-index: 1;
+    }
+
+    img, video, audio {
+      display: block;
+      max-width: none;
+      user-select: none;
+      -webkit-user-drag: none;
+      -moz-user-drag: none;
+      -o-user-drag: none;
+      user-drag: none;
+      -webkit-touch-callout: none;
+    }
+
+    #unsupported {
+      width: 500px;
+      height: 300px;
+      display: inline-flex;
+      align-items: center;
+      justify-content: center;
+    }
+
+    .unsupported-content {
+      text-align: center;
+      padding: 40px;
+    }
+
+    .unsupported-icon {
+      font-size: 48px;
+      margin-bottom: 16px;
+    }
+
+    .unsupported-text {
+      font-size: 18px;
+      color: var(--text-main);
+      margin-bottom: 8px;
+      font-weight: 500;
+    }
+
+    .unsupported-subtext {
+      font-size: 14px;
+      color: var(--text-muted);
+    }
+
+    .crop-box {
+      border: 2px dashed var(--primary);
+      position: absolute;
+      z-index: 50;
+      box-sizing: border-box;
+      min-width: 30px;
+      min-height: 30px;
+      cursor: grab;
+      background: color-mix(in srgb, var(--primary) 15%, transparent); 
+      box-shadow: 
+        0 0 0 9999px color-mix(in srgb, var(--bg-main) 70%, transparent),
+        inset 0 0 0 1px color-mix(in srgb, var(--primary) 30%, transparent);
+      transition: box-shadow 0.2s ease;
+    }
+    
+    .light-theme .crop-box {
+        box-shadow: 
+            0 0 0 9999px rgba(0, 0, 0, 0.4),
+            inset 0 0 0 1px color-mix(in srgb, var(--primary) 50%, transparent);
+    }
+
+    .crop-box:hover {
+      box-shadow: 
+        0 0 0 9999px color-mix(in srgb, var(--bg-main) 75%, transparent),
+        inset 0 0 0 1px color-mix(in srgb, var(--primary) 50%, transparent),
+        0 0 20px color-mix(in srgb, var(--primary) 40%, transparent);
+    }
+
+    .crop-box.dragging {
+      cursor: grabbing;
+      box-shadow: 
+        0 0 0 9999px color-mix(in srgb, var(--bg-main) 80%, transparent),
+        inset 0 0 0 1px color-mix(in srgb, var(--primary) 70%, transparent),
+        0 0 25px color-mix(in srgb, var(--primary) 60%, transparent);
+    }
+    
+    .light-theme .crop-box:hover, .light-theme .crop-box.dragging {
+        box-shadow: 
+            0 0 0 9999px rgba(0, 0, 0, 0.5), 
+            inset 0 0 0 1px color-mix(in srgb, var(--primary) 70%, transparent),
+            0 0 25px color-mix(in srgb, var(--primary) 60%, transparent);
+    }
+
+
+    .crop-box.show-grid::before {
+      content: '';
+      position: absolute;
+      top: 0;
+      left: 0;
+      right: 0;
+      bottom: 0;
+      background-image: 
+        linear-gradient(to right, color-mix(in srgb, var(--primary) 30%, transparent) 1px, transparent 1px),
+        linear-gradient(to bottom, color-mix(in srgb, var(--primary) 30%, transparent) 1px, transparent 1px);
+      background-size: 33.33% 33.33%;
+      pointer-events: none;
+    }
+
+    .resize-handle {
+      position: absolute;
+      background: var(--primary);
+      width: 16px;
+      height: 16px;
+      border: 2px solid var(--bg-main);
+      border-radius: 50%;
+      z-index: 51;
+      transition: all 0.2s ease;
+      transform: translate(-50%, -50%);
+    }
+    
+    .light-theme .resize-handle {
+        border: 2px solid var(--bg-panel);
+    }
+
+
+    .resize-handle:hover {
+      background: #fff;
+      transform: translate(-50%, -50%) scale(1.3);
+      box-shadow: 0 0 8px color-mix(in srgb, var(--primary) 50%, transparent);
+    }
+    
+    .light-theme .resize-handle:hover {
+        background: #000;
+        box-shadow: 0 0 8px color-mix(in srgb, var(--primary) 70%, transparent);
+    }
+
+    .resize-handle.nw { top: 0; left: 0; cursor: nwse-resize; }
+    .resize-handle.ne { top: 0; right: 0; cursor: ne-resize; transform: translate(50%, -50%); }
+    .resize-handle.sw { bottom: 0; left: 0; cursor: sw-resize; transform: translate(-50%, 50%); }
+    .resize-handle.se { bottom: 0; right: 0; cursor: se-resize; transform: translate(50%, 50%); }
+    .resize-handle.n { top: 0; left: 50%; cursor: n-resize; }
+    .resize-handle.s { bottom: 0; left: 50%; cursor: s-resize; transform: translate(-50%, 50%); }
+    .resize-handle.w { left: 0; top: 50%; cursor: w-resize; }
+    .resize-handle.e { right: 0; top: 50%; cursor: e-resize; transform: translate(50%, -50%); }
+
+    .video-controls {
+      display: flex;
+      align-items: center;
+      justify-content: space-between;
+      padding: 10px 20px;
+      background: var(--bg-control);
+      border-top: 1px solid var(--border-light);
+      gap: 10px;
+      flex-shrink: 0;
+    }
+
+    .control-btn {
+      background: none;
+      border: none;
+      color: var(--text-main);
+      font-size: 18px;
+      cursor: pointer;
+      padding: 5px;
+      border-radius: var(--radius);
+      transition: background 0.2s ease;
+      width: 40px;
+      height: 40px;
+      display: flex;
+      align-items: center;
+      justify-content: center;
+    }
+
+    .control-btn:hover {
+      background: var(--border);
+    }
+
+    .control-btn:disabled {
+      opacity: 0.4;
+      cursor: default;
+      background: none;
+    }
+
+    .progress-container {
+      flex: 1;
+      display: flex;
+      align-items: center;
+      gap: 10px;
+      min-width: 0;
+      position: relative;
+    }
+
+    .scene-markers {
+      position: absolute;
+      top: 50%;
+      height: 14px;
+      transform: translateY(-50%);
+      pointer-events: none;
+    }
+
+    .scene-marker {
+      position: absolute;
+      top: 0;
+      width: 2px;
+      height: 100%;
+      margin-left: -1px;
+      background: var(--text-muted);
+      opacity: 0.7;
+    }
+
+    .scene-marker.letterboxed {
+      background: var(--primary);
+      opacity: 1;
+    }
+
+    .path-marker {
+      position: absolute;
+      top: 50%;
+      width: 8px;
+      height: 8px;
+      margin: -4px 0 0 -4px;
+      background: var(--text-main);
+      border: 1px solid var(--bg-main);
+      transform: rotate(45deg);
+    }
+
+    .crop-path-interpolation {
+      margin-top: 6px;
+    }
+
+    .seek-preview {
+      display: none;
+      position: absolute;
+      bottom: 24px;
+      transform: translateX(-50%);
+      flex-direction: column;
+      align-items: center;
+      gap: 4px;
+      padding: 4px;
+      background: var(--bg-control);
+      border: 1px solid var(--border-light);
+      border-radius: var(--radius);
+      pointer-events: none;
+      z-index: 60;
+    }
+
+    .seek-preview-frame {
+      background-color: #000;
+      background-repeat: no-repeat;
+    }
+
+    .seek-preview-time {
+      font-size: 12px;
+      color: var(--text-main);
+      font-family: 'SF Mono', Monaco, 'Cascadia Code', 'Roboto Mono', Consolas, 'Courier New', monospace;
+    }
+
+    #currentTime, #duration {
+      font-size: 12px;
+      color: var(--text-muted);
+      min-width: 40px;
+      font-family: 'SF Mono', Monaco, 'Cascadia Code', 'Roboto Mono', Consolas, 'Courier New', monospace;
+    }
+
+    .seek-bar {
+      flex: 1;
+      height: 4px;
+      background: var(--border);
+      border-radius: 2px;
+      outline: none;
+      -webkit-appearance: none;
+      cursor: pointer;
+    }
+
+    .seek-bar::-webkit-slider-thumb {
+      -webkit-appearance: none;
+      appearance: none;
+      width: 12px;
+      height: 12px;
+      background: var(--primary);
+      border-radius: 50%;
+      cursor: pointer;
+    }
+
+    .seek-bar::-moz-range-thumb {
+      width: 12px;
+      height: 12px;
+      background: var(--primary);
+      border-radius: 50%;
+      cursor: pointer;
+      border: none;
+    }
+
+    .control-select {
+      background: var(--bg-control);
+      border: 1px solid var(--border);
+      color: var(--text-main);
+      padding: 5px 8px;
+      border-radius: var(--radius);
+      font-size: 12px;
+      cursor: pointer;
+    }
+
+    .volume-container {
+      display: flex;
+      align-items: center;
+      gap: 5px;
+      min-width: 100px;
+    }
+
+    .volume-bar {
+      width: 80px;
+      height: 4px;
+      background: var(--border);
+      border-radius: 2px;
+      outline: none;
+      -webkit-appearance: none;
+      cursor: pointer;
+    }
+
+    .volume-bar::-webkit-slider-thumb {
+      -webkit-appearance: none;
+      appearance: none;
+      width: 12px;
+      height: 12px;
+      background: var(--primary);
+      border-radius: 50%;
+      cursor: pointer;
+    }
+
+    .volume-bar::-moz-range-thumb {
+      width: 12px;
+      height: 12px;
+      background: var(--primary);
+      border-radius: 50%;
+      cursor: pointer;
+      border: none;
+    }
+
+    .loading {
+      position: fixed;
+      top: 50%;
+      left: 50%;
+      transform: translate(-50%, -50%);
+      background: var(--bg-panel);
+      padding: 30px 40px;
+      border-radius: var(--radius-large);
+      box-shadow: var(--shadow-heavy);
+      z-index: 1000;
+      text-align: center;
+    }
+
+    .spinner {
+      width: 32px;
+      height: 32px;
+      border: 3px solid var(--border);
+      border-top: 3px solid var(--primary);
+      border-radius: 50%;
+      animation: spin 1s linear infinite;
+      margin: 0 auto 15px;
+    }
+
+    @keyframes spin {
+      0% { transform: rotate(0deg); }
+      100% { transform: rotate(360deg); }
+    }
+
+    .loading-text {
+      font-size: 16px;
+      font-weight: 500;
+      color: var(--text-main);
+    }
+
+    .help-modal {
+      position: fixed;
+      top: 0;
+      left: 0;
+      right: 0;
+      bottom: 0;
+      background: rgba(0, 0, 0, 0.8);
+      display: none;
+      align-items: center;
+      justify-content: center;
+      z-index: 1000;
+      backdrop-filter: blur(4px);
+    }
+
+    .help-content {
+      background: var(--bg-panel);
+      border-radius: var(--radius-large);
+      padding: 30px;
+      max-width: 400px;
+      box-shadow: var(--shadow-heavy);
+      border: 1px solid var(--border);
+    }
+
+    .help-title {
+      font-size: 20px;
+      font-weight: 600;
+      color: var(--primary);
+      margin-bottom: 20px;
+      text-align: center;
+      display: flex;
+      align-items: center;
+      justify-content: center;
+      gap: 8px;
+    }
+
+    .help-title::before {
+      content: '⌨️';
+      font-size: 24px;
+    }
+
+    .help-shortcuts {
+      display: flex;
+      flex-direction: column;
+      gap: 12px;
+      margin-bottom: 25px;
+    }
+
+    .help-shortcut {
+      display: flex;
+      justify-content: space-between;
+      align-items: center;
+      font-size: 14px;
+    }
+
+    .help-shortcut-desc {
+      color: var(--text-muted);
+    }
+
+    .help-shortcut-key {
+      background: var(--bg-control);
+      color: var(--primary);
+      padding: 4px 8px;
+      border-radius: 4px;
+      font-family: 'SF Mono', Monaco, 'Cascadia Code', 'Roboto Mono', Consolas, 'Courier New', monospace;
+      font-size: 12px;
+      font-weight: 600;
+    }
+
+    .help-close {
+      background: linear-gradient(135deg, var(--primary), var(--primary-dark));
+      color: #000;
+      border: none;
+      padding: 12px 24px;
+      border-radius: var(--radius);
+      font-weight: 600;
+      cursor: pointer;
+      width: 100%;
+      transition: all 0.2s ease;
+    }
+    
+    .light-theme .help-close {
+        color: #ffffff;
+    }
+
+
+    .help-close:hover {
+      background: linear-gradient(135deg, var(--primary-hover), var(--primary));
+      transform: translateY(-1px);
+    }
+
+    .context-menu {
+      position: fixed;
+      background: var(--bg-panel);
+      border: 1px solid var(--border);
+      border-radius: var(--radius);
+      padding: 8px 0;
+      z-index: 300;
+      display: none;
+      box-shadow: var(--shadow);
+      min-width: 180px;
+    }
+
+    .context-item {
+      padding: 12px 16px;
+      cursor: pointer;
+      font-size: 14px;
+      transition: background 0.2s ease;
+      color: var(--text-main);
+    }
+
+    .context-item:hover {
+      background: var(--bg-control);
+      color: var(--primary);
+    }
+
+    .floating-preview {
+      position: fixed;
+      bottom: 20px;
+      right: 20px;
+      width: 200px;
+      height: 180px;
+      min-width: 150px;
+      min-height: 120px;
+      max-width: 90vw;
+      max-height: 90vh;
+      background: var(--bg-panel);
+      border: 1px solid var(--border-light);
+      border-radius: var(--radius);
+      box-shadow: var(--shadow-heavy);
+      z-index: 500;
+      display: none; /* Initially hidden */
+      flex-direction: column;
+      overflow: hidden;
+      transition: width 0.3s ease, height 0.3s ease, opacity 0.3s;
+    }
+
+    .preview-header {
+      background: var(--bg-control);
+      padding: 6px 10px;
+      cursor: move;
+      font-size: 12px;
+      font-weight: 500;
+      color: var(--text-muted);
+      border-bottom: 1px solid var(--border);
+      display: flex;
+      justify-content: space-between;
+      align-items: center;
+      flex-shrink: 0;
+    }
+
+    .preview-header .preview-size {
+        font-family: 'SF Mono', Monaco, 'Cascadia Code', 'Roboto Mono', Consolas, 'Courier New', monospace;
+        color: var(--text-main);
+    }
+
+    .preview-canvas-wrapper {
+      flex-grow: 1;
+      display: flex;
+      align-items: center;
+      justify-content: center;
+      background: repeating-conic-gradient(var(--bg-main) 0% 25%, var(--bg-control) 0% 50%) 50% / 20px 20px;
+      overflow: hidden;
+      min-height: 0;
+      cursor: pointer;
+    }
+
+    #previewCanvas {
+      max-width: 100%;
+      max-height: 100%;
+      object-fit: contain;
+      image-rendering: pixelated;
+    }
+    
+    .preview-resize-handle {
+        position: absolute;
+        width: 12px;
+        height: 12px;
+        background: var(--primary);
+        border: 1px solid var(--bg-main);
+        border-radius: 3px;
+        z-index: 501;
+        opacity: 0;
+        transition: opacity 0.2s;
+    }
+
+    .floating-preview:hover .preview-resize-handle {
+        opacity: 1;
+    }
+
+    .p-nw { top: -1px; left: -1px; cursor: nwse-resize; }
+    .p-ne { top: -1px; right: -1px; cursor: nesw-resize; }
+    .p-sw { bottom: -1px; left: -1px; cursor: nesw-resize; }
+    .p-se { bottom: -1px; right: -1px; cursor: nwse-resize; }
+    .p-n { top: -1px; left: 50%; transform: translateX(-50%); cursor: ns-resize; }
+    .p-s { bottom: -1px; left: 50%; transform: translateX(-50%); cursor: ns-resize; }
+    .p-w { top: 50%; left: -1px; transform: translateY(-50%); cursor: ew-resize; }
+    .p-e { top: 50%; right: -1px; transform: translateY(-50%); cursor: ew-resize; }
+
+    .preview-close-btn {
+        display: none;
+        position: absolute;
+        top: 15px;
+        right: 15px;
+        width: 40px;
+        height: 40px;
+        background: rgba(0, 0, 0, 0.5);
+        color: white;
+        border: 1px solid rgba(255, 255, 255, 0.3);
+        border-radius: 50%;
+        font-size: 24px;
+        line-height: 38px;
+        text-align: center;
+        cursor: pointer;
+        z-index: 502;
+        transition: transform 0.2s, background 0.2s;
+    }
+
+    .preview-close-btn:hover {
+        background: rgba(0, 0, 0, 0.8);
+        transform: scale(1.1);
+    }
+    
+    .floating-preview.fullscreen {
+        top: 0 !important;
+        left: 0 !important;
+        width: 100vw !important;
+        height: 100vh !important;
+        max-width: 100vw;
+        max-height: 100vh;
+        border-radius: 0;
+        z-index: 2000;
+        transition: none;
+    }
+
+    .floating-preview.fullscreen .preview-header,
+    .floating-preview.fullscreen .preview-resize-handle {
+        display: none;
+    }
+    
+    .floating-preview.fullscreen .preview-close-btn {
+        display: block;
+    }
+    
+    .floating-preview.fullscreen .preview-canvas-wrapper {
+        background: #000;
+    }
+
+    .notification {
+      position: fixed;
+      top: 50%;
+      left: 50%;
+      transform: translate(-50%, -50%);
+      background: var(--bg-panel);
+      color: var(--text-main);
+      padding: 25px 35px;
+      border-radius: var(--radius-large);
+      z-index: 2100;
+      box-shadow: var(--shadow-heavy);
+      border: 1px solid var(--primary);
+      text-align: center;
+      max-width: 400px;
+      animation: fadeInOut 3s forwards;
+    }
+
+    .notification-title {
+      font-size: 18px;
+      font-weight: 600;
+      color: var(--primary);
+      margin-bottom: 15px;
+      display: flex;
+      align-items: center;
+      justify-content: center;
+      gap: 8px;
+    }
+
+    .notification-title::before {
+      content: '✅';
+      font-size: 20px;
+    }
+
+    .notification-code {
+      background: var(--bg-control);
+      padding: 12px 16px;
+      border-radius: var(--radius);
+      font-family: 'SF Mono', Monaco, 'Cascadia Code', 'Roboto Mono', Consolas, 'Courier New', monospace;
+      font-size: 14px;
+      color: var(--primary);
+      margin: 15px 0;
+      border: 1px solid var(--border);
+      overflow-x: auto;
+    }
+
+    .notification-subtitle {
+      font-size: 13px;
+      color: var(--text-muted);
+    }
+    
+    @keyframes fadeInOut {
+        0% { opacity: 0; transform: translate(-50%, -50%) scale(0.9); }
+        10% { opacity: 1; transform: translate(-50%, -50%) scale(1); }
+        90% { opacity: 1; transform: translate(-50%, -50%) scale(1); }
+        100% { opacity: 0; transform: translate(-50%, -50%) scale(0.9); }
+    }
+
+    @media (max-width: 1024px) {
+      .sidebar {
+        width: 250px;
+      }
+      
+      #container {
+        max-width: calc(100vw - 270px);
+      }
+    }
+
+    @media (max-width: 768px) {
+      .header-bar {
+        flex-direction: column;
+        height: auto;
+        padding: 12px 15px;
+        gap: 10px;
+        flex-shrink: 0;
+      }
+      
+      .file-info {
+        gap: 10px;
+        font-size: 12px;
+      }
+      
+      .main-content {
+        flex-direction: column;
+      }
+      
+      .sidebar {
+        width: 100%;
+        border-right: none;
+        border-bottom: 1px solid var(--border);
+        flex-direction: row;
+        overflow-x: auto;
+        padding: 0;
+        flex-shrink: 0;
+        scrollbar-width: thin;
+        scrollbar-color: var(--primary) var(--bg-control);
+      }
+
+      .sidebar::-webkit-scrollbar {
+        height: 6px;
+      }
+      .sidebar::-webkit-scrollbar-track {
+        background: var(--bg-control);
+      }
+      .sidebar::-webkit-scrollbar-thumb {
+        background-color: var(--primary);
+        border-radius: 6px;
+      }
+      
+      .sidebar-section {
+        min-width: 220px;
+        border-right: 1px solid var(--border);
+        border-bottom: none;
+        flex-shrink: 0;
+      }
+      
+      .sidebar-section:last-child {
+        border-right: none;
+      }
+
+      .media-viewer {
+        flex: 1;
+        min-height: 0;
+      }
+      
+      #container {
+        max-width: 100%;
+        max-height: 100%;
+      }
+
+      .resize-handle {
+        width: 22px;
+        height: 22px;
+      }
+
+      .video-controls {
+        padding: 10px 15px;
+        gap: 5px;
+      }
+
+      .control-btn {
+        width: 35px;
+        height: 35px;
+        font-size: 16px;
+      }
+
+      .progress-container {
+        gap: 5px;
+      }
+
+      #currentTime, #duration {
+        min-width: 35px;
+        font-size: 11px;
+      }
+
+      .volume-container {
+        min-width: 80px;
+      }
+
+      .volume-bar {
+        width: 60px;
+      }
+    }
+
+    .smooth-transition {
+      transition: all 0.15s cubic-bezier(0.4, 0, 0.2, 1);
+    }
+
+    .visually-hidden {
+      position: absolute;
+      width: 1px;
+      height: 1px;
+      margin: -1px;
+      padding: 0;
+      overflow: hidden;
+      clip: rect(0, 0, 0, 0);
+      white-space: nowrap;
+      border: 0;
+    }
+    
+    /* START OF CSS FOR CROP INFO INPUTS */
+    .info-input-group {
+      display: grid;
+      grid-template-columns: 1fr 1fr;
+      gap: 8px;
+    }
+
+    .info-input-wrapper {
+      position: relative;
+    }
+
+    .info-input-label {
+      position: absolute;
+      left: 10px;
+      top: 50%;
+      transform: translateY(-50%);
+      font-size: 11px;
+      font-weight: 500;
+      color: var(--text-dim);
+      pointer-events: none;
+    }
+
+    .info-input {
+      width: 100%;
+      padding: 8px 10px 8px 30px; /* Make space for label */
+      background: var(--bg-control);
+      border: 1px solid var(--border);
+      border-radius: var(--radius);
+      color: var(--text-main);
+      font-size: 12px;
+      font-family: 'SF Mono', Monaco, 'Cascadia Code', 'Roboto Mono', Consolas, 'Courier New', monospace;
+      text-align: right;
+      -moz-appearance: textfield; /* For Firefox */
+    }
+
+    .info-input::-webkit-outer-spin-button,
+    .info-input::-webkit-inner-spin-button {
+      -webkit-appearance: none;
+      margin: 0;
+    }
+
+    .info-input:focus {
+      outline: none;
+      border-color: var(--primary);
+      box-shadow: 0 0 0 2px color-mix(in srgb, var(--primary) 20%, transparent);
+    }
+
+    .info-section-title {
+      font-size: 12px;
+      font-weight: 600;
+      color: var(--text-muted);
+      margin-top: 15px;
+      margin-bottom: 10px;
+      border-bottom: 1px solid var(--border);
+      padding-bottom: 5px;
+    }
+    
+    .info-section-title:first-child {
+        margin-top: 0;
+    }
+    /* END OF CSS FOR CROP INFO INPUTS */
+
+    /* START: NEW CSS FOR CHECKBOX */
+    .checkbox-group {
+      display: flex;
+      align-items: center;
+      gap: 10px;
+      margin-top: 15px;
+    }
+
+    .form-label-checkbox {
+      font-size: 13px;
+      font-weight: 500;
+      color: var(--text-muted);
+      cursor: pointer;
+      flex: 1;
+    }
+
+    .form-checkbox {
+      -webkit-appearance: none;
+      appearance: none;
+      background-color: var(--bg-control);
+      border: 1px solid var(--border);
+      width: 20px;
+      height: 20px;
+      border-radius: 4px;
+      cursor: pointer;
+      position: relative;
+      transition: all 0.2s ease;
+      flex-shrink: 0;
+    }
+
+    .form-checkbox:checked {
+      background-color: var(--primary);
+      border-color: var(--primary);
+    }
+
+    .form-checkbox:checked::before {
+      content: '✔';
+      color: #000;
+      position: absolute;
+      top: 50%;
+      left: 50%;
+      transform: translate(-50%, -50%);
+      font-size: 14px;
+      font-weight: 900;
+      line-height: 1;
+    }
+    
+    .light-theme .form-checkbox:checked::before {
+        color: #fff;
+    }
+
+    .form-checkbox:focus {
+      outline: none;
+      box-shadow: 0 0 0 3px color-mix(in srgb, var(--primary) 30%, transparent);
+    }
+    /* END: NEW CSS FOR CHECKBOX */
+
+    """
+    return css_code
@@ -0,0 +1,295 @@
+# http_handler_html.py
+
+import json
+
+
+def get_html_page(ext, media_type, media_section, rotation, token, css_url, js_url, duration=0,
+                  natural_size=(0, 0), tiles=None, save_type=None, thumbnails=False, frame_index=False,
+                  scenes=False):
+    """Returns the complete HTML page as a formatted string."""
+
+    rotation_script = f"""
+  <script>
+    window.MEDIA_ROTATION = {rotation};
+    window.MEDIA_TOKEN = "{token or ''}";
+    window.MEDIA_TYPE = "{media_type}";
+    window.MEDIA_EXT = "{ext}";
+    window.MEDIA_DURATION = {float(duration or 0)};
+    window.MEDIA_NATURAL_WIDTH = {int(natural_size[0])};
+    window.MEDIA_NATURAL_HEIGHT = {int(natural_size[1])};
+    window.MEDIA_TILES = {json.dumps(tiles)};
+    window.MEDIA_THUMBNAILS = {json.dumps(thumbnails)};
+    window.MEDIA_FRAME_INDEX = {json.dumps(frame_index)};
+    window.MEDIA_SCENES = {json.dumps(scenes)};
+    window.MEDIA_SAVE_TYPE = "{save_type or media_type}";
+  </script>
+"""
+
+    html_code = f"""<!DOCTYPE html>
+<html lang="en">
+<head>
+  <meta charset="utf-8">
+  <meta name="viewport" content="width=device-width, initial-scale=1.0">
+  <title>MediaCrop - Visual FFmpeg Crop Tool</title>
+  <link rel="stylesheet" href="{css_url}">
+</head>
+<body class="dark-theme"> <div class="loading" id="loadingIndicator">
+    <div class="spinner"></div>
+    <div class="loading-text">Loading media...</div>
+  </div>
+
+  <div class="header-bar">
+    <div class="app-title">MediaCrop - Visual FFmpeg Crop Tool</div>
+    <div class="header-controls">
+      <button id="themeToggle" title="Toggle Dark/Light Theme">☀️</button>
+      <div class="file-info">
+        <div class="file-detail">
+          <span class="file-detail-label">Format:</span>
+          <span class="file-detail-value">{ext.upper().replace('.', '')}</span>
+        </div>
+        <div class="file-detail">
+          <span class="file-detail-label">Type:</span>
+          <span class="file-detail-value">{media_type.title()}</span>
+        </div>
+        <div class="file-detail">
+          <span class="file-detail-label">Size:</span>
+          <span class="file-detail-value" id="fileSizeInfo">Loading...</span>
+        </div>
+        <div class="file-detail" id="proxyDetail" style="display: none;">
+          <span class="file-detail-label">Proxy:</span>
+          <span class="file-detail-value" id="proxyStatus">Starting...</span>
+        </div>
+      </div>
+    </div>
+  </div>
+
+  <div class="main-content">
+    <div class="sidebar">
+      <div class="sidebar-section">
+        <div class="section-title aspect">Aspect Ratio</div>
+        
+        <div class="form-group">
+          <label class="form-label" for="aspect">Preset</label>
+          <select id="aspect" class="form-select">
+            <option value="free">Free Form</option>
+            <option value="1:1">1:1 (Square)</option>
+            <option value="4:3">4:3 (Standard)</option>
+            <option value="16:9">16:9 (Widescreen)</option>
+            <option value="9:16">9:16 (Portrait)</option>
+            <option value="3:2">3:2 (Photo)</option>
+            <option value="5:4">5:4 (Large Format)</option>
+            <option value="21:9">21:9 (Ultrawide)</option>
+            <option value="2.35:1">2.35:1 (Cinemascope)</option>
+            <option value="2.39:1">2.39:1 (Anamorphic)</option>
+            <option value="original">Original</option>
+            <option value="custom">Custom Ratio</option>
+          </select>
+        </div>
+        
+        <div class="custom-ratio" id="customRatio">
+          <input type="text" id="customW" class="form-input" value="16" placeholder="W" inputmode="numeric">
+          <div class="ratio-separator">:</div>
+          <input type="text" id="customH" class="form-input" value="9" placeholder="H" inputmode="numeric">
+        </div>
+
+        <div class="form-group checkbox-group">
+          <input type="checkbox" id="keepAspect" class="form-checkbox" checked>
+          <label for="keepAspect" class="form-label-checkbox">Keep Aspect Ratio</label>
+        </div>
+        </div>
+
+      <div class="sidebar-section">
+        <div class="section-title tools">Quick Tools</div>
+        
+        <div class="form-group">
+          <div class="button-grid">
+            <button class="form-button" onclick="toggleGrid()" title="Toggle Rule-of-Thirds Grid (G)">📐 Grid</button>
+            <button class="form-button" onclick="centerCrop()" title="Center the Crop Box (C)">🎯 Center</button>
+            <button class="form-button" onclick="resetCropSize()" title="Reset Crop Box Size & Position">🔄 Reset</button>
+            <button class="form-button" onclick="toggleHelp()" title="Show Keyboard Shortcuts (?)">❓ Help</button>
+          </div>
+        </div>
+        
+        <div class="form-group" id="autoCropGroup" style="display: none;">
+          <button id="autoCropButton" class="form-button" onclick="detectBlackBars()" title="Detect letterbox/pillarbox bars and fit the crop box to the picture">🪄 Detect Black Bars</button>
+          <button id="sceneCropButton" class="form-button" onclick="applySceneCrop()" title="Fit the crop box to the black bars of the scene at the playhead" disabled>🎬 Fit Current Scene</button>
+          <div id="autoCropStatus" class="auto-crop-status" style="display: none;"></div>
+        </div>
+
+        <div class="form-group" id="cropPathGroup" style="display: none;">
+          <div class="button-grid">
+            <button class="form-button" onclick="addCropKeyframe()" title="Add a crop path keyframe at the current time (P)">◆ Keyframe</button>
+            <button class="form-button" onclick="clearCropPath()" title="Remove all crop path keyframes">🗑️ Clear Path</button>
+          </div>
+          <select id="cropPathInterpolation" class="form-select crop-path-interpolation" title="How the crop moves between keyframes">
+            <option value="smooth" selected>Smooth (no overshoot)</option>
+            <option value="ease">Ease in/out at each keyframe</option>
+            <option value="linear">Linear</option>
+          </select>
+          <div id="cropPathStatus" class="auto-crop-status" style="display: none;"></div>
+        </div>
+
+        <div class="form-group">
+          <button id="saveButton" class="form-button" onclick="saveCrop()" style="background: linear-gradient(135deg, #4CAF50, #45a049); font-size: 14px; padding: 12px;">
+            💾 Save Coordinates
+          </button>
+        </div>
+      </div>
+
+      <div class="sidebar-section">
+        <div class="section-title info">Crop Info</div>
+        
+        <div classs="info-stats">
+          <div class="info-stat">
+            <span class="info-stat-label">Natural Res:</span>
+            <span class="info-stat-value" id="naturalResInfo">N/A</span>
+          </div>
+
+          <div class="info-section-title">Preview Info (Zoomed)</div>
+          
+          <div class="form-group info-input-group">
+            <div class="info-input-wrapper">
+              <span class="info-input-label">X</span>
+              <input type="number" id="previewX" class="info-input" value="0">
+            </div>
+            <div class="info-input-wrapper">
+              <span class="info-input-label">Y</span>
+              <input type="number" id="previewY" class="info-input" value="0">
+            </div>
+          </div>
+          <div class="form-group info-input-group">
+            <div class="info-input-wrapper">
+              <span class="info-input-label">W</span>
+              <input type="number" id="previewW" class="info-input" value="0">
+            </div>
+            <div class="info-input-wrapper">
+              <span class="info-input-label">H</span>
+              <input type="number" id="previewH" class="info-input" value="0">
+            </div>
+          </div>
+
+          <div class="info-section-title">Actual Info (Original)</div>
+
+          <div class="form-group info-input-group">
+            <div class="info-input-wrapper">
+              <span class="info-input-label">X</span>
+              <input type="number" id="actualX" class="info-input" value="0">
+            </div>
+            <div class="info-input-wrapper">
+              <span class="info-input-label">Y</span>
+              <input type="number" id="actualY" class="info-input" value="0">
+            </div>
+          </div>
+          <div class="form-group info-input-group">
+            <div class="info-input-wrapper">
+              <span class="info-input-label">W</span>
+              <input type="number" id="actualW" class="info-input" value="0">
+            </div>
+            <div class="info-input-wrapper">
+              <span class="info-input-label">H</span>
+              <input type="number" id="actualH" class="info-input" value="0">
+            </div>
+          </div>
+
+          <div class="info-section-title">Shared Info</div>
+          <div class="info-stat">
+            <span class="info-stat-label">Ratio:</span>
+            <span class="info-stat-value" id="ratioInfo">1:1</span>
+          </div>
+          <div class="info-stat">
+            <span class="info-stat-label">Zoom:</span>
+            <span class="info-stat-value" id="zoomInfo">100%</span>
+          </div>
+
+        </div>
+      </div>
+      </div>
+
+    <div class="media-viewer">
+      <div id="container">
+        {media_section}
+      </div>
+    </div>
+  </div>
+
+  <div class="help-modal" id="helpModal">
+    <div class="help-content">
+      <div class="help-title">Keyboard Shortcuts</div>
+      <div class="help-shortcuts">
+        <div class="help-shortcut">
+          <span class="help-shortcut-desc">Move crop box</span>
+          <span class="help-shortcut-key">Arrow Keys</span>
+        </div>
+        <div class="help-shortcut">
+          <span class="help-shortcut-desc">Fine adjustment</span>
+          <span class="help-shortcut-key">Shift + Arrows</span>
+        </div>
+        <div class="help-shortcut">
+          <span class="help-shortcut-desc">Zoom In/Out Media</span>
+          <span class="help-shortcut-key">Mouse Wheel</span>
+        </div>
+        <div class="help-shortcut">
+          <span class="help-shortcut-desc">Center crop box</span>
+          <span class="help-shortcut-key">C</span>
+        </div>
+        <div class="help-shortcut">
+          <span class="help-shortcut-desc">Toggle grid</span>
+          <span class="help-shortcut-key">G</span>
+        </div>
+        <div class="help-shortcut">
+          <span class="help-shortcut-desc">Previous/next video frame</span>
+          <span class="help-shortcut-key">, / .</span>
+        </div>
+        <div class="help-shortcut">
+          <span class="help-shortcut-desc">Snap to nearest keyframe</span>
+          <span class="help-shortcut-key">K</span>
+        </div>
+        <div class="help-shortcut">
+          <span class="help-shortcut-desc">Previous/next scene</span>
+          <span class="help-shortcut-key">[ / ]</span>
+        </div>
+        <div class="help-shortcut">
+          <span class="help-shortcut-desc">Add crop path keyframe</span>
+          <span class="help-shortcut-key">P</span>
+        </div>
+        <div class="help-shortcut">
+          <span class="help-shortcut-desc">Save coordinates</span>
+          <span class="help-shortcut-key">Enter</span>
+        </div>
+        <div class="help-shortcut">
+          <span class="help-shortcut-desc">Close help</span>
+          <span class="help-shortcut-key">Esc</span>
+        </div>
+      </div>
+      <button class="help-close" onclick="toggleHelp()">Got it!</button>
+    </div>
+  </div>
+
+  <div class="context-menu" id="contextMenu">
+    <div class="context-item" onclick="centerCrop()">🎯 Center Crop Box</div>
+    <div class="context-item" onclick="toggleGrid()">📐 Toggle Grid</div>
+    <div class="context-item" onclick="resetCropSize()">🔄 Reset Size</div>
+    <div class="context-item" id="exactFrameItem" onclick="openExactFrame()" style="display: none;">🎞️ View Exact Frame</div>
+    <div class="context-item" onclick="saveCrop()">💾 Save Coordinates</div>
+  </div>
+
+  <div id="floatingPreview" class="floating-preview">
+    <div class="preview-header">
+      <span class="preview-title">Live Preview</span>
+      <span class="preview-size" id="previewSizeInfo"></span>
+    </div>
+    <div class="preview-canvas-wrapper">
+        <canvas id="previewCanvas"></canvas>
+    </div>
+    <div class="preview-resize-handle p-nw"></div><div class="preview-resize-handle p-ne"></div>
+    <div class="preview-resize-handle p-sw"></div><div class="preview-resize-handle p-se"></div>
+    <div class="preview-resize-handle p-n"></div><div class="preview-resize-handle p-s"></div>
+    <div class="preview-resize-handle p-w"></div><div class="preview-resize-handle p-e"></div>
+    <button class="preview-close-btn" id="previewCloseBtn" title="Close Fullscreen">&times;</button>
+  </div>
+
+  {rotation_script}
+  <script src="{js_url}"></script>
+</body>
+</html>"""
+    return html_code
@@ -1,6 +1,6 @@
 # http_handler_js.py
 
-def get_javascript_code(media_type, ext):
+def get_javascript_code():
     """Returns the complete JavaScript code as a formatted string."""
     
     js_code = f"""
@@ -63,8 +63,10 @@ def get_javascript_code(media_type, ext):
       currentTheme: 'dark',
       lastUpdate: 0,
       animationFrame: null,
-      mediaType: "{media_type}",
-      fileExtension: "{ext}",
+      // Canvas holding a server-decoded frame while the <video> seeks to it
+      decodedFrame: null,
+      mediaType: window.MEDIA_TYPE,
+      fileExtension: window.MEDIA_EXT,
       zoom: 1,
       isPinching: false,
       pinchType: '',
@@ -247,6 +249,11 @@ def get_javascript_code(media_type, ext):
         }}
     }}, 500);
 
+    function applyCropState(zoom, left, top, width, height) {{
+        setMediaZoom(zoom, true);
+        setCropDimensions(left, top, width, height);
+    }}
+
     function loadCropFromStorage() {{
         const key = getStorageKey();
         if (!key) return false;
@@ -256,8 +263,7 @@ def get_javascript_code(media_type, ext):
             if (data) {{
                 const {{ left, top, width, height, zoom }} = JSON.parse(data);
                 if (left && top && width && height && zoom) {{
-                    setMediaZoom(zoom, true);
-                    setCropDimensions(parseFloat(left), parseFloat(top), parseFloat(width), parseFloat(height));
+                    applyCropState(zoom, parseFloat(left), parseFloat(top), parseFloat(width), parseFloat(height));
                     return true;
                 }}
             }}
@@ -268,6 +274,140 @@ def get_javascript_code(media_type, ext):
         return false;
     }}
     
+    // Tile pyramid for very large images: an overview <img> with sharper
+    // tiles layered over the visible part (see /tiles/ on the server)
+    const tileCache = new Map();
+    const TILE_CACHE_LIMIT = 512;
+    const TILED_PREVIEW_MAX = 1024;
+    let tileRetriesLeft = 60;
+    let tileRefreshPending = false;
+
+    function tileVersion() {{
+      const src = elements.media && elements.media.getAttribute('data-src');
+      return src ? (new URL(src, window.location.href).searchParams.get('v') || '') : '';
+    }}
+
+    function tileLevelFor(scale) {{
+      // Coarsest level that still has at least one pixel per drawn pixel
+      const level = Math.floor(Math.log2(1 / Math.max(scale, 1e-6)));
+      return Math.max(0, Math.min(window.MEDIA_TILES.maxLevel, level));
+    }}
+
+    function tilesSharperThanOverview(level) {{
+      const overviewScale = (elements.media.naturalWidth || 0) / window.MEDIA_TILES.width;
+      return Math.pow(2, -level) > overviewScale;
+    }}
+
+    function scheduleTileRefresh() {{
+      if (tileRefreshPending) return;
+      tileRefreshPending = true;
+      requestAnimationFrame(() => {{
+        tileRefreshPending = false;
+        updateTileLayer();
+        updatePreview();
+      }});
+    }}
+
+    function getTile(level, x, y) {{
+      const key = `${{level}}/${{x}}_${{y}}`;
+      let tile = tileCache.get(key);
+      if (tile) {{
+        // Re-insert to keep the Map in least-recently-used order
+        tileCache.delete(key);
+        tileCache.set(key, tile);
+        return tile;
+      }}
+      tile = new Image();
+      tile.decoding = 'async';
+      tile.draggable = false;
+      tile.dataset.key = key;
+      tile.addEventListener('load', scheduleTileRefresh);
+      tile.addEventListener('error', () => {{
+        // Level not generated yet: drop it and ask again shortly
+        tileCache.delete(key);
+        tile.remove();
+        if (tileRetriesLeft-- > 0) setTimeout(scheduleTileRefresh, 1000);
+      }});
+      tile.src = getSecureUrl(`/tiles/${{key}}?v=${{tileVersion()}}`);
+      tileCache.set(key, tile);
+      while (tileCache.size > TILE_CACHE_LIMIT) {{
+        tileCache.delete(tileCache.keys().next().value);
+      }}
+      return tile;
+    }}
+
+    function forEachTile(level, left, top, right, bottom, callback) {{
+      // Calls back for the tiles covering a rectangle in natural pixels
+      const tiles = window.MEDIA_TILES;
+      const span = tiles.tileSize * Math.pow(2, level);
+      const lastX = Math.ceil(tiles.width / span) - 1;
+      const lastY = Math.ceil(tiles.height / span) - 1;
+      const x0 = Math.max(0, Math.floor(left / span));
+      const y0 = Math.max(0, Math.floor(top / span));
+      const x1 = Math.min(lastX, Math.floor((right - 1) / span));
+      const y1 = Math.min(lastY, Math.floor((bottom - 1) / span));
+      for (let y = y0; y <= y1; y++) {{
+        for (let x = x0; x <= x1; x++) {{
+          callback(x, y, span);
+        }}
+      }}
+    }}
+
+    function updateTileLayer() {{
+      const tiles = window.MEDIA_TILES;
+      const layer = document.getElementById('tileLayer');
+      if (!tiles || !layer || !elements.media || !state.mediaWidth) return;
+
+      const displayScale = state.mediaWidth / tiles.width;
+      const level = tileLevelFor(displayScale * (window.devicePixelRatio || 1));
+      const wanted = new Set();
+
+      if (tilesSharperThanOverview(level)) {{
+        const mediaRect = elements.media.getBoundingClientRect();
+        const viewRect = elements.mediaViewer.getBoundingClientRect();
+        const left = Math.max(mediaRect.left, viewRect.left) - mediaRect.left;
+        const top = Math.max(mediaRect.top, viewRect.top) - mediaRect.top;
+        const right = Math.min(mediaRect.right, viewRect.right) - mediaRect.left;
+        const bottom = Math.min(mediaRect.bottom, viewRect.bottom) - mediaRect.top;
+
+        if (right > left && bottom > top) {{
+          forEachTile(level, left / displayScale, top / displayScale, right / displayScale, bottom / displayScale, (x, y, span) => {{
+            const tile = getTile(level, x, y);
+            wanted.add(tile.dataset.key);
+            tile.style.left = (x * span * displayScale) + 'px';
+            tile.style.top = (y * span * displayScale) + 'px';
+            tile.style.width = tile.style.height = (span * displayScale) + 'px';
+            if (tile.parentNode !== layer) layer.appendChild(tile);
+          }});
+        }}
+      }}
+
+      Array.from(layer.children).forEach(child => {{
+        if (!wanted.has(child.dataset.key)) child.remove();
+      }});
+    }}
+
+    function drawTiledPreview(ctx, sourceX, sourceY, sourceWidth, sourceHeight, outScale) {{
+      const tiles = window.MEDIA_TILES;
+      const overview = elements.media;
+      const width = sourceWidth * outScale;
+      const height = sourceHeight * outScale;
+
+      if (overview.naturalWidth) {{
+        const s = overview.naturalWidth / tiles.width;
+        ctx.drawImage(overview, sourceX * s, sourceY * s, sourceWidth * s, sourceHeight * s, 0, 0, width, height);
+      }}
+
+      const level = tileLevelFor(outScale);
+      if (!tilesSharperThanOverview(level)) return;
+      forEachTile(level, sourceX, sourceY, sourceX + sourceWidth, sourceY + sourceHeight, (x, y, span) => {{
+        const tile = getTile(level, x, y);
+        if (tile.complete && tile.naturalWidth) {{
+          ctx.drawImage(tile, (x * span - sourceX) * outScale, (y * span - sourceY) * outScale, span * outScale, span * outScale);
+        }}
+      }});
+    }}
+
     function updatePreview() {{
         if (!state.isInitialized || state.mediaType === 'unsupported' || !elements.floatingPreview) {{
             if (elements.floatingPreview) elements.floatingPreview.style.display = 'none';
@@ -318,12 +458,22 @@ def get_javascript_code(media_type, ext):
         
         if (sourceWidth < 1 || sourceHeight < 1) return;
 
-        elements.previewCanvas.width = Math.round(sourceWidth);
-        elements.previewCanvas.height = Math.round(sourceHeight);
+        // A tiled crop can be far larger than any canvas; it is previewed downscaled
+        const outScale = window.MEDIA_TILES ? Math.min(1, TILED_PREVIEW_MAX / Math.max(sourceWidth, sourceHeight)) : 1;
+        elements.previewCanvas.width = Math.max(1, Math.round(sourceWidth * outScale));
+        elements.previewCanvas.height = Math.max(1, Math.round(sourceHeight * outScale));
 
         ctx.clearRect(0, 0, elements.previewCanvas.width, elements.previewCanvas.height);
         try {{
-            ctx.drawImage(elements.media, sourceX, sourceY, sourceWidth, sourceHeight, 0, 0, elements.previewCanvas.width, elements.previewCanvas.height);
+            if (window.MEDIA_TILES) {{
+                drawTiledPreview(ctx, sourceX, sourceY, sourceWidth, sourceHeight, outScale);
+            }} else {{
+                // The element's bitmap can be smaller than the natural size (proxy, converted preview)
+                const source = state.decodedFrame || elements.media;
+                const intrinsicWidth = state.decodedFrame ? state.decodedFrame.width : (elements.media.videoWidth || elements.media.naturalWidth || state.naturalWidth);
+                const bitmapScale = intrinsicWidth / state.naturalWidth;
+                ctx.drawImage(source, sourceX * bitmapScale, sourceY * bitmapScale, sourceWidth * bitmapScale, sourceHeight * bitmapScale, 0, 0, elements.previewCanvas.width, elements.previewCanvas.height);
+            }}
         }} catch (e) {{
             console.error("Canvas drawImage error:", e);
         }}
@@ -334,6 +484,7 @@ def get_javascript_code(media_type, ext):
     function startPreviewRenderLoop() {{
       if (state.animationFrame) cancelAnimationFrame(state.animationFrame);
       function renderLoop() {{
+        if (cropPath) cropPath.follow();
         updatePreview();
         state.animationFrame = requestAnimationFrame(renderLoop);
       }}
@@ -347,6 +498,401 @@ def get_javascript_code(media_type, ext):
       }}
     }}
 
+    function initSeekThumbnails(seekBar) {{
+      // Hover/drag previews from the server's keyframe sprite sheets (see /thumbnails/)
+      const none = {{ available: () => false, show: () => {{}}, hide: () => {{}} }};
+      if (!window.MEDIA_THUMBNAILS || !seekBar.parentElement) return none;
+
+      let index = null;
+      const preview = document.createElement('div');
+      preview.className = 'seek-preview';
+      const frame = document.createElement('div');
+      frame.className = 'seek-preview-frame';
+      const label = document.createElement('span');
+      label.className = 'seek-preview-time';
+      preview.appendChild(frame);
+      preview.appendChild(label);
+      seekBar.parentElement.appendChild(preview);
+
+      const load = (attempt) => {{
+        fetch(getSecureUrl('/thumbnails/index.json'))
+          .then(response => {{
+            if (response.status === 503 && attempt < 600) {{
+              setTimeout(() => load(attempt + 1), 2000);
+              return null;
+            }}
+            return response.ok ? response.json() : null;
+          }})
+          .then(data => {{
+            if (!data || !data.times || !data.times.length) return;
+            index = data;
+            frame.style.width = `${{data.width}}px`;
+            frame.style.height = `${{data.height}}px`;
+            // Warm the cache so the first hover is instant
+            const sheets = Math.ceil(data.times.length / (data.columns * data.rows));
+            for (let i = 0; i < sheets; i++) new Image().src = getSecureUrl(`/thumbnails/sheet-${{i}}.jpg`);
+          }})
+          .catch(() => {{}});
+      }};
+      load(0);
+
+      // Last thumbnail at or before `time`
+      const findThumbnail = (time) => {{
+        const times = index.times;
+        let lo = 0, hi = times.length - 1;
+        while (lo < hi) {{
+          const mid = (lo + hi + 1) >> 1;
+          if (times[mid] <= time) lo = mid; else hi = mid - 1;
+        }}
+        return lo;
+      }};
+
+      return {{
+        available: () => index !== null,
+        show(time, fraction) {{
+          if (!index || !isFinite(time)) return;
+          const i = findThumbnail(time);
+          const perSheet = index.columns * index.rows;
+          const cell = i % perSheet;
+          const x = (cell % index.columns) * index.width;
+          const y = Math.floor(cell / index.columns) * index.height;
+          frame.style.backgroundImage = `url("${{getSecureUrl(`/thumbnails/sheet-${{Math.floor(i / perSheet)}}.jpg`)}}")`;
+          frame.style.backgroundPosition = `-${{x}}px -${{y}}px`;
+          label.textContent = utils.formatTime(time);
+          const half = index.width / 2;
+          const offset = seekBar.offsetLeft + Math.max(0, Math.min(1, fraction)) * seekBar.offsetWidth;
+          preview.style.left = `${{Math.max(half, Math.min(offset, seekBar.parentElement.clientWidth - half))}}px`;
+          preview.style.display = 'flex';
+        }},
+        hide() {{
+          preview.style.display = 'none';
+        }}
+      }};
+    }}
+
+    let frameNavigation = null;
+    let decodedFrameCanvas = null;
+
+    function showDecodedFrame(imageData) {{
+      // Covers the video until its own seek lands on the same frame
+      const video = elements.media;
+      if (!video || !elements.mediaWrapper) return;
+      if (!decodedFrameCanvas) {{
+        decodedFrameCanvas = document.createElement('canvas');
+        decodedFrameCanvas.className = 'decoded-frame';
+        video.insertAdjacentElement('afterend', decodedFrameCanvas);
+        video.addEventListener('seeked', hideDecodedFrame);
+        video.addEventListener('play', hideDecodedFrame);
+      }}
+      decodedFrameCanvas.width = imageData.width;
+      decodedFrameCanvas.height = imageData.height;
+      decodedFrameCanvas.getContext('2d').putImageData(imageData, 0, 0);
+      decodedFrameCanvas.style.display = 'block';
+      state.decodedFrame = decodedFrameCanvas;
+      updatePreview();
+    }}
+
+    function hideDecodedFrame() {{
+      if (!decodedFrameCanvas || !state.decodedFrame) return;
+      decodedFrameCanvas.style.display = 'none';
+      state.decodedFrame = null;
+      updatePreview();
+    }}
+
+    function initFrameNavigation(video) {{
+      // Frame stepping and keyframe snapping against the server's frame index (see /index)
+      const buttons = ['prevFrame', 'nextFrame', 'snapKeyframe'].map(id => document.getElementById(id));
+      if (!window.MEDIA_FRAME_INDEX || buttons.some(button => !button)) return null;
+      const [prevButton, nextButton, snapButton] = buttons;
+      let ready = false;
+      // Steps run one after another so holding a key never races the previous seek
+      let queue = Promise.resolve();
+
+      const load = (attempt) => {{
+        fetch(getSecureUrl('/index'))
+          .then(response => {{
+            if (response.status === 503 && attempt < 600) {{
+              setTimeout(() => load(attempt + 1), 2000);
+              return null;
+            }}
+            return response.ok ? response.json() : null;
+          }})
+          .then(summary => {{
+            if (!summary || !summary.frames) return;
+            ready = true;
+            buttons.forEach(button => {{ button.disabled = false; }});
+            if (summary.frameRate) prevButton.title = `Previous frame (,) — ${{summary.frameRate}} fps`;
+          }})
+          .catch(() => {{}});
+      }};
+      load(0);
+
+      const seekTo = (time) => {{
+        if (time === null || !isFinite(time)) return;
+        video.pause();
+        video.addEventListener('seeked', updatePreview, {{ once: true }});
+        // A hair past the timestamp so rounding can't land on the previous frame
+        video.currentTime = time + 0.001;
+      }};
+
+      const lookupFrame = (pick) => fetch(getSecureUrl(`/index?t=${{video.currentTime}}`))
+        .then(response => response.ok ? response.json() : null)
+        .then(frame => {{ if (frame) seekTo(pick(frame)); }});
+
+      const withFrame = (pick) => {{
+        if (!ready) return;
+        queue = queue.then(() => lookupFrame(pick)).catch(() => {{}});
+      }};
+
+      // The decoder session's frame is painted at once; the <video> seek catches up behind it
+      const stepDecoded = (direction) => fetch(getSecureUrl(`/decoded?t=${{video.currentTime}}&step=${{direction}}`))
+        .then(response => {{
+          if (!response.ok) return false;
+          const width = parseInt(response.headers.get('X-Frame-Width'));
+          const height = parseInt(response.headers.get('X-Frame-Height'));
+          const time = parseFloat(response.headers.get('X-Frame-Time'));
+          return response.arrayBuffer().then(buffer => {{
+            showDecodedFrame(new ImageData(new Uint8ClampedArray(buffer), width, height));
+            seekTo(time);
+            return true;
+          }});
+        }})
+        .catch(() => false);
+
+      const navigation = {{
+        step: (direction) => {{
+          if (!ready) return;
+          queue = queue
+            .then(() => stepDecoded(direction))
+            .then(shown => shown || lookupFrame(frame => direction < 0 ? frame.previous : frame.next))
+            .catch(() => {{}});
+        }},
+        snapToKeyframe: () => withFrame(frame => {{
+          if (frame.keyframe) return frame.time;
+          const before = frame.keyframeBefore, after = frame.keyframeAfter;
+          if (before === null) return after;
+          if (after === null) return before;
+          return frame.time - before <= after - frame.time ? before : after;
+        }})
+      }};
+      prevButton.addEventListener('click', () => navigation.step(-1));
+      nextButton.addEventListener('click', () => navigation.step(1));
+      snapButton.addEventListener('click', navigation.snapToKeyframe);
+      return navigation;
+    }}
+
+    let sceneNavigation = null;
+
+    function initSceneNavigation(video, seekBar) {{
+      // Scene cuts and per-scene black bars from the server's scene index (see /scenes)
+      const buttons = ['prevScene', 'nextScene'].map(id => document.getElementById(id));
+      if (!window.MEDIA_SCENES || buttons.some(button => !button) || !seekBar.parentElement) return null;
+      const [prevButton, nextButton] = buttons;
+      const cropButton = document.getElementById('sceneCropButton');
+      let scenes = [];
+
+      const markers = document.createElement('div');
+      markers.className = 'scene-markers';
+      seekBar.parentElement.appendChild(markers);
+      // The markers line up with the range track, which sits between the time labels
+      const place = () => {{
+        markers.style.left = `${{seekBar.offsetLeft}}px`;
+        markers.style.width = `${{seekBar.offsetWidth}}px`;
+      }};
+      window.addEventListener('resize', place);
+
+      const duration = () => isFinite(video.duration) && video.duration ? video.duration : (window.MEDIA_DURATION || 0);
+
+      const drawMarkers = () => {{
+        const total = duration();
+        markers.textContent = '';
+        if (!total) return;
+        scenes.forEach((scene, i) => {{
+          // A marker at each cut, plus the first scene when it starts letterboxed
+          if (i === 0 && !scene.crop) return;
+          const marker = document.createElement('div');
+          marker.className = scene.crop ? 'scene-marker letterboxed' : 'scene-marker';
+          marker.style.left = `${{Math.min(100, scene.start / total * 100)}}%`;
+          markers.appendChild(marker);
+        }});
+        place();
+      }};
+
+      const load = (attempt) => {{
+        fetch(getSecureUrl('/scenes'))
+          .then(response => {{
+            if (response.status === 503 && attempt < 1800) {{
+              setTimeout(() => load(attempt + 1), 2000);
+              return null;
+            }}
+            return response.ok ? response.json() : null;
+          }})
+          .then(data => {{
+            if (!data || !data.scenes || !data.scenes.length) return;
+            scenes = data.scenes;
+            drawMarkers();
+            buttons.forEach(button => {{ button.disabled = scenes.length < 2; }});
+            prevButton.title = `Previous scene ([) — ${{scenes.length}} scenes`;
+            if (cropButton) cropButton.disabled = !data.letterboxed;
+          }})
+          .catch(() => {{}});
+      }};
+      load(0);
+      video.addEventListener('loadedmetadata', drawMarkers);
+
+      // Index of the scene shown at `time`
+      const findScene = (time) => {{
+        let lo = 0, hi = scenes.length - 1;
+        while (lo < hi) {{
+          const mid = (lo + hi + 1) >> 1;
+          if (scenes[mid].start <= time + 0.0001) lo = mid; else hi = mid - 1;
+        }}
+        return lo;
+      }};
+
+      const navigation = {{
+        step: (direction) => {{
+          if (scenes.length < 2) return;
+          let i = findScene(video.currentTime);
+          // Like a track skip: back goes to the start of this scene first
+          if (direction > 0) i += 1;
+          else if (video.currentTime - scenes[i].start < 0.5) i -= 1;
+          if (i < 0 || i >= scenes.length) return;
+          video.pause();
+          video.addEventListener('seeked', updatePreview, {{ once: true }});
+          video.currentTime = scenes[i].start + 0.001;
+        }},
+        current: () => scenes.length ? scenes[findScene(video.currentTime)] : null
+      }};
+      prevButton.addEventListener('click', () => navigation.step(-1));
+      nextButton.addEventListener('click', () => navigation.step(1));
+      return navigation;
+    }}
+
+    let cropPath = null;
+
+    function initCropPath(video, seekBar) {{
+      // Crop keyframes on the timeline; the server interpolates them (see /croppath) and /save exports a sendcmd script
+      const group = document.getElementById('cropPathGroup');
+      const statusEl = document.getElementById('cropPathStatus');
+      const interpolation = document.getElementById('cropPathInterpolation');
+      if (!group || !seekBar.parentElement) return null;
+      group.style.display = '';
+      let keyframes = [];
+      let path = null;
+      let request = 0;
+
+      const markers = document.createElement('div');
+      markers.className = 'scene-markers path-markers';
+      seekBar.parentElement.appendChild(markers);
+
+      const duration = () => isFinite(video.duration) && video.duration ? video.duration : (window.MEDIA_DURATION || 0);
+      const setStatus = (text) => {{ if (statusEl) {{ statusEl.textContent = text; statusEl.style.display = text ? '' : 'none'; }} }};
+
+      const drawMarkers = () => {{
+        markers.textContent = '';
+        markers.style.left = `${{seekBar.offsetLeft}}px`;
+        markers.style.width = `${{seekBar.offsetWidth}}px`;
+        const total = duration();
+        if (!total) return;
+        keyframes.forEach(keyframe => {{
+          const marker = document.createElement('div');
+          marker.className = 'path-marker';
+          marker.style.left = `${{Math.min(100, keyframe.t / total * 100)}}%`;
+          markers.appendChild(marker);
+        }});
+      }};
+      window.addEventListener('resize', drawMarkers);
+      video.addEventListener('loadedmetadata', drawMarkers);
+
+      // Asks the server for the interpolated segments; only the latest answer counts
+      const refresh = () => {{
+        drawMarkers();
+        path = null;
+        if (keyframes.length < 2) {{
+          setStatus(keyframes.length ? '1 keyframe — add another to make the crop move' : '');
+          return;
+        }}
+        const current = ++request;
+        fetch(getSecureUrl('/croppath'), {{
+          method: 'POST',
+          headers: {{ 'Content-Type': 'application/json' }},
+          body: JSON.stringify({{ keyframes, interpolation: interpolation ? interpolation.value : 'smooth' }})
+        }})
+          .then(response => {{
+            if (!response.ok) throw new Error(response.statusText || `status ${{response.status}}`);
+            return response.json();
+          }})
+          .then(data => {{
+            if (current !== request) return;
+            path = data;
+            setStatus(`${{keyframes.length}} keyframes, ${{data.w}}×${{data.h}} — the crop follows the path during playback`);
+          }})
+          .catch(e => {{ if (current === request) setStatus(`Path error: ${{e.message}}`); }});
+      }};
+      if (interpolation) interpolation.addEventListener('change', refresh);
+
+      // Position at `time` in original pixels: the segment's cubic, in Horner form
+      const positionAt = (time) => {{
+        const segments = path.segments;
+        if (!segments.length || time < segments[0].start) return path.start;
+        if (time >= segments[segments.length - 1].end) return path.end;
+        let lo = 0, hi = segments.length - 1;
+        while (lo < hi) {{
+          const mid = (lo + hi + 1) >> 1;
+          if (segments[mid].start <= time) lo = mid; else hi = mid - 1;
+        }}
+        const segment = segments[lo];
+        const u = (time - segment.start) / (segment.end - segment.start);
+        const evaluate = ([a, b, c, d]) => a + u * (b + u * (c + u * d));
+        return {{ x: evaluate(segment.x), y: evaluate(segment.y) }};
+      }};
+
+      const follow = () => {{
+        if (!path || !state.naturalWidth || !state.mediaWidth) return;
+        const position = positionAt(video.currentTime);
+        const scaleX = state.mediaWidth / state.naturalWidth;
+        const scaleY = state.mediaHeight / state.naturalHeight;
+        setCropDimensions(position.x * scaleX, position.y * scaleY, path.w * scaleX, path.h * scaleY);
+        updateCropInfo();
+      }};
+      video.addEventListener('seeked', follow);
+
+      return {{
+        follow,
+        keyframes: () => keyframes,
+        interpolation: () => interpolation ? interpolation.value : 'smooth',
+        add() {{
+          updateMediaDimensions();
+          const t = Math.round(video.currentTime * 1000) / 1000;
+          let w = parseInt(elements.actualW.value) || 0;
+          let h = parseInt(elements.actualH.value) || 0;
+          if (w <= 0 || h <= 0) return;
+          // The window keeps one size along the path: the first keyframe's
+          const others = keyframes.filter(keyframe => Math.abs(keyframe.t - t) >= 0.001);
+          if (others.length) {{ w = others[0].w; h = others[0].h; }}
+          const maxX = state.naturalWidth ? state.naturalWidth - w : Infinity;
+          const maxY = state.naturalHeight ? state.naturalHeight - h : Infinity;
+          const x = Math.max(0, Math.min(parseInt(elements.actualX.value) || 0, maxX));
+          const y = Math.max(0, Math.min(parseInt(elements.actualY.value) || 0, maxY));
+          keyframes = others.concat([{{ t, x, y, w, h }}]).sort((a, b) => a.t - b.t);
+          refresh();
+        }},
+        clear() {{
+          keyframes = [];
+          refresh();
+        }}
+      }};
+    }}
+
+    function addCropKeyframe() {{
+      if (cropPath) cropPath.add();
+    }}
+
+    function clearCropPath() {{
+      if (cropPath) cropPath.clear();
+    }}
+
     function initVideoControls() {{
       const video = elements.media;
       const controls = document.getElementById('videoControls');
@@ -369,28 +915,64 @@ def get_javascript_code(media_type, ext):
       }}
 
       playPause.addEventListener('click', togglePlayPause);
+      frameNavigation = initFrameNavigation(video);
+      sceneNavigation = initSceneNavigation(video, seekBar);
+      cropPath = initCropPath(video, seekBar);
+      const exactFrameItem = document.getElementById('exactFrameItem');
+      if (exactFrameItem) exactFrameItem.style.display = '';
+      const autoCropGroup = document.getElementById('autoCropGroup');
+      if (autoCropGroup) autoCropGroup.style.display = '';
       video.addEventListener('click', togglePlayPause);
 
       video.addEventListener('play', () => {{ playPause.textContent = '⏸️'; startPreviewRenderLoop(); }});
       video.addEventListener('pause', () => {{ playPause.textContent = '▶️'; stopPreviewRenderLoop(); }});
       video.addEventListener('ended', () => {{ playPause.textContent = '▶️'; stopPreviewRenderLoop(); video.currentTime = 0; }});
 
+      // A streamed remux reports Infinity until fully loaded; fall back to the probed duration
+      const mediaDuration = () => isFinite(video.duration) && video.duration ? video.duration : (window.MEDIA_DURATION || 0);
+
       let isSeeking = false;
+      // While dragging with thumbnails available only the preview follows; the seek waits for release
+      let pendingSeek = null;
+      const seekThumbnails = initSeekThumbnails(seekBar);
+
+      const commitSeek = () => {{
+        if (pendingSeek === null) return;
+        if (isFinite(pendingSeek)) video.currentTime = pendingSeek;
+        pendingSeek = null;
+        seekThumbnails.hide();
+        updatePreview();
+      }};
       
-      seekBar.addEventListener('mousedown', () => {{ isSeeking = true; if(!video.paused) stopPreviewRenderLoop(); }});
-      seekBar.addEventListener('mouseup', () => {{ isSeeking = false; if (!video.paused) startPreviewRenderLoop(); }});
+      seekBar.addEventListener('pointerdown', () => {{ isSeeking = true; if(!video.paused) stopPreviewRenderLoop(); }});
+      seekBar.addEventListener('pointerup', () => {{ isSeeking = false; commitSeek(); if (!video.paused) startPreviewRenderLoop(); }});
+      seekBar.addEventListener('pointercancel', () => {{ isSeeking = false; commitSeek(); }});
+      seekBar.addEventListener('change', commitSeek);
+
+      seekBar.addEventListener('pointermove', (e) => {{
+        if (isSeeking) return;
+        const rect = seekBar.getBoundingClientRect();
+        const fraction = rect.width ? (e.clientX - rect.left) / rect.width : 0;
+        seekThumbnails.show(fraction * mediaDuration(), fraction);
+      }});
+      seekBar.addEventListener('pointerleave', () => {{ if (!isSeeking) seekThumbnails.hide(); }});
       
       seekBar.addEventListener('input', (e) => {{
-        const time = (e.target.value / 100) * video.duration;
-        if(isFinite(time)) video.currentTime = time;
+        const time = (e.target.value / 100) * mediaDuration();
         currentTimeEl.textContent = utils.formatTime(time);
+        if (isSeeking && seekThumbnails.available()) {{
+          pendingSeek = time;
+          seekThumbnails.show(time, e.target.value / 100);
+          return;
+        }}
+        if(isFinite(time)) video.currentTime = time;
         updatePreview();
       }});
 
       video.addEventListener('timeupdate', () => {{
-        if (video.duration) {{
+        if (mediaDuration()) {{
             if (!isSeeking) {{
-                const value = (video.currentTime / video.duration) * 100;
+                const value = (video.currentTime / mediaDuration()) * 100;
                 seekBar.value = value;
             }}
             currentTimeEl.textContent = utils.formatTime(video.currentTime);
@@ -398,10 +980,12 @@ def get_javascript_code(media_type, ext):
       }});
 
       video.addEventListener('loadedmetadata', () => {{
-        durationEl.textContent = utils.formatTime(video.duration);
+        durationEl.textContent = utils.formatTime(mediaDuration());
         seekBar.max = 100;
-        if (video.videoWidth && video.videoHeight) {{
-            elements.naturalResInfo.textContent = `${{video.videoWidth}}×${{video.videoHeight}}`;
+        const naturalWidth = window.MEDIA_NATURAL_WIDTH || video.videoWidth;
+        const naturalHeight = window.MEDIA_NATURAL_HEIGHT || video.videoHeight;
+        if (naturalWidth && naturalHeight) {{
+            elements.naturalResInfo.textContent = `${{naturalWidth}}×${{naturalHeight}}`;
         }}
       }});
 
@@ -454,11 +1038,17 @@ def get_javascript_code(media_type, ext):
         }}
         
         if (state.mediaType === 'image' && elements.media) {{
-            elements.naturalResInfo.textContent = `${{elements.media.naturalWidth}}×${{elements.media.naturalHeight}}`;
+            elements.naturalResInfo.textContent = `${{state.naturalWidth}}×${{state.naturalHeight}}`;
         }}
 
         state.isInitialized = true;
         hideLoading();
+
+        if (window.MEDIA_TILES && elements.mediaViewer) {{
+            elements.mediaViewer.addEventListener('scroll', scheduleTileRefresh, {{ passive: true }});
+            window.addEventListener('resize', scheduleTileRefresh);
+            scheduleTileRefresh();
+        }}
         
         if (elements.crop) {{
             elements.crop.focus();
@@ -491,11 +1081,13 @@ def get_javascript_code(media_type, ext):
         if (!elements.media) return;
       
         if (elements.media.tagName === 'IMG') {{
-          state.naturalWidth = elements.media.naturalWidth || state.mediaWidth;
-          state.naturalHeight = elements.media.naturalHeight || state.mediaHeight;
+          // A converted preview may be downscaled; coordinates use the original's size
+          state.naturalWidth = window.MEDIA_NATURAL_WIDTH || elements.media.naturalWidth || state.mediaWidth;
+          state.naturalHeight = window.MEDIA_NATURAL_HEIGHT || elements.media.naturalHeight || state.mediaHeight;
         }} else if (elements.media.tagName === 'VIDEO') {{
-          state.naturalWidth = elements.media.videoWidth || state.mediaWidth;
-          state.naturalHeight = elements.media.videoHeight || state.mediaHeight;
+          // A proxy is smaller than the original; coordinates use the original's size
+          state.naturalWidth = window.MEDIA_NATURAL_WIDTH || elements.media.videoWidth || state.mediaWidth;
+          state.naturalHeight = window.MEDIA_NATURAL_HEIGHT || elements.media.videoHeight || state.mediaHeight;
         }} else if (elements.media.tagName === 'AUDIO') {{
             state.naturalWidth = 500; 
             state.naturalHeight = 50; 
@@ -530,6 +1122,59 @@ def get_javascript_code(media_type, ext):
         }});
     }}
 
+    function watchProxyJob() {{
+      const media = document.getElementById('media');
+      if (!media || !(media.getAttribute('data-src') || '').startsWith('/proxy')) return;
+      const detail = document.getElementById('proxyDetail');
+      const statusEl = document.getElementById('proxyStatus');
+      const loadingText = document.querySelector('.loading-text');
+      if (detail) detail.style.display = '';
+
+      const poll = () => {{
+        fetch(getSecureUrl('/jobs'), {{ cache: 'no-store' }})
+          .then(response => response.json())
+          .then(jobs => {{
+            const job = jobs.proxy;
+            if (!job) {{
+              setTimeout(poll, 1000);
+              return;
+            }}
+            let text;
+            if (job.state === 'done') text = 'Ready';
+            else if (job.state === 'failed') text = 'Failed';
+            else text = job.progress !== null ? `${{Math.round(job.progress * 100)}}%` : utils.formatFileSize(job.bytes);
+            if (statusEl) statusEl.textContent = text;
+            if (loadingText && !state.isInitialized) loadingText.textContent = `Preparing preview proxy... ${{text}}`;
+            if (job.state === 'running') setTimeout(poll, 1000);
+          }})
+          .catch(() => {{
+            if (statusEl) statusEl.textContent = 'N/A';
+          }});
+      }};
+      poll();
+    }}
+
+    function watchPreviewSize() {{
+      // A page rendered before the preview finished converting may carry the
+      // probe's size; the finished conversion knows the original's.
+      const media = document.getElementById('media');
+      if (!media || !(media.getAttribute('data-src') || '').startsWith('/preview')) return;
+      media.addEventListener('load', () => {{
+        fetch(getSecureUrl('/jobs'), {{ cache: 'no-store' }})
+          .then(response => response.json())
+          .then(jobs => {{
+            const job = jobs.preview;
+            if (!job || !job.width || !job.height) return;
+            if (job.width === window.MEDIA_NATURAL_WIDTH && job.height === window.MEDIA_NATURAL_HEIGHT) return;
+            window.MEDIA_NATURAL_WIDTH = job.width;
+            window.MEDIA_NATURAL_HEIGHT = job.height;
+            updateMediaDimensions();
+            updateCropInfo();
+          }})
+          .catch(() => {{}});
+      }}, {{ once: true }});
+    }}
+
     function positionCropBox() {{
       if (state.mediaWidth === 0 || state.mediaHeight === 0 || !elements.crop) return;
       
@@ -734,6 +1379,7 @@ def get_javascript_code(media_type, ext):
       
       updateMediaDimensions();
       updateCropInfo();
+      if (window.MEDIA_TILES) scheduleTileRefresh();
       
       if (!initialLoad) {{
           saveCropToStorage();
@@ -1178,6 +1824,18 @@ def get_javascript_code(media_type, ext):
           e.preventDefault(); centerCrop(); break;
         case 'g': case 'G':
           e.preventDefault(); toggleGrid(); break;
+        case ',': case '.':
+          if (!frameNavigation) return;
+          e.preventDefault(); frameNavigation.step(e.key === ',' ? -1 : 1); break;
+        case 'k': case 'K':
+          if (!frameNavigation) return;
+          e.preventDefault(); frameNavigation.snapToKeyframe(); break;
+        case '[': case ']':
+          if (!sceneNavigation) return;
+          e.preventDefault(); sceneNavigation.step(e.key === '[' ? -1 : 1); break;
+        case 'p': case 'P':
+          if (!cropPath) return;
+          e.preventDefault(); cropPath.add(); break;
         case 'Enter':
           if (document.activeElement === elements.crop) {{
             e.preventDefault(); 
@@ -1210,6 +1868,82 @@ def get_javascript_code(media_type, ext):
       }}
     }}
 
+    function openExactFrame() {{
+      // The crop at the current time, decoded by ffmpeg from the original (see /frame)
+      if (state.mediaType !== 'video' || !elements.media) return;
+      updateMediaDimensions();
+      const x = parseInt(elements.actualX.value) || 0;
+      const y = parseInt(elements.actualY.value) || 0;
+      const w = parseInt(elements.actualW.value) || 0;
+      const h = parseInt(elements.actualH.value) || 0;
+      if (w <= 0 || h <= 0) return;
+      const t = elements.media.currentTime.toFixed(6);
+      window.open(getSecureUrl(`/frame?t=${{t}}&crop=${{x}}:${{y}}:${{w}}:${{h}}&format=png`), '_blank');
+    }}
+
+    function detectBlackBars() {{
+      // Sampled cropdetect on the server, progress streamed as server-sent events (see /autocrop/events)
+      const button = document.getElementById('autoCropButton');
+      const statusEl = document.getElementById('autoCropStatus');
+      if (state.mediaType !== 'video' || !button || button.disabled) return;
+      const setStatus = (text) => {{ if (statusEl) {{ statusEl.textContent = text; statusEl.style.display = ''; }} }};
+      button.disabled = true;
+      setStatus('Analysing...');
+
+      const events = new EventSource(getSecureUrl('/autocrop/events'));
+      const finish = (text) => {{
+        events.close();
+        button.disabled = false;
+        setStatus(text);
+      }};
+      events.addEventListener('progress', (e) => {{
+        const progress = JSON.parse(e.data);
+        setStatus(`Analysing... ${{progress.done}}/${{progress.windows}}`);
+      }});
+      events.addEventListener('result', (e) => {{
+        const result = JSON.parse(e.data);
+        if (!result) {{
+          finish('No picture found');
+        }} else if (result.fullFrame) {{
+          finish('No black bars found');
+        }} else {{
+          applyDetectedCrop(result);
+          const confidence = Math.round(result.confidence * 100);
+          finish(`${{result.w}}×${{result.h}} at ${{result.x}},${{result.y}} (${{confidence}}% of samples agree)`);
+        }}
+      }});
+      events.addEventListener('failed', (e) => finish(`Failed: ${{JSON.parse(e.data).error}}`));
+      events.onerror = () => {{
+        if (events.readyState !== EventSource.CLOSED) finish('Connection lost');
+      }};
+    }}
+
+    function applySceneCrop() {{
+      // The scene's black bars were measured with the scene index; no request needed
+      const statusEl = document.getElementById('autoCropStatus');
+      const scene = sceneNavigation ? sceneNavigation.current() : null;
+      if (!scene) return;
+      let text;
+      if (scene.crop) {{
+        applyDetectedCrop(scene.crop);
+        text = `Scene at ${{utils.formatTime(scene.start)}}: ${{scene.crop.w}}×${{scene.crop.h}} at ${{scene.crop.x}},${{scene.crop.y}}`;
+      }} else {{
+        text = `No black bars in the scene at ${{utils.formatTime(scene.start)}}`;
+      }}
+      if (statusEl) {{ statusEl.textContent = text; statusEl.style.display = ''; }}
+    }}
+
+    function applyDetectedCrop(result) {{
+      if (!state.naturalWidth || !state.mediaWidth) return;
+      updateMediaDimensions();
+      const scaleX = state.mediaWidth / state.naturalWidth;
+      const scaleY = state.mediaHeight / state.naturalHeight;
+      applyCropState(state.zoom, result.x * scaleX, result.y * scaleY, result.w * scaleX, result.h * scaleY);
+      updateCropInfo();
+      updatePreview();
+      saveCropToStorage();
+    }}
+
     function toggleGrid() {{
       state.showGrid = !state.showGrid;
       if(elements.crop) elements.crop.classList.toggle('show-grid', state.showGrid);
@@ -1401,13 +2135,21 @@ def get_javascript_code(media_type, ext):
            }}
        }}
 
+      const payload = {{
+        x: finalX, y: finalY, w: finalW, h: finalH,
+        // An animated image previewed through a video proxy is still saved as an image
+        mediaType: window.MEDIA_SAVE_TYPE || state.mediaType
+      }};
+      if (cropPath && cropPath.keyframes().length > 1) {{
+        // A moving crop: the server writes the path as a sendcmd script for the crop filter
+        payload.keyframes = cropPath.keyframes();
+        payload.interpolation = cropPath.interpolation();
+      }}
+
       fetch(getSecureUrl("/save"), {{
         method: "POST",
         headers: {{ "Content-Type": "application/json" }},
-        body: JSON.stringify({{ 
-          x: finalX, y: finalY, w: finalW, h: finalH,
-          mediaType: state.mediaType
-        }})
+        body: JSON.stringify(payload)
       }})
       .then(response => {{
         if (response.ok) {{
@@ -1913,6 +2655,9 @@ def get_javascript_code(media_type, ext):
           hideLoading();
       }};
 
+      watchProxyJob();
+      watchPreviewSize();
+
       if (mediaElement) {{
           const mediaUrl_dataSrc = mediaElement.getAttribute('data-src');
           
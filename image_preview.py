@@ -0,0 +1,219 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import sys
+import json
+import subprocess
+import threading
+
+try:
+    from PIL import Image, features
+except ImportError:
+    Image = None
+else:
+    try:
+        import pillow_heif
+        pillow_heif.register_heif_opener()
+    except ImportError:
+        pass
+
+from file_delivery import MediaFile
+from utils import get_cache_dir, source_fingerprint, prune_cache_dir
+
+# Still image formats most browsers can't decode in an <img>
+PREVIEW_IMAGE_EXTS = [".heic", ".heif", ".tiff", ".tif", ".jxl"]
+
+# Longest side of the converted preview (WebP itself tops out at 16383)
+MAX_PREVIEW_DIMENSION = 8192
+
+# How long a /preview request waits for a conversion still in progress
+PREVIEW_WAIT_SECONDS = 60
+
+PREVIEW_CACHE_MAX_BYTES = 1024 * 1024 * 1024
+
+# Bump when the conversion settings change so stale cache entries miss
+PREVIEW_FORMAT_VERSION = 2
+
+_PREVIEW_CONTENT_TYPES = {".webp": "image/webp", ".png": "image/png"}
+
+
+def fit_within(width, height, max_dimension=MAX_PREVIEW_DIMENSION):
+    """Scales (width, height) down to fit max_dimension, keeping the aspect ratio."""
+    scale = min(1.0, max_dimension / max(width, height))
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
+
+def browser_mode(image):
+    """
+    `image` as RGB, or RGBA when it has (or may have) transparency, ready
+    for WebP/PNG. 16-bit and float images are scaled down to 8 bits
+    rather than clipped, which would turn them near-white.
+    """
+    if image.mode in ("I;16", "I;16L", "I;16B", "I;16N", "I"):
+        image = image.convert("I").point(lambda value: value * (1 / 256)).convert("L")
+    elif image.mode == "F":
+        low, high = image.getextrema()
+        scale = 255 / (high - low) if high > low else 0
+        image = image.point(lambda value: (value - low) * scale).convert("L")
+    if image.mode in ("RGB", "RGBA"):
+        return image
+    transparent = image.mode in ("P", "PA", "LA", "La", "RGBa") or "transparency" in image.info
+    return image.convert("RGBA" if transparent else "RGB")
+
+
+def _convert_with_pillow(src, dest_base):
+    """Returns (path, natural_width, natural_height), or None if Pillow can't read the file."""
+    try:
+        image = Image.open(src)
+        natural = image.size
+        # Before resizing: palette images would be resized nearest-neighbour
+        image = browser_mode(image)
+        image.thumbnail(fit_within(*natural))
+    except Exception:
+        return None
+    if features.check("webp"):
+        path = dest_base + ".webp"
+        image.save(path + ".part", format="WEBP", quality=90, method=4)
+    else:
+        path = dest_base + ".png"
+        image.save(path + ".part", format="PNG", compress_level=1)
+    os.replace(path + ".part", path)
+    return path, natural[0], natural[1]
+
+
+def _convert_with_ffmpeg(src, dest_base, natural, verbose=False):
+    """Returns (path, natural_width, natural_height); WebP when ffmpeg has libwebp, PNG otherwise."""
+    bound = f"'min(iw,{MAX_PREVIEW_DIMENSION})':'min(ih,{MAX_PREVIEW_DIMENSION})':force_original_aspect_ratio=decrease"
+    attempts = [
+        (".webp", ["-c:v", "libwebp", "-quality", "90", "-f", "webp"]),
+        (".png", ["-c:v", "png", "-f", "image2", "-update", "1"]),
+    ]
+    error = None
+    for ext, codec in attempts:
+        path = dest_base + ext
+        command = [
+            "ffmpeg", "-v", "error", "-nostdin", "-y",
+            "-i", src, "-frames:v", "1", "-vf", f"scale={bound}",
+        ] + codec + [path + ".part"]
+        if verbose:
+            print(f"Converting preview: {' '.join(command)}")
+        try:
+            subprocess.run(command, capture_output=True, check=True)
+        except FileNotFoundError:
+            raise RuntimeError("'ffmpeg' command not found in PATH.")
+        except subprocess.CalledProcessError as e:
+            error = e.stderr.decode("utf-8", "replace").strip() or f"ffmpeg exited with status {e.returncode}"
+            continue
+        os.replace(path + ".part", path)
+        return path, natural[0], natural[1]
+    raise RuntimeError(error)
+
+
+class ImagePreview:
+    """
+    Background conversion of one still image to a browser-friendly WebP
+    (or PNG) preview, cached on disk by source fingerprint together with
+    the original's natural dimensions. Pillow is used when installed
+    (with pillow-heif for HEIC if present), ffmpeg otherwise. Previews
+    have their own cache subdirectory, pruned to PREVIEW_CACHE_MAX_BYTES.
+    """
+
+    def __init__(self, file_path, probe=None, cache_dir=None, verbose=False):
+        self.file_path = file_path
+        self.cache_dir = cache_dir or os.path.join(get_cache_dir(), "previews")
+        self.verbose = verbose
+        probe = probe or {}
+        self.natural_size = (probe.get('width', 0), probe.get('height', 0))
+        self.path = None
+        self.handle = None
+        self.error = None
+        self._done = threading.Event()
+        self._thread = None
+
+    @property
+    def done(self):
+        return self._done.is_set()
+
+    @property
+    def failed(self):
+        return self.error is not None
+
+    @property
+    def content_type(self):
+        return _PREVIEW_CONTENT_TYPES.get(os.path.splitext(self.path or "")[1], "application/octet-stream")
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="mediacrop-preview", daemon=True)
+            self._thread.start()
+        return self
+
+    def wait(self, timeout=None):
+        """Blocks until the preview is ready or failed; False on timeout."""
+        return self._done.wait(timeout)
+
+    def close(self):
+        if self.handle is not None:
+            self.handle.close()
+
+    def status(self):
+        """Progress summary for the /jobs endpoint."""
+        if self.failed:
+            state = "failed"
+        elif self.done:
+            state = "done"
+        else:
+            state = "running"
+        status = {"state": state, "progress": 1.0 if state == "done" else None, "error": self.error}
+        if state == "done":
+            status["width"], status["height"] = self.natural_size
+        return status
+
+    def _run(self):
+        try:
+            base = os.path.join(
+                self.cache_dir,
+                f"preview-{source_fingerprint(self.file_path)}-v{PREVIEW_FORMAT_VERSION}"
+            )
+            path, width, height = self._load_cached(base) or self._convert(base)
+            self.natural_size = (width, height)
+            self.handle = MediaFile(path)
+            self.path = path
+        except Exception as e:
+            self.error = str(e)
+            print(f"Preview conversion error: {e}", file=sys.stderr)
+        finally:
+            self._done.set()
+
+    def _load_cached(self, base):
+        try:
+            with open(base + ".json", encoding="utf-8") as f:
+                meta = json.load(f)
+            path = os.path.join(self.cache_dir, meta["file"])
+            if not os.path.exists(path):
+                return None
+        except (OSError, ValueError, KeyError):
+            return None
+        if self.verbose:
+            print(f"Using cached preview: {path}")
+        # Touch so pruning treats it as recently used
+        os.utime(base + ".json")
+        os.utime(path)
+        return path, meta["width"], meta["height"]
+
+    def _convert(self, base):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        # Previews have their own subdirectory and budget; keep this one's files
+        keep = [base + suffix for suffix in (".json", ".webp", ".png", ".webp.part", ".png.part")]
+        prune_cache_dir(self.cache_dir, PREVIEW_CACHE_MAX_BYTES, keep=keep)
+        result = None
+        if Image is not None:
+            result = _convert_with_pillow(self.file_path, base)
+        if result is None:
+            result = _convert_with_ffmpeg(self.file_path, base, self.natural_size, self.verbose)
+        path, width, height = result
+        with open(base + ".json", "w", encoding="utf-8") as f:
+            json.dump({"file": os.path.basename(path), "width": width, "height": height}, f)
+        return result
+
@@ -0,0 +1,209 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import bisect
+import struct
+import threading
+
+from file_delivery import pread_into
+
+# Boxes walked on the way from moov down to the chunk offset tables
+_CONTAINER_BOXES = {b"moov", b"trak", b"mdia", b"minf", b"stbl"}
+
+# A moov larger than this is not rewritten in memory
+MAX_MOOV_SIZE = 256 * 1024 * 1024
+
+
+def _read_exact(f, offset, length):
+    buf = bytearray(length)
+    view = memoryview(buf)
+    read = 0
+    while read < length:
+        n = pread_into(f, view[read:], offset + read)
+        if not n:
+            break
+        read += n
+    return bytes(view[:read])
+
+
+def read_top_level_boxes(f, file_size):
+    """
+    Returns [(type, offset, size)] for the top-level boxes of an ISO-BMFF
+    file, or None when the file doesn't parse as one.
+    """
+    boxes = []
+    offset = 0
+    while offset < file_size:
+        header = _read_exact(f, offset, 16)
+        if len(header) < 8:
+            return None
+        size, box_type = struct.unpack(">I4s", header[:8])
+        if size == 1:
+            if len(header) < 16:
+                return None
+            size = struct.unpack(">Q", header[8:16])[0]
+        elif size == 0:
+            size = file_size - offset
+        if size < 8 or offset + size > file_size:
+            return None
+        boxes.append((box_type, offset, size))
+        offset += size
+    return boxes
+
+
+def _iter_children(data, start, end):
+    """Yields (type, offset, size, header_size) for boxes within data[start:end]."""
+    offset = start
+    while offset + 8 <= end:
+        size, box_type = struct.unpack_from(">I4s", data, offset)
+        header_size = 8
+        if size == 1:
+            if offset + 16 > end:
+                return
+            size = struct.unpack_from(">Q", data, offset + 8)[0]
+            header_size = 16
+        elif size == 0:
+            size = end - offset
+        if size < header_size or offset + size > end:
+            return
+        yield box_type, offset, size, header_size
+        offset += size
+
+
+def _rewrite_chunk_offsets(moov, translate):
+    """
+    Rewrites every stco/co64 table inside `moov` (a bytearray) in place with
+    translate(old_offset). Returns False if an stco entry would overflow.
+    """
+    stack = [(0, len(moov))]
+    while stack:
+        start, end = stack.pop()
+        for box_type, offset, size, header_size in _iter_children(moov, start, end):
+            body = offset + header_size
+            if box_type in _CONTAINER_BOXES:
+                stack.append((body, offset + size))
+            elif box_type in (b"stco", b"co64"):
+                entry_size = 4 if box_type == b"stco" else 8
+                fmt = ">I" if box_type == b"stco" else ">Q"
+                if body + 8 > offset + size:
+                    return False
+                count = struct.unpack_from(">I", moov, body + 4)[0]
+                table = body + 8
+                if table + count * entry_size > offset + size:
+                    return False
+                for i in range(count):
+                    position = table + i * entry_size
+                    new_offset = translate(struct.unpack_from(fmt, moov, position)[0])
+                    if entry_size == 4 and new_offset > 0xFFFFFFFF:
+                        return False
+                    struct.pack_into(fmt, moov, position, new_offset)
+    return True
+
+
+class VirtualLayout:
+    """
+    A byte layout assembled from in-memory segments (the rewritten moov)
+    and ranges of the physical file. Its size equals the physical size.
+    """
+
+    def __init__(self, segments):
+        # segments: [(virtual_start, length, data_or_None, file_offset)]
+        self.segments = segments
+        self.size = sum(length for _, length, _, _ in segments)
+        self._starts = [start for start, _, _, _ in segments]
+
+    def iter_range(self, offset, count):
+        """
+        Yields pieces covering [offset, offset+count): ('bytes', memoryview)
+        for in-memory data or ('file', physical_offset, length).
+        """
+        end = offset + count
+        index = bisect.bisect_right(self._starts, offset) - 1
+        while offset < end and index < len(self.segments):
+            start, length, data, file_offset = self.segments[index]
+            within = offset - start
+            n = min(length - within, end - offset)
+            if data is not None:
+                yield ('bytes', memoryview(data)[within:within + n])
+            else:
+                yield ('file', file_offset + within, n)
+            offset += n
+            index += 1
+
+
+def build_faststart_layout(f, file_size):
+    """
+    Returns a VirtualLayout that places moov before the first mdat, with
+    chunk offsets rewritten to match, or None when the file isn't an
+    ISO-BMFF file with a trailing moov (or can't be rewritten safely).
+    The physical file is never modified.
+    """
+    boxes = read_top_level_boxes(f, file_size)
+    if not boxes:
+        return None
+    types = [box[0] for box in boxes]
+    if b"moov" not in types or b"mdat" not in types or b"moof" in types:
+        return None
+
+    moov_index = types.index(b"moov")
+    mdat_index = types.index(b"mdat")
+    if moov_index < mdat_index:
+        return None
+
+    _, moov_offset, moov_size = boxes[moov_index]
+    if moov_size > MAX_MOOV_SIZE:
+        return None
+
+    order = boxes[:mdat_index] + [boxes[moov_index]] + [
+        box for i, box in enumerate(boxes[mdat_index:], mdat_index) if i != moov_index
+    ]
+
+    # Old start -> new start for every top-level box
+    old_starts = sorted(box[1] for box in boxes)
+    new_start_of = {}
+    position = 0
+    for _, offset, size in order:
+        new_start_of[offset] = position
+        position += size
+
+    def translate(old_offset):
+        i = bisect.bisect_right(old_starts, old_offset) - 1
+        if i < 0:
+            return old_offset
+        box_start = old_starts[i]
+        return new_start_of[box_start] + (old_offset - box_start)
+
+    moov = bytearray(_read_exact(f, moov_offset, moov_size))
+    if len(moov) != moov_size or not _rewrite_chunk_offsets(moov, translate):
+        return None
+
+    segments = []
+    position = 0
+    for _, offset, size in order:
+        if offset == moov_offset:
+            segments.append((position, size, bytes(moov), None))
+        elif segments and segments[-1][2] is None and segments[-1][3] + segments[-1][1] == offset:
+            start, length, _, file_offset = segments[-1]
+            segments[-1] = (start, length + size, None, file_offset)
+        else:
+            segments.append((position, size, None, offset))
+        position += size
+    return VirtualLayout(segments)
+
+
+class FaststartCache:
+    """Builds the faststart layout once per file version."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = None
+        self._layout = None
+
+    def get(self, f, st, version):
+        with self._lock:
+            if version == self._version:
+                return self._layout
+            layout = build_faststart_layout(f, st.st_size)
+            self._version = version
+            self._layout = layout
+            return layout
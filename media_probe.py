@@ -0,0 +1,147 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import sys
+import json
+import subprocess
+import threading
+
+
+def _empty_probe():
+    return {
+        'rotation': 0,
+        'width': 0,
+        'height': 0,
+        'duration': 0.0,
+        'video_codec': None,
+        'audio_codec': None,
+        'pix_fmt': None,
+    }
+
+
+def _parse_rotation(stream, verbose=False):
+    """Extracts the rotation angle (0, 90, 180, 270) from an ffprobe stream."""
+    # Check side data first (common in MP4/MOV)
+    for side_data in stream.get("side_data_list", []):
+        if side_data.get("side_data_type") == "Display Matrix":
+            # 'rotation' key might be present directly
+            rotation = side_data.get("rotation")
+            if rotation:
+                # Clean up potential negative values like -90
+                angle = int(float(rotation)) % 360
+                if angle < 0: angle += 360
+                if verbose: print(f"Rotation (Matrix): {angle} deg")
+                return angle
+
+    # Fallback to tags (common in MKV)
+    if "tags" in stream and "rotate" in stream["tags"]:
+        angle = int(float(stream["tags"]["rotate"])) % 360
+        if angle < 0: angle += 360
+        if verbose: print(f"Rotation (Tags): {angle} deg")
+        return angle
+
+    if verbose: print("No rotation metadata found.")
+    return 0
+
+
+def probe_media(file_path, verbose=False):
+    """
+    Runs ffprobe once and returns a dict with rotation, dimensions,
+    duration, codecs and pixel format. Missing values fall back to
+    zero/None so callers never have to handle a failed probe.
+    """
+    info = _empty_probe()
+
+    # We assume ffprobe is in the system PATH (part of FFmpeg suite)
+    command = [
+        "ffprobe",
+        "-v", "quiet",
+        "-print_format", "json",
+        "-show_streams",
+        "-show_format",
+        file_path
+    ]
+
+    try:
+        result = subprocess.run(command, capture_output=True, text=True, check=True, encoding='utf-8')
+        data = json.loads(result.stdout)
+    except FileNotFoundError:
+        print("---", file=sys.stderr)
+        print("WARNING: 'ffprobe' command not found in PATH.", file=sys.stderr)
+        print("Rotation metadata check will be skipped.", file=sys.stderr)
+        print("Install FFmpeg (which includes ffprobe) to fix this.", file=sys.stderr)
+        print("---", file=sys.stderr)
+        return info
+    except subprocess.CalledProcessError as e:
+        if verbose:
+            print(f"ffprobe error: {e.stderr}", file=sys.stderr)
+        return info
+    except json.JSONDecodeError:
+        if verbose:
+            print("Failed to parse ffprobe JSON output.", file=sys.stderr)
+        return info
+    except Exception as e:
+        if verbose:
+            print(f"Error probing media: {e}", file=sys.stderr)
+        return info
+
+    streams = data.get("streams") or []
+    video_streams = [s for s in streams if s.get("codec_type") == "video"]
+    audio_streams = [s for s in streams if s.get("codec_type") == "audio"]
+
+    if video_streams:
+        stream = video_streams[0]
+        info['rotation'] = _parse_rotation(stream, verbose)
+        info['width'] = int(stream.get("width") or 0)
+        info['height'] = int(stream.get("height") or 0)
+        info['video_codec'] = stream.get("codec_name")
+        info['pix_fmt'] = stream.get("pix_fmt")
+    elif verbose:
+        print("ffprobe: No video streams found.", file=sys.stderr)
+
+    if audio_streams:
+        info['audio_codec'] = audio_streams[0].get("codec_name")
+
+    try:
+        info['duration'] = float(data.get("format", {}).get("duration") or 0.0)
+    except (TypeError, ValueError):
+        info['duration'] = 0.0
+
+    return info
+
+
+def stat_key(file_path):
+    """Returns the (path, size, mtime, inode) tuple that identifies a file version."""
+    st = os.stat(file_path)
+    return (os.path.abspath(file_path), st.st_size, st.st_mtime_ns, st.st_ino)
+
+
+class ProbeCache:
+    """
+    Per-server cache of ffprobe results keyed by (path, size, mtime, inode).
+    A file is probed again only when its stat key changes.
+    """
+
+    def __init__(self, verbose=False):
+        self.verbose = verbose
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, file_path):
+        try:
+            key = stat_key(file_path)
+        except OSError:
+            return _empty_probe()
+
+        path = key[0]
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and entry[0] == key:
+                return entry[1]
+
+            if self.verbose:
+                print(f"Probing media: {path}")
+            info = probe_media(path, self.verbose)
+            self._entries[path] = (key, info)
+            return info
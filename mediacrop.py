@@ -9,11 +9,25 @@ import time
 import subprocess
 import argparse
 import uuid
-from http.server import BaseHTTPRequestHandler, HTTPServer
+from http.server import BaseHTTPRequestHandler
 from urllib.parse import urlparse
 
-from http_handler import CropHandler
+from http_handler import (
+    CropHandler, get_page_assets, get_remux_spool, get_proxy_spool, get_image_preview,
+    get_tile_pyramid, plays_from_proxy, job_caches
+)
+from crop_server import CropServer, DEFAULT_WORKERS, DEFAULT_MAX_CLIENT_CONNECTIONS
 from utils import get_file_info
+from media_probe import ProbeCache
+from asset_cache import RenderedAssetCache
+from file_delivery import MediaFile
+from block_cache import BlockCache, DEFAULT_CACHE_MB
+from isobmff import FaststartCache
+from transcode import SpoolCache, can_remux
+from proxy import ProxyCache
+from image_preview import PREVIEW_IMAGE_EXTS
+from tiles import needs_tiles
+from frame_grab import FrameCache
 
 # Global variables
 media_file = None
@@ -32,13 +46,37 @@ def port_type(value):
     except ValueError:
         raise argparse.ArgumentTypeError(f"Invalid port number: {value}")
 
+def positive_int(value):
+    """Custom type for argparse to validate a positive integer."""
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Invalid number: {value}")
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"Value must be at least 1. Got {number}.")
+    return number
+
+def non_negative_int(value):
+    """Custom type for argparse to validate a non-negative integer."""
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Invalid number: {value}")
+    if number < 0:
+        raise argparse.ArgumentTypeError(f"Value cannot be negative. Got {number}.")
+    return number
+
 def parse_arguments():
     """Parses command-line arguments using argparse for robustness."""
 
     help_epilog = """
 Supported Preview Formats:
   Images : JPG, PNG, WEBP, AVIF, GIF, BMP, SVG, ICO
+           HEIC, HEIF, TIFF, JXL (converted to a cached WebP/PNG preview)
   Videos : MP4, WEBM, MOV, OGV
+           MKV, TS, M2TS, AVI, FLV (H.264/VP9/AV1, remuxed on the fly)
+           HEVC, ProRes, DNxHD, 10-bit, >4K, MXF, MPG, WMV (via a cached H.264 proxy)
+  Animated: GIF, APNG, WebP over 4 MB play from the same video proxy
   Audio  : MP3, WAV, FLAC, OGG, M4A, AAC, OPUS
 
 Author Info:
@@ -83,6 +121,32 @@ A CLI tool featuring a localhost web interface for visually determining FFmpeg c
         action='store_true',
         help='Protect the server with a one-time security token.'
     )
+    parser.add_argument(
+        '--workers',
+        type=positive_int,
+        default=DEFAULT_WORKERS,
+        metavar='N',
+        help=f'Number of worker threads serving requests (default: {DEFAULT_WORKERS}).'
+    )
+    parser.add_argument(
+        '--max-client-connections',
+        type=positive_int,
+        default=DEFAULT_MAX_CLIENT_CONNECTIONS,
+        metavar='N',
+        help=f'Maximum simultaneous connections per client (default: {DEFAULT_MAX_CLIENT_CONNECTIONS}).'
+    )
+    parser.add_argument(
+        '--cache-mb',
+        type=non_negative_int,
+        default=DEFAULT_CACHE_MB,
+        metavar='MB',
+        help=f'Memory for the hot-range block cache in front of /file; 0 disables it (default: {DEFAULT_CACHE_MB}).'
+    )
+    parser.add_argument(
+        '--faststart',
+        action='store_true',
+        help='Serve MP4/MOV files whose moov atom is at the end with moov moved to the front (virtual view; the file is not modified).'
+    )
     parser.add_argument(
         '--version',
         action='version',
@@ -195,10 +259,24 @@ def main():
     
     for attempt in range(max_attempts):
         try:
-            server = HTTPServer((host, port), CropHandler)
+            server = CropServer(
+                (host, port), CropHandler,
+                workers=args.workers,
+                max_client_connections=args.max_client_connections
+            )
             server.media_file = media_file
             server.verbose = verbose
             server.auth_token = auth_token
+            server.probe_cache = ProbeCache(verbose)
+            server.asset_cache = RenderedAssetCache()
+            server.media_handle = MediaFile(media_file)
+            server.block_cache = BlockCache(args.cache_mb * 1024 * 1024) if args.cache_mb else None
+            server.faststart = FaststartCache() if args.faststart else None
+            server.remux_cache = SpoolCache(verbose)
+            server.proxy_cache = ProxyCache(verbose=verbose)
+            server.frame_cache = FrameCache(verbose=verbose)
+            for name, job_cache in job_caches(verbose).items():
+                setattr(server, name, job_cache)
             break
         except OSError as e:
             if e.errno == 98:
@@ -213,6 +291,23 @@ def main():
         print(f"Error: Could not find an available port starting from {original_port}.", file=sys.stderr)
         sys.exit(1)
   
+    # Probe and render once up front so requests only ever hit the caches
+    probe = server.probe_cache.get(media_file)
+    ext = os.path.splitext(media_file)[1].lower()
+    if needs_tiles(ext, probe):
+        # Build the overview and tile pyramid while the browser is still opening
+        get_tile_pyramid(server)
+    elif ext in PREVIEW_IMAGE_EXTS:
+        # Convert to WebP/PNG while the browser is still opening
+        get_image_preview(server)
+    get_page_assets(server)
+    if plays_from_proxy(server, media_file, ext):
+        # Encode (or load the cached) preview proxy in the background
+        get_proxy_spool(server)
+    elif can_remux(ext, probe):
+        # Start remuxing before the browser asks, so seeks land on spooled bytes
+        get_remux_spool(server)
+
     url = f"http://{host}:{port}"
     if auth_token:
         url += f"/?token={auth_token}"
@@ -252,6 +347,9 @@ def main():
         print("\nServer stopped")
         if server:
             server.server_close()
+            if verbose and server.block_cache:
+                stats = server.block_cache.stats()
+                print(f"Block cache: {stats['hits']} hits, {stats['misses']} misses, {stats['readaheads']} read-ahead blocks")
         sys.exit(0)
     except Exception as e:
         print(f"Server error: {e}")
@@ -0,0 +1,143 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import threading
+
+from transcode import SpooledTranscode, FRAGMENTED_MP4_FLAGS
+from utils import get_cache_dir, source_fingerprint, prune_cache_dir
+
+# Codecs browsers generally can't decode (or decode far too slowly to scrub)
+PROXY_VIDEO_CODECS = ("hevc", "prores", "dnxhd", "mpeg2video", "vc1", "wmv3", "dvvideo", "cfhd")
+
+# Containers only previewed through a proxy
+PROXY_EXTS = [".mxf", ".mpg", ".mpeg", ".wmv", ".m2v"]
+
+# Longest side above which the original is proxied even if its codec plays
+MAX_DIRECT_DIMENSION = 4096
+
+PROXY_MAX_DIMENSION = 1280
+PROXY_CACHE_MAX_BYTES = 2 * 1024 * 1024 * 1024
+
+# Bump when the proxy encode settings change so stale cache entries miss
+PROXY_FORMAT_VERSION = 1
+
+
+def needs_proxy(ext, probe):
+    """True when the video should be previewed through a scaled-down H.264 proxy."""
+    codec = probe.get('video_codec')
+    if codec is None:
+        return False
+    if ext in PROXY_EXTS:
+        return True
+    pix_fmt = probe.get('pix_fmt') or ""
+    high_bit_depth = any(depth in pix_fmt for depth in ("p10", "p12", "p16"))
+    oversized = max(probe.get('width', 0), probe.get('height', 0)) > MAX_DIRECT_DIMENSION
+    return codec in PROXY_VIDEO_CODECS or high_bit_depth or oversized
+
+
+def display_size(probe):
+    """(width, height) as displayed, i.e. with 90/270 degree rotation applied."""
+    width, height = probe.get('width', 0), probe.get('height', 0)
+    if probe.get('rotation') in (90, 270):
+        return height, width
+    return width, height
+
+
+def proxy_size(width, height, max_dimension=PROXY_MAX_DIMENSION):
+    """Even-sized dimensions fitting within max_dimension, keeping the aspect ratio."""
+    scale = min(1.0, max_dimension / max(width, height))
+    return max(2, int(width * scale) // 2 * 2), max(2, int(height * scale) // 2 * 2)
+
+
+def proxy_command(file_path, probe, threads=None):
+    """
+    ffmpeg command encoding a small H.264/AAC proxy as fragmented MP4 on
+    stdout, with -progress output on stderr. ffmpeg applies the rotation,
+    so the proxy is upright and scaled from the displayed size.
+    """
+    width, height = display_size(probe)
+    if width and height:
+        scale = "scale=%d:%d" % proxy_size(width, height)
+    else:
+        scale = f"scale=-2:'min(ih,{PROXY_MAX_DIMENSION})'"
+    if threads is None:
+        threads = max(1, (os.cpu_count() or 2) // 2)
+    return [
+        "ffmpeg", "-v", "error", "-nostdin", "-nostats", "-progress", "pipe:2",
+        "-i", file_path,
+        "-map", "0:v:0", "-map", "0:a:0?",
+        "-vf", f"{scale}:flags=bilinear,format=yuv420p",
+        "-c:v", "libx264", "-preset", "veryfast", "-crf", "26", "-g", "48",
+        "-threads", str(threads),
+        "-c:a", "aac", "-b:a", "128k", "-ac", "2",
+        "-f", "mp4", "-movflags", FRAGMENTED_MP4_FLAGS, "pipe:1",
+    ]
+
+
+class ProxyCache:
+    """
+    One background proxy encode per file version, backed by a disk cache
+    keyed on the source fingerprint. A finished proxy is reused across
+    runs. Proxies have their own cache subdirectory, pruned (least recently
+    used first) to `max_bytes` before a new encode starts, so pruning never
+    touches other features' entries.
+    """
+
+    def __init__(self, cache_dir=None, max_bytes=PROXY_CACHE_MAX_BYTES, verbose=False):
+        self.cache_dir = cache_dir or os.path.join(get_cache_dir(), "proxy")
+        self.max_bytes = max_bytes
+        self.verbose = verbose
+        self._lock = threading.Lock()
+        self._version = None
+        self._spool = None
+
+    def _entry_path(self, file_path):
+        fingerprint = source_fingerprint(file_path)
+        return os.path.join(self.cache_dir, f"proxy-{fingerprint}-v{PROXY_FORMAT_VERSION}.mp4")
+
+    def _active_paths(self, final_path):
+        """Entries pruning must leave alone: the one being encoded and the one still served."""
+        paths = {final_path, final_path + ".part"}
+        if self._spool is not None:
+            paths.add(self._spool.path)
+        return paths
+
+    def current(self):
+        with self._lock:
+            return self._spool
+
+    def get(self, version, file_path, probe):
+        """Returns the running or cached proxy spool for `version`, starting an encode if needed."""
+        with self._lock:
+            if version == self._version and self._spool is not None:
+                return self._spool
+            stale = self._spool
+            final_path = self._entry_path(file_path)
+            if os.path.exists(final_path):
+                if self.verbose:
+                    print(f"Using cached proxy: {final_path}")
+                # Touch so pruning treats it as recently used
+                os.utime(final_path)
+                spool = SpooledTranscode.completed(final_path)
+            else:
+                os.makedirs(self.cache_dir, exist_ok=True)
+                prune_cache_dir(self.cache_dir, self.max_bytes, keep=self._active_paths(final_path))
+                spool = SpooledTranscode(
+                    proxy_command(file_path, probe),
+                    spool_path=final_path + ".part",
+                    final_path=final_path,
+                    duration=probe.get('duration') or None,
+                    verbose=self.verbose,
+                ).start()
+            self._spool = spool
+            self._version = version
+        if stale is not None:
+            stale.close()
+        return spool
+
+    def close(self):
+        with self._lock:
+            spool, self._spool, self._version = self._spool, None, None
+        if spool is not None:
+            spool.close()
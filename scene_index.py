@@ -0,0 +1,153 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import sys
+import json
+import threading
+
+from analysis import AnalysisPipeline, BlackBarsAnalyzer, SceneCutAnalyzer
+from autocrop import scale_crop
+from proxy import display_size
+from utils import get_cache_dir, source_fingerprint, prune_cache_dir
+
+# Bump when the on-disk layout changes so stale cache entries miss
+SCENE_INDEX_FORMAT_VERSION = 1
+
+# Scene indexes have their own cache subdirectory, pruned to this size
+SCENE_INDEX_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+
+class SceneIndex:
+    """
+    Scene cuts of a video with a black-bar measurement per scene, from one
+    AnalysisPipeline decode in the background (SceneCutAnalyzer and
+    BlackBarsAnalyzer fed the same frames), cached on disk as JSON by
+    source fingerprint.
+
+    Each scene is {start, end, score, crop}: score is the cut's strength
+    (None for the first scene) and crop the picture area inside the bars
+    in full-resolution displayed pixels, or None when the scene has no
+    bars (or no picture). The player gets the whole list once, so jumping
+    between scenes never goes back to the server.
+    """
+
+    def __init__(self, file_path, probe, cache_dir=None, verbose=False):
+        self.file_path = file_path
+        self.probe = probe
+        self.duration = probe.get('duration') or 0.0
+        self.cache_dir = cache_dir or os.path.join(get_cache_dir(), "scenes")
+        self.verbose = verbose
+        self.scenes = []
+        self.error = None
+        self._pipeline = None
+        self._done = threading.Event()
+        self._thread = None
+
+    @property
+    def done(self):
+        return self._done.is_set()
+
+    @property
+    def failed(self):
+        return self.error is not None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="mediacrop-scene-index", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        pipeline = self._pipeline
+        if pipeline is not None:
+            pipeline.stop()
+
+    def status(self):
+        """Progress summary for the /jobs endpoint."""
+        if self.failed:
+            return {"state": "failed", "progress": None, "error": self.error}
+        if self.done:
+            return {"state": "done", "progress": 1.0, "error": None}
+        pipeline = self._pipeline
+        progress = pipeline.status()["progress"] if pipeline is not None else None
+        return {"state": "running", "progress": progress, "error": None}
+
+    def summary(self):
+        return {
+            "scenes": self.scenes,
+            "cuts": max(0, len(self.scenes) - 1),
+            "letterboxed": sum(1 for scene in self.scenes if scene["crop"]),
+        }
+
+    def _cache_path(self):
+        fingerprint = source_fingerprint(self.file_path)
+        return os.path.join(self.cache_dir, f"scenes-{fingerprint}-v{SCENE_INDEX_FORMAT_VERSION}.json")
+
+    def _run(self):
+        try:
+            path = self._cache_path()
+            if not self._load(path):
+                self._build()
+                self._save(path)
+        except Exception as e:
+            self.error = str(e)
+            print(f"Scene index error: {e}", file=sys.stderr)
+        finally:
+            self._done.set()
+
+    def _load(self, path):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                scenes = json.load(f)["scenes"]
+        except (OSError, ValueError, KeyError, TypeError):
+            return False
+        try:
+            os.utime(path)  # mark as recently used for prune_cache_dir
+        except OSError:
+            pass
+        if self.verbose:
+            print(f"Using cached scene index: {path}")
+        self.scenes = scenes
+        return True
+
+    def _save(self, path):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        with open(path + ".part", "w", encoding="utf-8") as f:
+            json.dump({"scenes": self.scenes}, f, separators=(",", ":"))
+        os.replace(path + ".part", path)
+        prune_cache_dir(self.cache_dir, SCENE_INDEX_CACHE_MAX_BYTES, keep=(path,))
+
+    def _build(self):
+        self._pipeline = pipeline = AnalysisPipeline(self.file_path, self.probe, verbose=self.verbose)
+        cuts = pipeline.register(SceneCutAnalyzer())
+        bars = pipeline.register(BlackBarsAnalyzer())
+        pipeline.start().wait()
+        if pipeline.failed:
+            raise RuntimeError(pipeline.error)
+
+        starts = [0.0] + list(cuts.cut_times)
+        scores = [None] + list(cuts.cut_scores)
+        end_time = max(self.duration, bars.times[-1] if bars.times else 0.0)
+        scenes = []
+        for i, start in enumerate(starts):
+            end = starts[i + 1] if i + 1 < len(starts) else end_time
+            scenes.append({
+                "start": round(start, 6),
+                "end": round(end, 6),
+                "score": scores[i],
+                "crop": self._scene_crop(bars.bars_between(start, end), (pipeline.width, pipeline.height)),
+            })
+        self.scenes = scenes
+
+    def _scene_crop(self, bounds, scale):
+        """The picture area {x, y, w, h} in displayed pixels; None when there are no bars."""
+        if bounds is None:
+            return None
+        left, top, right, bottom = bounds
+        # One analysis pixel of slack for scaling and soft edges
+        if left <= 1 and top <= 1 and right >= scale[0] - 1 and bottom >= scale[1] - 1:
+            return None
+        w, h, x, y = scale_crop((right - left, bottom - top, left, top), scale, display_size(self.probe))
+        return {"x": x, "y": y, "w": w, "h": h}
+
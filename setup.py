@@ -19,7 +19,28 @@ setup(
     py_modules=[
         "mediacrop",
         "http_handler",
+        "crop_server",
         "http_handler_js",
+        "http_handler_html",
+        "http_handler_css",
+        "asset_cache",
+        "media_probe",
+        "file_delivery",
+        "block_cache",
+        "isobmff",
+        "transcode",
+        "proxy",
+        "image_preview",
+        "tiles",
+        "animated_image",
+        "thumbnails",
+        "frame_index",
+        "frame_grab",
+        "decoder_session",
+        "autocrop",
+        "analysis",
+        "scene_index",
+        "crop_path",
         "utils"
     ],
 
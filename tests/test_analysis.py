@@ -0,0 +1,54 @@
+import os
+import sys
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import analysis
+
+
+def make_frame(width, height, rows=(), value=150):
+    frame = bytearray(width * height)
+    for row in rows:
+        frame[row * width:(row + 1) * width] = bytes([value]) * width
+    return memoryview(bytes(frame))
+
+
+def letterboxed_frame(width, height, bar, value=150):
+    return make_frame(width, height, rows=range(bar, height - bar), value=value)
+
+
+class ContentBoundsFallbackTest(unittest.TestCase):
+    """The pure-Python scan, used when NumPy isn't installed."""
+
+    def bounds(self, *args, **kwargs):
+        with mock.patch.object(analysis, "numpy", None):
+            return analysis.content_bounds(*args, **kwargs)
+
+    def test_black_frame(self):
+        self.assertIsNone(self.bounds(make_frame(32, 20), 32, 20))
+
+    def test_dim_lines_on_black(self):
+        # Rows 2 and 17 pass, but no column's mean between them does
+        self.assertIsNone(self.bounds(make_frame(32, 20, rows=(2, 17)), 32, 20))
+
+    def test_letterbox(self):
+        self.assertEqual(self.bounds(letterboxed_frame(32, 20, 3), 32, 20), (0, 3, 32, 17))
+
+
+@unittest.skipIf(analysis.numpy is None, "NumPy is not installed")
+class ContentBoundsNumpyTest(unittest.TestCase):
+
+    def test_black_frame(self):
+        self.assertIsNone(analysis.content_bounds(make_frame(32, 20), 32, 20))
+
+    def test_dim_lines_on_black(self):
+        self.assertIsNone(analysis.content_bounds(make_frame(32, 20, rows=(2, 17)), 32, 20))
+
+    def test_letterbox(self):
+        self.assertEqual(analysis.content_bounds(letterboxed_frame(32, 20, 3), 32, 20), (0, 3, 32, 17))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,52 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from asset_cache import EncodedAsset, minify_whitespace
+
+
+class MinifyWhitespaceTest(unittest.TestCase):
+
+    def test_strips_indentation_and_blank_lines(self):
+        text = "function f() {\n    return 1;   \n\n\n}\n"
+        self.assertEqual(minify_whitespace(text), "function f() {\nreturn 1;\n}")
+
+    def test_keeps_line_breaks(self):
+        # Joining these lines would change what automatic semicolon insertion does
+        text = "  let a = b\n  (c || d).run()\n"
+        self.assertEqual(minify_whitespace(text), "let a = b\n(c || d).run()")
+
+    def test_drops_full_line_comments_only(self):
+        text = "// Frame stepping\nconst url = 'http://host/x'; // trailing\n"
+        self.assertEqual(minify_whitespace(text), "const url = 'http://host/x'; // trailing")
+
+    def test_keeps_comment_like_lines(self):
+        # Only '// ' starts a dropped comment; '//#' directives stay
+        text = "const src = [\n  '//cdn/a.js',\n];\n//# sourceURL=main.js\n"
+        self.assertEqual(minify_whitespace(text), text.replace("  ", "").strip())
+
+    def test_inner_whitespace_untouched(self):
+        self.assertEqual(minify_whitespace("<p>a  b</p>"), "<p>a  b</p>")
+
+
+class NegotiateTest(unittest.TestCase):
+
+    def setUp(self):
+        self.asset = EncodedAsset("body {\n    margin: 0;\n}\n", "text/css")
+
+    def test_prefers_compressed(self):
+        self.assertEqual(self.asset.negotiate("gzip, deflate")[0], "gzip")
+
+    def test_q_values(self):
+        self.assertEqual(self.asset.negotiate("gzip;q=0.5, deflate")[0], "deflate")
+        self.assertEqual(self.asset.negotiate("gzip;q=0")[0], "identity")
+
+    def test_no_header(self):
+        encoding, body = self.asset.negotiate(None)
+        self.assertEqual((encoding, body), ("identity", b"body {\nmargin: 0;\n}"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,74 @@
+import os
+import sys
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import autocrop
+from autocrop import cropdetect_command, merge_crops, scale_crop, window_starts
+
+
+def cropdetect_filter(command):
+    return command[command.index("-vf") + 1].split(",")[-1]
+
+
+class CropdetectCommandTest(unittest.TestCase):
+
+    def test_keyframes_only_window(self):
+        command = cropdetect_command("/a.mkv", 12.5, 20, (960, 540))
+        self.assertEqual(command[command.index("-ss") + 1], "12.500")
+        self.assertEqual(command[command.index("-t") + 1], "20.000")
+        self.assertLess(command.index("-skip_frame"), command.index("-i"))
+        self.assertTrue(command[command.index("-vf") + 1].startswith("scale=960:540:"))
+
+    def test_no_frames_skipped(self):
+        # With one keyframe per GOP, cropdetect's default skip=2 can eat the whole window
+        with mock.patch.object(autocrop, "ffmpeg_older_than", return_value=False):
+            self.assertIn(":skip=0", cropdetect_filter(cropdetect_command("/a.mkv", 0, 20, None)))
+
+    def test_old_ffmpeg_has_no_skip_option(self):
+        with mock.patch.object(autocrop, "ffmpeg_older_than", return_value=True):
+            self.assertNotIn("skip=", cropdetect_filter(cropdetect_command("/a.mkv", 0, 20, None)))
+
+
+class MergeCropsTest(unittest.TestCase):
+
+    def test_median_ignores_outliers(self):
+        letterbox = (1920, 800, 0, 140)
+        crops = [letterbox, letterbox, letterbox, (1920, 1080, 0, 0), (1200, 600, 360, 240), None]
+        result = merge_crops(crops, 1920, 1080)
+        self.assertEqual((result["x"], result["y"], result["w"], result["h"]), (0, 140, 1920, 800))
+        self.assertEqual(result["windows"], 6)
+        self.assertEqual(result["agreeing"], 3)
+        self.assertEqual(result["confidence"], 0.5)
+        self.assertFalse(result["fullFrame"])
+
+    def test_tolerance(self):
+        result = merge_crops([(1920, 800, 0, 140), (1920, 796, 0, 142)], 1920, 1080)
+        self.assertEqual(result["agreeing"], 2)
+
+    def test_full_frame(self):
+        result = merge_crops([(1916, 1080, 2, 0)], 1920, 1080)
+        self.assertTrue(result["fullFrame"])
+
+    def test_nothing_detected(self):
+        self.assertIsNone(merge_crops([None, None], 1920, 1080))
+
+
+class WindowTest(unittest.TestCase):
+
+    def test_short_file_is_one_window(self):
+        self.assertEqual(window_starts(15.0), [0.0])
+
+    def test_windows_stay_inside_the_file(self):
+        starts = window_starts(100.0, windows=8, seconds=20)
+        self.assertEqual(len(starts), 5)
+        self.assertTrue(all(0.0 <= start <= 80.0 for start in starts))
+
+    def test_scale_crop_keeps_even_edges(self):
+        self.assertEqual(scale_crop((960, 400, 0, 70), (960, 540), (1920, 1080)), (1920, 800, 0, 140))
+
+
+if __name__ == "__main__":
+    unittest.main()
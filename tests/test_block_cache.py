@@ -0,0 +1,88 @@
+import io
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from block_cache import BlockCache, file_version
+
+BLOCK = 16
+
+
+class BlockCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.data = bytes(range(256)) * 2 + b"last one"
+        fd, self.path = tempfile.mkstemp()
+        with os.fdopen(fd, "wb") as f:
+            f.write(self.data)
+        self.file = open(self.path, "rb")
+        self.st = os.fstat(self.file.fileno())
+        self.cache = BlockCache(4 * BLOCK, block_size=BLOCK, readahead_blocks=0, head_bytes=4 * BLOCK)
+
+    def tearDown(self):
+        self.cache.close()
+        self.file.close()
+        os.remove(self.path)
+
+    def send(self, offset, count):
+        out = io.BytesIO()
+        sent = self.cache.send_range(out, self.file, self.st, offset, count)
+        return sent, out.getvalue()
+
+    def cached_blocks(self):
+        return [index for (_, index) in self.cache._blocks]
+
+    def test_miss_then_hit(self):
+        self.assertEqual(self.send(5, 20), (20, self.data[5:25]))
+        self.assertEqual(self.cache.stats()["misses"], 2)
+        self.assertEqual(self.send(5, 20), (20, self.data[5:25]))
+        self.assertEqual(self.cache.stats()["hits"], 2)
+
+    def test_cold_tail_left_to_caller(self):
+        # Past the request head only cached blocks are sent; the rest goes via sendfile
+        sent, body = self.send(0, 10 * BLOCK)
+        self.assertEqual(sent, 4 * BLOCK)
+        self.assertEqual(body, self.data[:4 * BLOCK])
+
+    def test_least_recently_used_evicted(self):
+        self.send(0, 4 * BLOCK)
+        self.send(0, 1)  # block 0 is now the most recently used
+        self.send(4 * BLOCK, 1)
+        self.assertEqual(self.cached_blocks(), [2, 3, 0, 4])
+        self.assertEqual(self.cache.stats()["bytes"], 4 * BLOCK)
+
+    def test_capacity_in_bytes(self):
+        # Capacity counts bytes, not blocks: the short last block only takes its own size
+        self.send(len(self.data) - 8, 8)
+        self.send(0, 3 * BLOCK)
+        self.assertEqual(self.cache.stats()["bytes"], 3 * BLOCK + 8)
+        self.send(3 * BLOCK, 1)
+        self.assertEqual(self.cached_blocks(), [0, 1, 2, 3])
+        self.assertEqual(self.cache.stats()["bytes"], 4 * BLOCK)
+
+    def test_new_file_version_misses(self):
+        self.send(0, BLOCK)
+        with open(self.path, "ab") as f:
+            f.write(b"more")
+        st = os.stat(self.path)
+        self.assertNotEqual(file_version(st), file_version(self.st))
+        self.cache.send_range(io.BytesIO(), self.file, st, 0, BLOCK)
+        self.assertEqual(self.cache.stats()["misses"], 2)
+
+    def test_readahead_after_cached_range(self):
+        cache = BlockCache(8 * BLOCK, block_size=BLOCK, readahead_blocks=2, head_bytes=BLOCK)
+        try:
+            cache.send_range(io.BytesIO(), self.file, self.st, 0, BLOCK)
+            cache.send_range(io.BytesIO(), self.file, self.st, 0, BLOCK)
+            cache._readahead.shutdown(wait=True)
+            self.assertEqual(sorted(index for (_, index) in cache._blocks), [0, 1, 2])
+            self.assertEqual(cache.stats()["readaheads"], 2)
+        finally:
+            cache.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,78 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from crop_path import CropPath
+
+
+def get_token(text, terminators):
+    """Python port of ffmpeg's av_get_token(): (token, rest of text)."""
+    out = []
+    i = 0
+    while i < len(text) and text[i] not in terminators:
+        c = text[i]
+        if c == "\\" and i + 1 < len(text):
+            out.append(text[i + 1])
+            i += 2
+        elif c == "'":
+            end = text.find("'", i + 1)
+            end = len(text) if end < 0 else end
+            out.append(text[i + 1:end])
+            i = end + 1
+        else:
+            out.append(c)
+            i += 1
+    return "".join(out), text[i:]
+
+
+def sendcmd_file(crop_filter):
+    """The f= option the sendcmd filter receives, after graph- and option-level unescaping."""
+    name, _, rest = crop_filter.partition("=")
+    assert name == "sendcmd"
+    args, rest = get_token(rest, "[],;")
+    assert rest.startswith(",crop="), rest
+    key, _, value = args.partition("=")
+    assert key == "f"
+    value, rest = get_token(value, ":")
+    assert rest == "", rest
+    return value
+
+
+class CropFilterTest(unittest.TestCase):
+
+    def setUp(self):
+        self.path = CropPath([
+            {"t": 0, "x": 0, "y": 0, "w": 100, "h": 50},
+            {"t": 2, "x": 40, "y": 10, "w": 100, "h": 50},
+        ])
+
+    def test_drive_letter(self):
+        self.assertEqual(sendcmd_file(self.path.crop_filter("C:/clips/a.cmd")), "C:/clips/a.cmd")
+
+    def test_backslashes(self):
+        self.assertEqual(sendcmd_file(self.path.crop_filter("C:\\clips\\a.cmd")), "C:/clips/a.cmd")
+
+    def test_graph_separators_and_quotes(self):
+        path = "/clips/it's [a],b;c:d.cmd"
+        self.assertEqual(sendcmd_file(self.path.crop_filter(path)), path)
+
+    def test_script_intervals_use_player_time(self):
+        # Keyframe times are the player's currentTime; ffmpeg's t starts at 0 too
+        path = CropPath([
+            {"t": 1.5, "x": 0, "y": 0, "w": 100, "h": 50},
+            {"t": 2.5, "x": 40, "y": 10, "w": 100, "h": 50},
+            {"t": 4, "x": 20, "y": 10, "w": 100, "h": 50},
+        ], interpolation="linear")
+        lines = path.sendcmd_script().splitlines()[1:]
+        self.assertEqual([line.split(" ", 1)[0] for line in lines], ["1.5-2.5", "2.5-4", "4"])
+        self.assertEqual(lines[0], "1.5-2.5 [enter] crop x 40*(t-1.5), [enter] crop y 10*(t-1.5);")
+        self.assertEqual(lines[-1], "4 [enter] crop x 20, [enter] crop y 10;")
+
+    def test_crop_starts_at_first_keyframe(self):
+        self.assertTrue(self.path.crop_filter("/a.cmd").endswith(",crop=w=100:h=50:x=0:y=0"))
+
+
+if __name__ == "__main__":
+    unittest.main()
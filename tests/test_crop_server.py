@@ -0,0 +1,127 @@
+import os
+import sys
+import socket
+import tempfile
+import threading
+import unittest
+import http.client
+from http.server import BaseHTTPRequestHandler
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from crop_server import CropServer
+from http_handler import CropHandler
+
+
+class OkHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Length", "2")
+        self.end_headers()
+        self.wfile.write(b"ok")
+
+    def log_message(self, format, *args):
+        pass
+
+
+class ServerTestCase(unittest.TestCase):
+    handler_class = OkHandler
+
+    def start_server(self, **kwargs):
+        server = CropServer(("127.0.0.1", 0), self.handler_class, **kwargs)
+        server.verbose = False
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+
+        def stop():
+            server.shutdown()
+            server.server_close()
+            thread.join()
+        self.addCleanup(stop)
+        return server
+
+    def connect(self, server):
+        sock = socket.create_connection(server.server_address, timeout=5)
+        self.addCleanup(sock.close)
+        return sock
+
+    def get(self, server, path="/"):
+        conn = http.client.HTTPConnection(*server.server_address, timeout=5)
+        self.addCleanup(conn.close)
+        conn.request("GET", path)
+        response = conn.getresponse()
+        return response.status, response.read()
+
+
+class CropServerTest(ServerTestCase):
+
+    def test_idle_connections_leave_workers_free(self):
+        server = self.start_server(workers=2, max_client_connections=8)
+        for _ in range(server.workers):
+            self.connect(server)
+        self.assertEqual(self.get(server), (200, b"ok"))
+
+    def test_full_queue_is_rejected(self):
+        server = self.start_server(workers=1, max_client_connections=8, max_queued_requests=0)
+        sock = self.connect(server)
+        sock.sendall(b"GET / HTTP/1.1\r\nHost: x\r\n\r\n")
+        self.assertTrue(sock.recv(64).startswith(b"HTTP/1.0 503"))
+
+    def test_idle_connection_times_out(self):
+        server = self.start_server(workers=1, keepalive_timeout=0.2)
+        sock = self.connect(server)
+        self.assertEqual(sock.recv(64), b"")
+
+
+class KeepAliveTest(ServerTestCase):
+    handler_class = CropHandler
+
+    def start_server(self, **kwargs):
+        server = super().start_server(**kwargs)
+        media = tempfile.NamedTemporaryFile(suffix=".bin", delete=False)
+        media.write(b"0123456789" * 100)
+        media.close()
+        self.addCleanup(os.remove, media.name)
+        server.media_file = media.name
+        server.auth_token = None
+        return server
+
+    def test_idle_keepalive_connections_leave_workers_free(self):
+        server = self.start_server(workers=2, max_client_connections=8)
+        for _ in range(server.workers):
+            conn = http.client.HTTPConnection(*server.server_address, timeout=5)
+            self.addCleanup(conn.close)
+            conn.request("GET", "/file", headers={"Range": "bytes=0-9"})
+            response = conn.getresponse()
+            self.assertEqual(response.read(), b"0123456789")
+            self.assertFalse(response.will_close)
+        self.assertEqual(self.get(server, "/file")[0], 200)
+
+    def test_request_limit_spans_parked_connection(self):
+        server = self.start_server(workers=1, max_keepalive_requests=3)
+        conn = http.client.HTTPConnection(*server.server_address, timeout=5)
+        self.addCleanup(conn.close)
+        closes = []
+        for _ in range(3):
+            conn.request("GET", "/file", headers={"Range": "bytes=0-1"})
+            response = conn.getresponse()
+            response.read()
+            closes.append(response.getheader("Connection"))
+        self.assertEqual(closes, [None, None, "close"])
+
+    def test_pipelined_requests(self):
+        server = self.start_server(workers=1)
+        sock = self.connect(server)
+        request = b"GET /file HTTP/1.1\r\nHost: x\r\nRange: bytes=0-1\r\n\r\n"
+        sock.sendall(request * 2)
+        received = b""
+        while received.count(b"\r\n\r\n01") < 2:
+            chunk = sock.recv(4096)
+            self.assertTrue(chunk)
+            received += chunk
+
+
+if __name__ == "__main__":
+    unittest.main()
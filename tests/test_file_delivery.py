@@ -0,0 +1,131 @@
+import os
+import sys
+import unittest
+from email.utils import formatdate
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from file_delivery import (
+    RangeNotSatisfiable, evaluate_preconditions, if_range_allows, multipart_byteranges, parse_open_range,
+    parse_range_header,
+)
+
+ETAG = '"1f4-17a2b3c4d5e6f-2a"'
+MTIME = 1700000000.75
+LAST_MODIFIED = formatdate(1700000000, usegmt=True)
+EARLIER = formatdate(1600000000, usegmt=True)
+
+
+class PreconditionsTest(unittest.TestCase):
+
+    def evaluate(self, **headers):
+        return evaluate_preconditions({name.replace("_", "-"): value for name, value in headers.items()}, ETAG, MTIME)
+
+    def test_no_conditions(self):
+        self.assertIsNone(self.evaluate())
+
+    def test_if_none_match(self):
+        self.assertEqual(self.evaluate(If_None_Match=ETAG), 304)
+        self.assertEqual(self.evaluate(If_None_Match=f'"other", W/{ETAG}'), 304)
+        self.assertEqual(self.evaluate(If_None_Match="*"), 304)
+        self.assertIsNone(self.evaluate(If_None_Match='"other"'))
+
+    def test_if_modified_since(self):
+        # Sub-second mtime still counts as unmodified at the Last-Modified second
+        self.assertEqual(self.evaluate(If_Modified_Since=LAST_MODIFIED), 304)
+        self.assertIsNone(self.evaluate(If_Modified_Since=EARLIER))
+        self.assertIsNone(self.evaluate(If_Modified_Since="yesterday"))
+
+    def test_if_none_match_overrides_if_modified_since(self):
+        self.assertIsNone(self.evaluate(If_None_Match='"other"', If_Modified_Since=LAST_MODIFIED))
+
+    def test_if_match(self):
+        self.assertIsNone(self.evaluate(If_Match=ETAG))
+        self.assertIsNone(self.evaluate(If_Match="*"))
+        self.assertEqual(self.evaluate(If_Match='"other"'), 412)
+        # If-Match uses strong comparison
+        self.assertEqual(self.evaluate(If_Match=f"W/{ETAG}"), 412)
+
+    def test_if_unmodified_since(self):
+        self.assertIsNone(self.evaluate(If_Unmodified_Since=LAST_MODIFIED))
+        self.assertEqual(self.evaluate(If_Unmodified_Since=EARLIER), 412)
+
+    def test_failed_if_match_wins_over_not_modified(self):
+        self.assertEqual(self.evaluate(If_Match='"other"', If_None_Match=ETAG), 412)
+
+
+class IfRangeTest(unittest.TestCase):
+
+    def allows(self, value):
+        return if_range_allows({"If-Range": value} if value else {}, ETAG, MTIME)
+
+    def test_absent(self):
+        self.assertTrue(self.allows(None))
+
+    def test_etag(self):
+        self.assertTrue(self.allows(ETAG))
+        self.assertFalse(self.allows('"other"'))
+        # Weak validators never match for If-Range
+        self.assertFalse(self.allows(f"W/{ETAG}"))
+
+    def test_date(self):
+        self.assertTrue(self.allows(LAST_MODIFIED))
+        self.assertFalse(self.allows(EARLIER))
+        self.assertFalse(self.allows("not a date"))
+
+
+class RangeHeaderTest(unittest.TestCase):
+
+    def test_single(self):
+        self.assertEqual(parse_range_header("bytes=0-99", 1000), [(0, 99)])
+        self.assertEqual(parse_range_header("bytes=900-", 1000), [(900, 999)])
+
+    def test_suffix(self):
+        self.assertEqual(parse_range_header("bytes=-100", 1000), [(900, 999)])
+        self.assertEqual(parse_range_header("bytes=-5000", 1000), [(0, 999)])
+
+    def test_end_clamped(self):
+        self.assertEqual(parse_range_header("bytes=500-5000", 1000), [(500, 999)])
+
+    def test_sorted_and_coalesced(self):
+        header = "bytes=500-599, 0-99, 50-149, 150-199, 700-"
+        self.assertEqual(parse_range_header(header, 1000), [(0, 199), (500, 599), (700, 999)])
+
+    def test_suffix_merges_with_overlap(self):
+        self.assertEqual(parse_range_header("bytes=850-949,-100", 1000), [(850, 999)])
+
+    def test_unsatisfiable_ranges_dropped(self):
+        self.assertEqual(parse_range_header("bytes=2000-2100,0-9", 1000), [(0, 9)])
+        with self.assertRaises(RangeNotSatisfiable):
+            parse_range_header("bytes=1000-,-0", 1000)
+        with self.assertRaises(RangeNotSatisfiable):
+            parse_range_header("bytes=-10", 0)
+
+    def test_malformed(self):
+        for header in ("bytes=", "bytes=abc-def", "bytes=9-1", "bytes=5", "bytes=--5"):
+            with self.assertRaises(ValueError, msg=header):
+                parse_range_header(header, 1000)
+
+    def test_ignored(self):
+        self.assertIsNone(parse_range_header("items=0-9", 1000))
+        self.assertIsNone(parse_range_header("bytes=" + ",".join(["0-0"] * 3), 1000, max_ranges=2))
+
+    def test_open_range(self):
+        self.assertEqual(parse_open_range("bytes=100-"), (100, None))
+        self.assertEqual(parse_open_range("bytes=100-199"), (100, 199))
+        for header in (None, "bytes=-100", "bytes=0-9,20-29", "bytes=9-1", "items=0-9"):
+            self.assertIsNone(parse_open_range(header), header)
+
+
+class MultipartTest(unittest.TestCase):
+
+    def test_length_matches_layout(self):
+        parts, trailer, length = multipart_byteranges([(0, 9), (100, 149)], 1000, "video/mp4", "BOUNDARY")
+        self.assertEqual([(start, end) for _, start, end in parts], [(0, 9), (100, 149)])
+        self.assertIn(b"Content-Range: bytes 100-149/1000\r\n", parts[1][0])
+        self.assertEqual(trailer, b"\r\n--BOUNDARY--\r\n")
+        self.assertEqual(length, sum(len(head) + end - start + 1 for head, start, end in parts) + len(trailer))
+
+
+if __name__ == "__main__":
+    unittest.main()
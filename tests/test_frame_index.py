@@ -0,0 +1,81 @@
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+from array import array
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from frame_index import FrameIndex
+
+
+def make_index(cache_dir):
+    index = FrameIndex("/clips/a.mp4", {"duration": 0.2}, cache_dir=cache_dir)
+    index.times = array('d', [0.0, 0.04, 0.08, 0.12, 0.16])
+    index.offsets = array('q', [48, 9000, 9800, 10400, 21000])
+    index.keyframe_times = array('d', [0.0, 0.16])
+    index.start_time = 1.4
+    return index
+
+
+class FrameIndexCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.cache_dir, "index.bin")
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir)
+
+    def test_round_trip(self):
+        saved = make_index(self.cache_dir)
+        saved._save(self.path)
+        loaded = FrameIndex("/clips/a.mp4", cache_dir=self.cache_dir)
+        self.assertTrue(loaded._load(self.path))
+        self.assertEqual(loaded.times, saved.times)
+        self.assertEqual(loaded.offsets, saved.offsets)
+        self.assertEqual(loaded.keyframe_times, saved.keyframe_times)
+        self.assertEqual(loaded.start_time, 1.4)
+        self.assertFalse(os.path.exists(self.path + ".part"))
+
+    def test_truncated_file_misses(self):
+        make_index(self.cache_dir)._save(self.path)
+        with open(self.path, "r+b") as f:
+            f.truncate(os.path.getsize(self.path) - 8)
+        self.assertFalse(FrameIndex("/clips/a.mp4", cache_dir=self.cache_dir)._load(self.path))
+
+    def test_other_file_misses(self):
+        with open(self.path, "wb") as f:
+            f.write(b"not an index at all, just some bytes")
+        self.assertFalse(FrameIndex("/clips/a.mp4", cache_dir=self.cache_dir)._load(self.path))
+
+
+class LookupTest(unittest.TestCase):
+
+    def setUp(self):
+        self.index = make_index(None)
+
+    def test_between_frames(self):
+        found = self.index.lookup(0.1)
+        self.assertEqual((found["frame"], found["time"], found["offset"]), (2, 0.08, 9800))
+        self.assertEqual((found["previous"], found["next"]), (0.04, 0.12))
+        self.assertEqual((found["keyframeBefore"], found["keyframeAfter"]), (0.0, 0.16))
+        self.assertFalse(found["keyframe"])
+
+    def test_keyframe(self):
+        found = self.index.lookup(0.16)
+        self.assertTrue(found["keyframe"])
+        self.assertIsNone(found["next"])
+        self.assertIsNone(found["keyframeAfter"])
+
+    def test_out_of_range_clamps(self):
+        self.assertEqual(self.index.lookup(-1.0)["frame"], 0)
+        self.assertEqual(self.index.lookup(99.0)["frame"], 4)
+
+    def test_empty_index(self):
+        self.assertIsNone(FrameIndex("/clips/a.mp4").lookup(0.0))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,50 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from image_preview import Image, browser_mode, fit_within
+
+
+class FitWithinTest(unittest.TestCase):
+
+    def test_small_image_unchanged(self):
+        self.assertEqual(fit_within(640, 480), (640, 480))
+
+    def test_longest_side_bounded(self):
+        self.assertEqual(fit_within(20000, 10000, 8192), (8192, 4096))
+
+
+@unittest.skipIf(Image is None, "Pillow is not installed")
+class BrowserModeTest(unittest.TestCase):
+
+    def test_16_bit_is_scaled_not_clipped(self):
+        image = Image.new("I;16", (4, 4), 32768)
+        converted = browser_mode(image)
+        self.assertEqual(converted.mode, "RGB")
+        self.assertEqual(converted.getpixel((0, 0)), (128, 128, 128))
+
+    def test_float_is_stretched(self):
+        image = Image.new("F", (2, 1))
+        image.putpixel((1, 0), 0.5)
+        self.assertEqual(browser_mode(image).getpixel((1, 0)), (255, 255, 255))
+
+    def test_palette_keeps_transparency(self):
+        image = Image.new("P", (2, 2))
+        image.putpalette([255, 0, 0, 0, 255, 0])
+        image.info["transparency"] = 0
+        converted = browser_mode(image)
+        self.assertEqual(converted.mode, "RGBA")
+        self.assertEqual(converted.getpixel((0, 0))[3], 0)
+
+    def test_grey_alpha_keeps_alpha(self):
+        self.assertEqual(browser_mode(Image.new("LA", (2, 2), (10, 20))).getpixel((0, 0)), (10, 10, 10, 20))
+
+    def test_rgb_untouched(self):
+        image = Image.new("RGB", (2, 2))
+        self.assertIs(browser_mode(image), image)
+
+
+if __name__ == "__main__":
+    unittest.main()
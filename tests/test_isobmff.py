@@ -0,0 +1,127 @@
+import os
+import sys
+import struct
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from isobmff import build_faststart_layout, read_top_level_boxes
+
+
+def box(box_type, payload=b""):
+    return struct.pack(">I4s", 8 + len(payload), box_type) + payload
+
+
+def large_box(box_type, payload=b""):
+    return struct.pack(">I4sQ", 1, box_type, 16 + len(payload)) + payload
+
+
+def chunk_offsets(box_type, offsets):
+    fmt = ">I" if box_type == b"stco" else ">Q"
+    table = b"".join(struct.pack(fmt, offset) for offset in offsets)
+    return box(box_type, struct.pack(">II", 0, len(offsets)) + table)
+
+
+def track(table):
+    return box(b"trak", box(b"tkhd", bytes(84)) + box(b"mdia", box(b"minf", box(b"stbl", box(b"stsd", bytes(8)) + table))))
+
+
+def read_offsets(data, box_type):
+    position = data.index(box_type) + 4
+    fmt, size = (">I", 4) if box_type == b"stco" else (">Q", 8)
+    count = struct.unpack_from(">I", data, position + 4)[0]
+    return [struct.unpack_from(fmt, data, position + 8 + i * size)[0] for i in range(count)]
+
+
+class FaststartLayoutTest(unittest.TestCase):
+
+    def setUp(self):
+        self.paths = []
+
+    def tearDown(self):
+        for path in self.paths:
+            os.remove(path)
+
+    def write(self, data):
+        fd, path = tempfile.mkstemp(suffix=".mp4")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        self.paths.append(path)
+        return open(path, "rb")
+
+    def trailing_moov_file(self, mdat_box=box):
+        ftyp = box(b"ftyp", b"isom" + bytes(4))
+        samples = b"".join(bytes([i]) * 40 for i in range(1, 5))
+        mdat = mdat_box(b"mdat", samples)
+        data_start = len(ftyp) + len(mdat) - len(samples)
+        self.sample_offsets = [data_start + i * 40 for i in range(4)]
+        moov = box(b"moov", box(b"mvhd", bytes(100))
+                   + track(chunk_offsets(b"stco", self.sample_offsets[:2]))
+                   + track(chunk_offsets(b"co64", self.sample_offsets[2:])))
+        return ftyp + mdat + box(b"free", bytes(12)) + moov, len(moov)
+
+    def virtual_bytes(self, f, layout):
+        out = bytearray()
+        for piece in layout.iter_range(0, layout.size):
+            if piece[0] == 'bytes':
+                out += piece[1]
+            else:
+                f.seek(piece[1])
+                out += f.read(piece[2])
+        return bytes(out)
+
+    def check_rewrite(self, data, moov_size):
+        with self.write(data) as f:
+            layout = build_faststart_layout(f, len(data))
+            self.assertIsNotNone(layout)
+            self.assertEqual(layout.size, len(data))
+            virtual = self.virtual_bytes(f, layout)
+        with self.write(virtual) as f:
+            boxes = read_top_level_boxes(f, len(virtual))
+        self.assertEqual([box_type for box_type, _, _ in boxes], [b"ftyp", b"moov", b"mdat", b"free"])
+        new_offsets = read_offsets(virtual, b"stco") + read_offsets(virtual, b"co64")
+        self.assertEqual(new_offsets, [offset + moov_size for offset in self.sample_offsets])
+        for i, offset in enumerate(new_offsets, 1):
+            self.assertEqual(virtual[offset:offset + 40], bytes([i]) * 40)
+
+    def test_trailing_moov_moves_forward(self):
+        self.check_rewrite(*self.trailing_moov_file())
+
+    def test_64_bit_mdat_header(self):
+        self.check_rewrite(*self.trailing_moov_file(mdat_box=large_box))
+
+    def test_partial_range(self):
+        data, moov_size = self.trailing_moov_file()
+        with self.write(data) as f:
+            layout = build_faststart_layout(f, len(data))
+            whole = self.virtual_bytes(f, layout)
+            pieces = list(layout.iter_range(20, moov_size))
+        self.assertEqual(pieces[0][0], 'bytes')
+        self.assertEqual(bytes(pieces[0][1]), whole[20:20 + moov_size - 4])
+        self.assertEqual(pieces[1][0], 'file')
+        self.assertEqual(pieces[1][2], 4)
+
+    def test_moov_already_first(self):
+        data, _ = self.trailing_moov_file()
+        with self.write(data) as f:
+            boxes = read_top_level_boxes(f, len(data))
+        order = [boxes[0], boxes[3], boxes[1], boxes[2]]
+        data = b"".join(data[offset:offset + size] for _, offset, size in order)
+        with self.write(data) as f:
+            self.assertIsNone(build_faststart_layout(f, len(data)))
+
+    def test_fragmented_file_untouched(self):
+        data, _ = self.trailing_moov_file()
+        data += box(b"moof", bytes(8))
+        with self.write(data) as f:
+            self.assertIsNone(build_faststart_layout(f, len(data)))
+
+    def test_not_isobmff(self):
+        data = b"RIFF" + bytes(100)
+        with self.write(data) as f:
+            self.assertIsNone(build_faststart_layout(f, len(data)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,55 @@
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tiles import Image, TilePyramid, level_size, levels_command, max_level
+
+
+class PyramidSizeTest(unittest.TestCase):
+
+    def test_levels(self):
+        self.assertEqual(max_level(30000, 20000), 7)
+        self.assertEqual(level_size(30000, 20000, 7), (235, 157))
+        self.assertEqual(max_level(200, 100), 0)
+
+
+class LevelsCommandTest(unittest.TestCase):
+
+    def test_one_decode_for_all_levels(self):
+        parts = {0: "/c/0.part", 1: "/c/1.part"}
+        command = levels_command("/a.png", 600, 300, parts)
+        self.assertEqual(command.count("-i"), 1)
+        graph = command[command.index("-filter_complex") + 1].split(";")
+        self.assertEqual(graph[0], "[0:v]split=2[s0][s1]")
+        self.assertEqual(graph[1], "[s0]scale=600:300:flags=area,pad=768:512:0:0:black,untile=3x2,format=yuvj420p[l0]")
+        self.assertTrue(graph[2].startswith("[s1]scale=300:150:flags=area,pad=512:256:"))
+        self.assertEqual(command[command.index("[l0]") + 1:].count("/c/0.part/%d.jpg"), 1)
+        self.assertEqual(command[-1], "/c/1.part/%d.jpg")
+
+
+@unittest.skipIf(Image is None, "Pillow is not installed")
+class PillowLimitTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_oversized_image_goes_to_ffmpeg(self):
+        pyramid = TilePyramid("/a.png", {"width": 30000, "height": 20000}, cache_dir=self.directory)
+        limit = Image.MAX_IMAGE_PIXELS
+        with mock.patch.object(Image, "open", side_effect=Image.DecompressionBombError("too big")), \
+                mock.patch.object(TilePyramid, "_generate_with_ffmpeg") as generate:
+            pyramid._generate_with_pillow(self.directory)
+        generate.assert_called_once_with(self.directory)
+        self.assertEqual(Image.MAX_IMAGE_PIXELS, limit)
+
+
+if __name__ == "__main__":
+    unittest.main()
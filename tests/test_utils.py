@@ -0,0 +1,40 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import VersionedJobCache
+
+
+class VersionedJobCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.released = []
+        self.cache = VersionedJobCache(lambda *args: list(args), release=self.released.append)
+
+    def test_job_kept_per_version(self):
+        self.assertIsNone(self.cache.current())
+        job = self.cache.get(1, "/a.mp4", {})
+        self.assertEqual(job, ["/a.mp4", {}])
+        self.assertIs(self.cache.get(1, "/a.mp4", {}), job)
+        self.assertIs(self.cache.current(), job)
+        self.assertEqual(self.released, [])
+
+    def test_new_version_releases_stale_job(self):
+        old = self.cache.get(1, "old")
+        new = self.cache.get(2, "new")
+        self.assertEqual(new, ["new"])
+        self.assertEqual(self.released, [old])
+
+    def test_close(self):
+        job = self.cache.get(1, "a")
+        self.cache.close()
+        self.assertEqual(self.released, [job])
+        self.assertIsNone(self.cache.current())
+        self.cache.close()
+        self.assertEqual(self.released, [job])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,210 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import re
+import sys
+import json
+import math
+import shutil
+import subprocess
+import threading
+
+from proxy import display_size
+from utils import get_cache_dir, source_fingerprint, prune_cache_dir, fps_passthrough_args
+
+THUMBNAIL_WIDTH = 160
+SHEET_COLUMNS = 10
+SHEET_ROWS = 10
+
+# Thumbnails are keyframes at least this far apart, and no more than
+# MAX_THUMBNAILS of them however long the video is
+MIN_THUMBNAIL_INTERVAL = 1.0
+MAX_THUMBNAILS = 500
+
+THUMBNAIL_CACHE_MAX_BYTES = 2 * 1024 * 1024 * 1024
+
+# Bump when the sheet layout changes so stale cache entries miss
+THUMBNAIL_FORMAT_VERSION = 1
+
+_PTS_TIME = re.compile(r"pts_time:\s*(-?[\d.]+)")
+
+
+def thumbnail_size(probe):
+    """Even-sized thumbnail dimensions THUMBNAIL_WIDTH wide, keeping the displayed aspect ratio."""
+    width, height = display_size(probe)
+    if not width or not height:
+        return THUMBNAIL_WIDTH, THUMBNAIL_WIDTH * 9 // 16
+    return THUMBNAIL_WIDTH, max(2, round(THUMBNAIL_WIDTH * height / width / 2) * 2)
+
+
+def thumbnail_interval(duration):
+    return max(MIN_THUMBNAIL_INTERVAL, duration / MAX_THUMBNAILS)
+
+
+def format_vtt_time(seconds):
+    milliseconds = int(round(seconds * 1000))
+    hours, milliseconds = divmod(milliseconds, 3600 * 1000)
+    minutes, milliseconds = divmod(milliseconds, 60 * 1000)
+    return "%02d:%02d:%02d.%03d" % (hours, minutes, milliseconds // 1000, milliseconds % 1000)
+
+
+def sheet_position(index, width, height):
+    """(sheet number, x, y) of thumbnail `index` within the sprite sheets."""
+    per_sheet = SHEET_COLUMNS * SHEET_ROWS
+    cell = index % per_sheet
+    return index // per_sheet, (cell % SHEET_COLUMNS) * width, (cell // SHEET_COLUMNS) * height
+
+
+def build_vtt(times, duration, width, height):
+    """WebVTT index mapping each time range to its sprite sheet cell (media fragment xywh)."""
+    lines = ["WEBVTT", ""]
+    for index, start in enumerate(times):
+        end = times[index + 1] if index + 1 < len(times) else max(duration, start + MIN_THUMBNAIL_INTERVAL)
+        sheet, x, y = sheet_position(index, width, height)
+        lines.append(f"{format_vtt_time(start)} --> {format_vtt_time(end)}")
+        lines.append(f"sheet-{sheet}.jpg#xywh={x},{y},{width},{height}")
+        lines.append("")
+    return "\n".join(lines)
+
+
+class ThumbnailSheets:
+    """
+    Background generation of seek-bar thumbnails: one ffmpeg pass that
+    decodes keyframes only (-skip_frame nokey), keeps one every
+    thumbnail_interval() seconds and tiles them into JPEG sprite sheets,
+    plus a JSON and a WebVTT index of their timestamps. Cached on disk by
+    source fingerprint; the directory only appears once it is complete.
+    """
+
+    def __init__(self, file_path, probe, cache_dir=None, verbose=False):
+        self.file_path = file_path
+        self.duration = probe.get('duration') or 0.0
+        self.width, self.height = thumbnail_size(probe)
+        self.cache_dir = cache_dir or os.path.join(get_cache_dir(), "thumbs")
+        self.verbose = verbose
+        self.directory = None
+        self.generated = 0
+        self.error = None
+        self._done = threading.Event()
+        self._thread = None
+
+    @property
+    def done(self):
+        return self._done.is_set()
+
+    @property
+    def failed(self):
+        return self.error is not None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="mediacrop-thumbnails", daemon=True)
+            self._thread.start()
+        return self
+
+    def asset_path(self, name):
+        """Path of a finished index or sheet ('index.json', 'index.vtt', 'sheet-N.jpg'), else None."""
+        if self.directory is None or not self.done:
+            return None
+        if name not in ("index.json", "index.vtt") and not re.fullmatch(r"sheet-\d+\.jpg", name):
+            return None
+        path = os.path.join(self.directory, name)
+        return path if os.path.exists(path) else None
+
+    def status(self):
+        """Progress summary for the /jobs endpoint."""
+        if self.failed:
+            state, progress = "failed", None
+        elif self.done:
+            state, progress = "done", 1.0
+        else:
+            state = "running"
+            expected = math.ceil(self.duration / thumbnail_interval(self.duration)) if self.duration else 0
+            progress = round(min(1.0, self.generated / expected), 3) if expected else None
+        return {"state": state, "progress": progress, "error": self.error}
+
+    def command(self, pattern):
+        interval = thumbnail_interval(self.duration)
+        return [
+            "ffmpeg", "-v", "info", "-nostdin", "-nostats", "-y",
+            "-skip_frame", "nokey", "-i", self.file_path,
+            "-map", "0:v:0", "-an", "-sn",
+            "-vf", (f"select='isnan(prev_selected_t)+gte(t-prev_selected_t\\,{interval:.3f})',"
+                    f"scale={self.width}:{self.height}:flags=bilinear,showinfo,"
+                    f"tile={SHEET_COLUMNS}x{SHEET_ROWS},format=yuvj420p"),
+            "-c:v", "mjpeg", "-q:v", "5",
+            # One image per tiled sheet; image2 would otherwise pad or drop
+            # sheets to the input frame rate and break the sheet numbering
+            *fps_passthrough_args(),
+            "-start_number", "0", "-f", "image2", pattern,
+        ]
+
+    def _run(self):
+        try:
+            fingerprint = source_fingerprint(self.file_path)
+            directory = os.path.join(self.cache_dir, f"thumbs-{fingerprint}-v{THUMBNAIL_FORMAT_VERSION}")
+            if os.path.isdir(directory):
+                if self.verbose:
+                    print(f"Using cached thumbnails: {directory}")
+                os.utime(directory)
+            else:
+                os.makedirs(self.cache_dir, exist_ok=True)
+                # Sheets have their own subdirectory and budget; keep the set being generated
+                prune_cache_dir(self.cache_dir, THUMBNAIL_CACHE_MAX_BYTES, keep=(directory, directory + ".part"))
+                self._generate(directory)
+            self.directory = directory
+        except Exception as e:
+            self.error = str(e)
+            print(f"Thumbnail generation error: {e}", file=sys.stderr)
+        finally:
+            self._done.set()
+
+    def _generate(self, directory):
+        part = directory + ".part"
+        shutil.rmtree(part, ignore_errors=True)
+        os.makedirs(part)
+        command = self.command(os.path.join(part, "sheet-%d.jpg"))
+        if self.verbose:
+            print(f"Generating thumbnails: {' '.join(command)}")
+        try:
+            process = subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+        except FileNotFoundError:
+            raise RuntimeError("'ffmpeg' command not found in PATH.")
+
+        # showinfo logs one line per selected frame, ahead of tiling
+        times = []
+        last_line = ""
+        for raw in process.stderr:
+            line = raw.decode("utf-8", "replace")
+            match = _PTS_TIME.search(line) if "showinfo" in line else None
+            if match:
+                times.append(max(0.0, float(match.group(1))))
+                self.generated = len(times)
+            elif line.strip():
+                last_line = line.strip()
+        if process.wait() != 0:
+            shutil.rmtree(part, ignore_errors=True)
+            raise RuntimeError(last_line or f"ffmpeg exited with status {process.returncode}")
+        if not times:
+            shutil.rmtree(part, ignore_errors=True)
+            raise RuntimeError("no keyframes found")
+        sheets = len([name for name in os.listdir(part) if re.fullmatch(r"sheet-\d+\.jpg", name)])
+        expected = math.ceil(len(times) / (SHEET_COLUMNS * SHEET_ROWS))
+        if sheets != expected:
+            shutil.rmtree(part, ignore_errors=True)
+            raise RuntimeError(f"ffmpeg wrote {sheets} sprite sheets for {len(times)} thumbnails, expected {expected}")
+
+        index = {
+            "width": self.width,
+            "height": self.height,
+            "columns": SHEET_COLUMNS,
+            "rows": SHEET_ROWS,
+            "times": [round(t, 3) for t in times],
+        }
+        with open(os.path.join(part, "index.json"), "w", encoding="utf-8") as f:
+            json.dump(index, f)
+        with open(os.path.join(part, "index.vtt"), "w", encoding="utf-8") as f:
+            f.write(build_vtt(times, self.duration, self.width, self.height))
+        os.replace(part, directory)
+
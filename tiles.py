@@ -0,0 +1,281 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import sys
+import json
+import math
+import shutil
+import subprocess
+import threading
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+else:
+    try:
+        import pillow_heif
+        pillow_heif.register_heif_opener()
+    except ImportError:
+        pass
+
+from utils import get_cache_dir, source_fingerprint, prune_cache_dir
+
+TILE_SIZE = 256
+
+# Still images that are tiled once they exceed the limits below
+TILE_EXTS = [".jpg", ".jpeg", ".png", ".webp", ".bmp", ".avif", ".tiff", ".tif", ".heic", ".heif", ".jxl"]
+TILE_MIN_PIXELS = 40 * 1000 * 1000
+TILE_MIN_DIMENSION = 8192
+
+# Longest side of the single overview image shown under the tiles
+OVERVIEW_MAX_DIMENSION = 2048
+
+TILE_CACHE_MAX_BYTES = 2 * 1024 * 1024 * 1024
+
+# Bump when the tile settings change so stale cache entries miss
+TILE_FORMAT_VERSION = 1
+
+
+def needs_tiles(ext, probe):
+    """True when the image is too large to hand to the browser as one <img>."""
+    width, height = probe.get('width', 0), probe.get('height', 0)
+    if ext not in TILE_EXTS or not width or not height:
+        return False
+    return width * height > TILE_MIN_PIXELS or max(width, height) > TILE_MIN_DIMENSION
+
+
+def level_size(width, height, level):
+    """Pixel size of the image at pyramid `level` (level 0 is full resolution)."""
+    scale = 2 ** level
+    return max(1, math.ceil(width / scale)), max(1, math.ceil(height / scale))
+
+
+def max_level(width, height, tile_size=TILE_SIZE):
+    """Coarsest level, where the whole image fits in a single tile."""
+    return max(0, math.ceil(math.log2(max(width, height) / tile_size)))
+
+
+def overview_size(width, height):
+    scale = min(1.0, OVERVIEW_MAX_DIMENSION / max(width, height))
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
+
+def _run_ffmpeg(command, verbose):
+    if verbose:
+        print(f"Tiling: {' '.join(command)}")
+    try:
+        subprocess.run(command, capture_output=True, check=True)
+    except FileNotFoundError:
+        raise RuntimeError("'ffmpeg' command not found in PATH.")
+    except subprocess.CalledProcessError as e:
+        raise RuntimeError(e.stderr.decode("utf-8", "replace").strip() or f"ffmpeg exited with status {e.returncode}")
+
+
+def levels_command(file_path, width, height, parts):
+    """
+    ffmpeg command that decodes the image once and writes every pyramid
+    level in `parts` ({level: directory}) as TILE_SIZE tiles numbered in
+    raster order.
+    """
+    levels = sorted(parts)
+    graph = [f"[0:v]split={len(levels)}" + "".join(f"[s{level}]" for level in levels)]
+    outputs = []
+    for level in levels:
+        level_width, level_height = level_size(width, height, level)
+        columns = math.ceil(level_width / TILE_SIZE)
+        rows = math.ceil(level_height / TILE_SIZE)
+        # untile splits the padded frame into tiles in raster order
+        graph.append(
+            f"[s{level}]scale={level_width}:{level_height}:flags=area,"
+            f"pad={columns * TILE_SIZE}:{rows * TILE_SIZE}:0:0:black,"
+            f"untile={columns}x{rows},format=yuvj420p[l{level}]"
+        )
+        outputs += [
+            "-map", f"[l{level}]", "-c:v", "mjpeg", "-q:v", "3", "-start_number", "0", "-f", "image2",
+            os.path.join(parts[level], "%d.jpg"),
+        ]
+    return ["ffmpeg", "-v", "error", "-nostdin", "-y", "-i", file_path, "-filter_complex", ";".join(graph)] + outputs
+
+
+class TilePyramid:
+    """
+    Background generation of a JPEG tile pyramid (TILE_SIZE tiles at every
+    power-of-two level) plus an overview image, cached on disk by source
+    fingerprint. The overview is written first, so the viewer can show
+    something almost immediately, then the levels, each becoming visible
+    only once complete. Edge tiles are padded to a full TILE_SIZE square.
+
+    Pillow decodes the image once and halves it level by level. Without
+    Pillow (or past its pixel limit) ffmpeg decodes the source twice:
+    once for the overview and once for all levels together.
+    """
+
+    def __init__(self, file_path, probe, cache_dir=None, verbose=False):
+        self.file_path = file_path
+        self.width = probe.get('width', 0)
+        self.height = probe.get('height', 0)
+        self.max_level = max_level(self.width, self.height)
+        self.cache_dir = cache_dir or os.path.join(get_cache_dir(), "tiles")
+        self.verbose = verbose
+        self.directory = None
+        self.levels_done = 0
+        self.error = None
+        self._done = threading.Event()
+        self._overview_ready = threading.Event()
+        self._thread = None
+
+    @property
+    def done(self):
+        return self._done.is_set()
+
+    @property
+    def failed(self):
+        return self.error is not None
+
+    def manifest(self):
+        """What the viewer needs to lay out tiles."""
+        return {
+            "width": self.width,
+            "height": self.height,
+            "tileSize": TILE_SIZE,
+            "maxLevel": self.max_level,
+        }
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="mediacrop-tiles", daemon=True)
+            self._thread.start()
+        return self
+
+    def wait_overview(self, timeout=None):
+        """Blocks until the overview exists or generation failed; False on timeout."""
+        return self._overview_ready.wait(timeout)
+
+    def overview_path(self):
+        if self.directory is None:
+            return None
+        return os.path.join(self.directory, "overview.jpg")
+
+    def tile_path(self, level, x, y):
+        """Path of a finished tile, or None if its level isn't ready (or it doesn't exist)."""
+        if self.directory is None or not 0 <= level <= self.max_level:
+            return None
+        path = os.path.join(self.directory, str(level), f"{x}_{y}.jpg")
+        return path if os.path.exists(path) else None
+
+    def status(self):
+        """Progress summary for the /jobs endpoint."""
+        if self.failed:
+            state, progress = "failed", None
+        elif self.done:
+            state, progress = "done", 1.0
+        else:
+            state = "running"
+            progress = round(self.levels_done / (self.max_level + 2), 3)
+        return {"state": state, "progress": progress, "error": self.error}
+
+    def _run(self):
+        try:
+            fingerprint = source_fingerprint(self.file_path)
+            directory = os.path.join(self.cache_dir, f"tiles-{fingerprint}-v{TILE_FORMAT_VERSION}")
+            manifest_path = os.path.join(directory, "manifest.json")
+            if os.path.exists(manifest_path):
+                if self.verbose:
+                    print(f"Using cached tiles: {directory}")
+                os.utime(directory)
+                self.directory = directory
+                self._overview_ready.set()
+                return
+            os.makedirs(self.cache_dir, exist_ok=True)
+            # Tiles have their own subdirectory and budget; never prune the pyramid being built
+            prune_cache_dir(self.cache_dir, TILE_CACHE_MAX_BYTES, keep=(directory,))
+            os.makedirs(directory, exist_ok=True)
+            self.directory = directory
+            if Image is not None:
+                self._generate_with_pillow(directory)
+            else:
+                self._generate_with_ffmpeg(directory)
+            # The manifest marks the pyramid complete for later runs
+            with open(manifest_path, "w", encoding="utf-8") as f:
+                json.dump(self.manifest(), f)
+        except Exception as e:
+            self.error = str(e)
+            print(f"Tile generation error: {e}", file=sys.stderr)
+        finally:
+            self._overview_ready.set()
+            self._done.set()
+
+    def _publish_level(self, directory, level):
+        final = os.path.join(directory, str(level))
+        if os.path.isdir(final):
+            shutil.rmtree(final)
+        os.replace(os.path.join(directory, f"{level}.part"), final)
+        self.levels_done += 1
+
+    def _generate_with_ffmpeg(self, directory):
+        overview = os.path.join(directory, "overview.jpg")
+        width, height = overview_size(self.width, self.height)
+        _run_ffmpeg([
+            "ffmpeg", "-v", "error", "-nostdin", "-y", "-i", self.file_path,
+            "-frames:v", "1", "-vf", f"scale={width}:{height}:flags=area,format=yuvj420p",
+            "-c:v", "mjpeg", "-q:v", "3", "-f", "image2", "-update", "1", overview + ".part",
+        ], self.verbose)
+        os.replace(overview + ".part", overview)
+        self.levels_done += 1
+        self._overview_ready.set()
+
+        # One decode for every level: ffmpeg splits the source and scales each
+        # branch to its level, so levels all appear when the run finishes
+        parts = {}
+        for level in range(self.max_level + 1):
+            parts[level] = os.path.join(directory, f"{level}.part")
+            shutil.rmtree(parts[level], ignore_errors=True)
+            os.makedirs(parts[level])
+        _run_ffmpeg(levels_command(self.file_path, self.width, self.height, parts), self.verbose)
+        for level in range(self.max_level, -1, -1):
+            width, height = level_size(self.width, self.height, level)
+            columns = math.ceil(width / TILE_SIZE)
+            rows = math.ceil(height / TILE_SIZE)
+            for index in range(columns * rows):
+                os.replace(
+                    os.path.join(parts[level], f"{index}.jpg"),
+                    os.path.join(parts[level], f"{index % columns}_{index // columns}.jpg")
+                )
+            self._publish_level(directory, level)
+
+    def _generate_with_pillow(self, directory):
+        try:
+            image = Image.open(self.file_path)
+        except Image.DecompressionBombError:
+            # Past Pillow's decompression-bomb limit, which is process-wide
+            # and not ours to lift; ffmpeg has no such limit
+            if self.verbose:
+                print("Tiling: image exceeds Pillow's pixel limit, using ffmpeg")
+            self._generate_with_ffmpeg(directory)
+            return
+        image = image.convert("RGB")
+
+        overview = os.path.join(directory, "overview.jpg")
+        image.resize(overview_size(self.width, self.height), Image.BOX).save(overview + ".part", format="JPEG", quality=85)
+        os.replace(overview + ".part", overview)
+        self.levels_done += 1
+        self._overview_ready.set()
+
+        # Pillow halves the image level by level, so levels go finest first
+        for level in range(self.max_level + 1):
+            if level:
+                image = image.reduce(2)
+            part = os.path.join(directory, f"{level}.part")
+            shutil.rmtree(part, ignore_errors=True)
+            os.makedirs(part)
+            columns = math.ceil(image.width / TILE_SIZE)
+            rows = math.ceil(image.height / TILE_SIZE)
+            for y in range(rows):
+                for x in range(columns):
+                    # crop() past the edge pads with black, like the ffmpeg path
+                    tile = image.crop((x * TILE_SIZE, y * TILE_SIZE, (x + 1) * TILE_SIZE, (y + 1) * TILE_SIZE))
+                    tile.save(os.path.join(part, f"{x}_{y}.jpg"), format="JPEG", quality=85)
+            self._publish_level(directory, level)
+
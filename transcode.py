@@ -0,0 +1,308 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import sys
+import subprocess
+import tempfile
+import threading
+from collections import deque
+
+from file_delivery import MediaFile
+from utils import get_cache_dir
+
+# Containers browsers can't open directly but whose streams often can be
+# copied into fragmented MP4 unchanged
+REMUX_EXTS = [".mkv", ".avi", ".ts", ".m2ts", ".mts", ".flv"]
+
+BROWSER_VIDEO_CODECS = ("h264", "vp9", "av1")
+BROWSER_AUDIO_CODECS = ("aac", "mp3", "opus")
+
+FRAGMENTED_MP4_FLAGS = "frag_keyframe+empty_moov+default_base_moof"
+
+SPOOL_CHUNK = 256 * 1024
+
+# How long a range request waits for the transcode to reach its start
+SPOOL_WAIT_SECONDS = 30
+
+# A remux runs at most this far ahead of the furthest byte a reader asked
+# for; ffmpeg then blocks on the full pipe until playback catches up
+REMUX_READAHEAD_BYTES = 128 * 1024 * 1024
+
+# Largest remux spool kept on disk; past it the remux fails instead of
+# filling the cache filesystem
+REMUX_SPOOL_MAX_BYTES = 8 * 1024 * 1024 * 1024
+
+
+def can_remux(ext, probe):
+    """True when the file's video stream can be stream-copied into MP4 for the browser."""
+    return ext in REMUX_EXTS and probe.get('video_codec') in BROWSER_VIDEO_CODECS
+
+
+def remux_command(file_path, probe):
+    """
+    ffmpeg command that stream-copies video (and compatible audio) into
+    fragmented MP4 on stdout. Incompatible audio is converted to AAC.
+    """
+    audio_codec = probe.get('audio_codec')
+    command = [
+        "ffmpeg", "-v", "error", "-nostdin",
+        "-i", file_path,
+        "-map", "0:v:0", "-map", "0:a:0?",
+        "-c:v", "copy",
+    ]
+    if audio_codec is None or audio_codec in BROWSER_AUDIO_CODECS:
+        command += ["-c:a", "copy"]
+    else:
+        command += ["-c:a", "aac", "-b:a", "192k"]
+    command += ["-f", "mp4", "-movflags", FRAGMENTED_MP4_FLAGS, "pipe:1"]
+    return command
+
+
+class SpooledTranscode:
+    """
+    Runs an ffmpeg command that writes to stdout and spools the output to
+    a file as it is produced. Any number of readers can stream from the
+    spool while it grows, and re-seeks into already produced bytes are
+    served from disk instead of restarting ffmpeg.
+
+    With `final_path` the finished spool is renamed there (a disk cache
+    entry) and kept by close(); unfinished spools are always removed.
+    ffmpeg's stderr is collected for error reports; `-progress pipe:2`
+    lines there, together with `duration`, drive status().
+
+    With `readahead` the spool stops reading ffmpeg's output once it is
+    that many bytes past the furthest offset a reader waited for, so an
+    unwatched remux doesn't copy the whole file. With `max_bytes` the
+    transcode fails once the spool would grow past it.
+    """
+
+    def __init__(self, command, spool_path=None, final_path=None, duration=None, verbose=False,
+                 spool_dir=None, readahead=None, max_bytes=None):
+        self.command = command
+        self.final_path = final_path
+        self.duration = duration
+        self.verbose = verbose
+        self.readahead = readahead
+        self.max_bytes = max_bytes
+        if spool_path is None:
+            fd, spool_path = tempfile.mkstemp(prefix="mediacrop-", suffix=".mp4", dir=spool_dir)
+            os.close(fd)
+        self.path = spool_path
+        self.handle = MediaFile(spool_path)
+        self.produced = 0
+        self._demand = 0
+        self.out_time = 0.0
+        self.done = False
+        self.error = None
+        self._closed = False
+        self._process = None
+        self._thread = None
+        self._messages = deque(maxlen=5)
+        self._cond = threading.Condition()
+
+    @classmethod
+    def completed(cls, path):
+        """A spool for output that already exists on disk (a cache hit)."""
+        spool = cls(None, spool_path=path, final_path=path)
+        spool.produced = os.path.getsize(path)
+        spool.done = True
+        return spool
+
+    @property
+    def failed(self):
+        return self.error is not None
+
+    def status(self):
+        """Progress summary for the /jobs endpoint."""
+        with self._cond:
+            if self.failed:
+                state, progress = "failed", None
+            elif self.done:
+                state, progress = "done", 1.0
+            else:
+                state = "running"
+                progress = min(self.out_time / self.duration, 0.99) if self.duration else None
+            return {
+                "state": state,
+                "progress": None if progress is None else round(progress, 3),
+                "bytes": self.produced,
+                "error": self.error,
+            }
+
+    def start(self):
+        with self._cond:
+            if self._thread is not None:
+                return self
+            # Readers may open the spool before ffmpeg writes anything
+            open(self.path, "wb").close()
+            self._thread = threading.Thread(target=self._run, name="mediacrop-spool", daemon=True)
+            self._thread.start()
+        return self
+
+    def _run(self):
+        if self.verbose:
+            print(f"Spooling: {' '.join(self.command)}")
+        try:
+            self._process = subprocess.Popen(
+                self.command,
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+            )
+        except FileNotFoundError:
+            self._finish("'ffmpeg' command not found in PATH.")
+            return
+        except OSError as e:
+            self._finish(str(e))
+            return
+        if self._closed:
+            # close() ran before the process existed
+            self._process.kill()
+        stderr_reader = threading.Thread(target=self._read_progress, name="mediacrop-progress", daemon=True)
+        stderr_reader.start()
+
+        buf = bytearray(SPOOL_CHUNK)
+        view = memoryview(buf)
+        try:
+            with open(self.path, "wb", buffering=0) as out:
+                while True:
+                    if self.readahead is not None:
+                        with self._cond:
+                            self._cond.wait_for(
+                                lambda: self._closed or self.produced < self._demand + self.readahead
+                            )
+                    # readinto1 returns what one read() of the pipe gives instead of
+                    # waiting for a full buffer, so readers see output as ffmpeg writes it
+                    n = self._process.stdout.readinto1(view)
+                    if not n:
+                        break
+                    if self.max_bytes is not None and self.produced + n > self.max_bytes:
+                        raise OSError(f"output exceeds the {self.max_bytes // (1024 * 1024)} MiB spool limit")
+                    out.write(view[:n])
+                    with self._cond:
+                        self.produced += n
+                        self._cond.notify_all()
+        except OSError as e:
+            self._process.kill()
+            self._process.wait()
+            self._finish(str(e))
+            return
+
+        returncode = self._process.wait()
+        stderr_reader.join(1.0)
+        if returncode != 0:
+            detail = "; ".join(self._messages)
+            self._finish(f"ffmpeg exited with status {returncode}" + (f": {detail}" if detail else ""))
+            return
+        if self.final_path and self.final_path != self.path:
+            try:
+                os.replace(self.path, self.final_path)
+            except OSError as e:
+                self._finish(str(e))
+                return
+            with self._cond:
+                self.handle.close()
+                self.path = self.final_path
+                self.handle = MediaFile(self.final_path)
+        self._finish(None)
+
+    def _read_progress(self):
+        """Parses `-progress` key=value lines; anything else is an ffmpeg message."""
+        for raw in self._process.stderr:
+            line = raw.decode("utf-8", "replace").strip()
+            key, sep, value = line.partition("=")
+            if sep and key.replace("_", "").isalnum() and " " not in key:
+                if key == "out_time_us" and value.isdigit():
+                    with self._cond:
+                        self.out_time = int(value) / 1e6
+                continue
+            if line:
+                self._messages.append(line)
+                if self.verbose:
+                    print(line, file=sys.stderr)
+
+    def _finish(self, error):
+        with self._cond:
+            self.error = error
+            self.done = True
+            self._cond.notify_all()
+        if error and not self._closed:
+            print(f"Transcode error: {error}", file=sys.stderr)
+
+    def wait_for(self, offset, timeout=None):
+        """
+        Blocks until more than `offset` bytes are spooled, production ends,
+        or `timeout` seconds pass. Returns the number of bytes produced.
+        """
+        with self._cond:
+            if offset > self._demand:
+                self._demand = offset
+                self._cond.notify_all()
+            self._cond.wait_for(lambda: self.produced > offset or self.done, timeout)
+            return self.produced
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        process = self._process
+        if process is not None and process.poll() is None:
+            process.kill()
+            process.wait()
+        self.handle.close()
+        if not (self.final_path and self.path == self.final_path and self.done and not self.failed):
+            try:
+                os.remove(self.path)
+            except OSError:
+                pass
+
+
+class SpoolCache:
+    """
+    Keeps one SpooledTranscode for the current file version. A new version
+    (the file changed on disk) replaces the old spool and removes it.
+    Spools live in the cache directory rather than the temp directory,
+    which is often RAM-backed, and are bounded by REMUX_READAHEAD_BYTES
+    and REMUX_SPOOL_MAX_BYTES.
+    """
+
+    def __init__(self, verbose=False, spool_dir=None, readahead=REMUX_READAHEAD_BYTES,
+                 max_bytes=REMUX_SPOOL_MAX_BYTES):
+        self.verbose = verbose
+        self.spool_dir = spool_dir or os.path.join(get_cache_dir(), "remux")
+        self.readahead = readahead
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._version = None
+        self._spool = None
+
+    def current(self):
+        with self._lock:
+            return self._spool
+
+    def get(self, version, command_factory):
+        """Returns the running or finished spool for `version`, starting one if needed."""
+        with self._lock:
+            if version == self._version and self._spool is not None:
+                return self._spool
+            stale = self._spool
+            os.makedirs(self.spool_dir, exist_ok=True)
+            self._spool = SpooledTranscode(
+                command_factory(),
+                spool_dir=self.spool_dir,
+                readahead=self.readahead,
+                max_bytes=self.max_bytes,
+                verbose=self.verbose,
+            ).start()
+            self._version = version
+            spool = self._spool
+        if stale is not None:
+            stale.close()
+        return spool
+
+    def close(self):
+        with self._lock:
+            spool, self._spool, self._version = self._spool, None, None
+        if spool is not None:
+            spool.close()
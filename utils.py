@@ -2,6 +2,11 @@
 # -*- coding: utf-8 -*-
 
 import os
+import re
+import hashlib
+import shutil
+import subprocess
+import threading
 
 
 def get_file_info(filepath):
@@ -16,4 +21,158 @@ def get_file_info(filepath):
             'absolute_path': os.path.abspath(filepath)
         }
     except Exception:
-        return None
\ No newline at end of file
+        return None
+
+def get_cache_dir():
+    """Per-user cache directory for derived files (proxies, indexes)."""
+    if os.name == 'nt':
+        base = os.environ.get('LOCALAPPDATA') or os.path.expanduser('~')
+    else:
+        base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'mediacrop')
+
+
+def source_fingerprint(filepath, sample_bytes=64 * 1024):
+    """
+    Content fingerprint for disk cache keys: size, mtime and the first and
+    last `sample_bytes`, so a moved or renamed file still hits the cache.
+    """
+    st = os.stat(filepath)
+    digest = hashlib.sha1(f"{st.st_size}:{st.st_mtime_ns}".encode())
+    with open(filepath, 'rb') as f:
+        digest.update(f.read(sample_bytes))
+        if st.st_size > sample_bytes:
+            f.seek(max(sample_bytes, st.st_size - sample_bytes))
+            digest.update(f.read(sample_bytes))
+    return digest.hexdigest()[:20]
+
+
+def _entry_size(path):
+    if not os.path.isdir(path):
+        return os.path.getsize(path)
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+
+def prune_cache_dir(directory, max_bytes, keep=()):
+    """
+    Deletes the least recently used entries (files or directories) in
+    `directory` until it fits `max_bytes`. Paths in `keep` (entries in
+    use) are never deleted.
+    """
+    try:
+        names = os.listdir(directory)
+    except OSError:
+        return
+    entries = []
+    total = 0
+    for name in names:
+        path = os.path.join(directory, name)
+        try:
+            mtime = os.stat(path).st_mtime
+            size = _entry_size(path)
+        except OSError:
+            continue
+        entries.append((mtime, size, path))
+        total += size
+    entries.sort()
+    for _, size, path in entries:
+        if total <= max_bytes:
+            break
+        if path in keep:
+            continue
+        try:
+            if os.path.isdir(path):
+                shutil.rmtree(path)
+            else:
+                os.remove(path)
+            total -= size
+        except OSError:
+            pass
+
+
+_ffmpeg_version = None
+
+
+def ffmpeg_version():
+    """
+    (major, minor) of the ffmpeg in PATH, or None when it can't be told
+    (git builds report a revision instead; they are treated as current).
+    """
+    global _ffmpeg_version
+    if _ffmpeg_version is None:
+        version = ()
+        try:
+            output = subprocess.run(
+                ["ffmpeg", "-hide_banner", "-version"],
+                stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                timeout=10
+            ).stdout.decode("utf-8", "replace")
+            match = re.match(r"ffmpeg version n?(\d+)\.(\d+)", output)
+            if match:
+                version = (int(match.group(1)), int(match.group(2)))
+        except (OSError, subprocess.SubprocessError):
+            pass
+        _ffmpeg_version = version
+    return _ffmpeg_version or None
+
+
+def ffmpeg_older_than(major, minor):
+    version = ffmpeg_version()
+    return version is not None and version < (major, minor)
+
+
+def fps_passthrough_args():
+    """
+    ffmpeg output options passing frames through at their own timestamps.
+    Muxers like image2 and rawvideo default to constant frame rate and
+    otherwise duplicate or drop frames; -fps_mode replaced -vsync in 5.1.
+    """
+    if ffmpeg_older_than(5, 1):
+        return ["-vsync", "passthrough"]
+    return ["-fps_mode", "passthrough"]
+
+
+class VersionedJobCache:
+    """
+    Keeps the background job (preview, index, decoder session...) for the
+    current version of the media file. get() returns the kept job while
+    the version is unchanged and otherwise replaces it with factory(*args);
+    `release`, if given, is called with a job once it is replaced or the
+    cache is closed (to stop its ffmpeg or close its files).
+    """
+
+    def __init__(self, factory, release=None):
+        self.factory = factory
+        self.release = release
+        self._lock = threading.Lock()
+        self._version = None
+        self._job = None
+
+    def current(self):
+        """The kept job, without starting one; None before the first get()."""
+        with self._lock:
+            return self._job
+
+    def get(self, version, *args):
+        with self._lock:
+            if version == self._version and self._job is not None:
+                return self._job
+            stale = self._job
+            self._job = job = self.factory(*args)
+            self._version = version
+        if stale is not None and self.release is not None:
+            self.release(stale)
+        return job
+
+    def close(self):
+        with self._lock:
+            job, self._job, self._version = self._job, None, None
+        if job is not None and self.release is not None:
+            self.release(job)